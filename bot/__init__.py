@@ -38,7 +38,14 @@ LOGGER = getLogger(__name__)
 cpu_no = cpu_count()
 
 DOWNLOAD_DIR = "/usr/src/app/downloads/"
-intervals = {"status": {}, "qb": "", "jd": "", "nzb": "", "stopAll": False}
+intervals = {
+    "status": {},
+    "qb": "",
+    "jd": "",
+    "nzb": "",
+    "seed": "",
+    "stopAll": False,
+}
 qb_torrents = {}
 jd_downloads = {}
 nzb_jobs = {}
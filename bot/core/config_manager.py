@@ -15,14 +15,20 @@ class Config:
     EXCLUDED_EXTENSIONS = ""
     FFMPEG_CMDS = {}
     FILELION_API = ""
+    GDRIVE_CLONE_WORKERS = 10
+    GDRIVE_DOWNLOAD_WORKERS = 4
     GDRIVE_ID = ""
+    GDRIVE_INDEX = False
+    GDRIVE_UPLOAD_WORKERS = 4
     INCOMPLETE_TASK_NOTIFIER = False
     INDEX_URL = ""
     IS_TEAM_DRIVE = False
     JD_EMAIL = ""
     JD_PASS = ""
     LEECH_DUMP_CHAT = ""
+    LEECH_DEDUPE = False
     LEECH_FILENAME_PREFIX = ""
+    LEECH_PREFETCH_FILES = 2
     LEECH_SPLIT_SIZE = 2097152000
     MEDIA_GROUP = False
     HYBRID_LEECH = False
@@ -33,18 +39,23 @@ class Config:
     QUEUE_ALL = 0
     QUEUE_DOWNLOAD = 0
     QUEUE_UPLOAD = 0
+    RCLONE_AUTO_TUNE = False
     RCLONE_FLAGS = ""
     RCLONE_PATH = ""
     RCLONE_SERVE_URL = ""
     RCLONE_SERVE_USER = ""
     RCLONE_SERVE_PASS = ""
     RCLONE_SERVE_PORT = 8080
+    RCLONE_TUNING = {}
     RSS_CHAT = ""
     RSS_DELAY = 600
     RSS_SIZE_LIMIT = 0
     SEARCH_API_LINK = ""
     SEARCH_LIMIT = 0
     SEARCH_PLUGINS = []
+    SEED_DISK_LIMIT = 0
+    SEED_THROTTLE_LIMIT = 0
+    SEED_UPLOAD_LIMIT = 0
     STATUS_LIMIT = 4
     STATUS_UPDATE_INTERVAL = 15
     STOP_DUPLICATE = False
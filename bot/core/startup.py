@@ -20,6 +20,8 @@ from .. import (
     sudo_users,
 )
 from ..helper.ext_utils.db_handler import database
+from ..helper.mirror_leech_utils.gdrive_utils.sa_pool import sa_pool
+from ..helper.mirror_leech_utils.rclone_utils.tuner import rclone_tuner
 from .config_manager import Config
 from .mltb_client import TgClient
 from .torrent_manager import TorrentManager
@@ -151,6 +153,16 @@ async def load_settings():
                 rss_dict[user_id] = row
             LOGGER.info("Rss data has been imported from Database.")
 
+        if await database.db.sa_usage[BOT_ID].find_one():
+            rows = database.db.sa_usage[BOT_ID].find({})
+            async for row in rows:
+                sa_pool.usage[row.pop("_id")] = row
+
+        if await database.db.rclone_tuning[BOT_ID].find_one():
+            rows = database.db.rclone_tuning[BOT_ID].find({})
+            async for row in rows:
+                rclone_tuner.stats[row["_id"]] = row["profiles"]
+
 
 async def save_settings():
     if database.db is None:
@@ -2,6 +2,7 @@ from aioaria2 import Aria2WebsocketClient
 from aioqbt.client import create_client
 from asyncio import gather, TimeoutError
 from aiohttp import ClientError
+from functools import partial
 from pathlib import Path
 from inspect import iscoroutinefunction
 from tenacity import (
@@ -11,7 +12,7 @@ from tenacity import (
     retry_if_exception_type,
 )
 
-from .. import LOGGER, aria2_options
+from .. import LOGGER, aria2_options, bot_loop
 
 
 def wrap_with_retry(obj, max_retries=3):
@@ -33,16 +34,102 @@ def wrap_with_retry(obj, max_retries=3):
     return obj
 
 
+class Aria2Error(Exception):
+    pass
+
+
+class Aria2Batch:
+    # calls issued within this window are sent as one system.multicall
+    WINDOW = 0.01
+    MAX_CALLS = 200
+    BATCHED = {
+        "tellStatus",
+        "getOption",
+        "getFiles",
+        "changeOption",
+        "forceRemove",
+        "forcePause",
+        "unpause",
+        "removeDownloadResult",
+        "tellActive",
+        "tellWaiting",
+        "getGlobalStat",
+    }
+
+    def __init__(self, client):
+        self._client = client
+        self._pending = []
+        self._handle = None
+
+    def __getattr__(self, name):
+        if name in self.BATCHED:
+            return partial(self._call, name)
+        return getattr(self._client, name)
+
+    def addUri(self, uris, options=None, position=None):
+        params = [uris, options or {}]
+        if position is not None:
+            params.append(position)
+        return self._call("addUri", *params)
+
+    def _call(self, method, *params):
+        future = bot_loop.create_future()
+        self._pending.append((method, list(params), future))
+        if len(self._pending) >= self.MAX_CALLS:
+            self._flush()
+        elif self._handle is None:
+            self._handle = bot_loop.call_later(self.WINDOW, self._flush)
+        return future
+
+    def _flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        calls, self._pending = self._pending, []
+        if calls:
+            bot_loop.create_task(self._send(calls))
+
+    async def _send(self, calls):
+        try:
+            if len(calls) == 1:
+                method, params, _ = calls[0]
+                results = [[await self._client.jsonrpc(method, params)]]
+            else:
+                results = await self._client.jsonrpc(
+                    "multicall",
+                    [
+                        [
+                            {"methodName": f"aria2.{method}", "params": params}
+                            for method, params, _ in calls
+                        ]
+                    ],
+                    "system.",
+                )
+        except Exception as e:
+            for *_, future in calls:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (*_, future), result in zip(calls, results):
+            if future.done():
+                continue
+            if isinstance(result, dict):
+                future.set_exception(Aria2Error(result.get("message", result)))
+            else:
+                future.set_result(result[0])
+
+
 class TorrentManager:
     aria2 = None
     qbittorrent = None
 
     @classmethod
     async def initiate(cls):
-        cls.aria2, cls.qbittorrent = await gather(
+        aria2, cls.qbittorrent = await gather(
             Aria2WebsocketClient.new("http://localhost:6800/jsonrpc"),
             create_client("http://localhost:8090/api/v2/"),
         )
+        cls.aria2 = Aria2Batch(aria2)
         cls.qbittorrent = wrap_with_retry(cls.qbittorrent)
 
     @classmethod
@@ -98,15 +185,15 @@ class TorrentManager:
         results = await gather(cls.aria2.tellActive(), cls.aria2.tellWaiting(0, 1000))
         for res in results:
             downloads.extend(res)
-            tasks = []
-        for download in downloads:
-            if download.get("status", "") != "complete":
-                tasks.append(cls.aria2.changeOption(download.get("gid"), {key: value}))
+        tasks = [
+            cls.aria2.changeOption(download.get("gid"), {key: value})
+            for download in downloads
+            if download.get("status", "") != "complete"
+        ]
         if tasks:
-            try:
-                await gather(*tasks)
-            except Exception as e:
-                LOGGER.error(e)
+            for result in await gather(*tasks, return_exceptions=True):
+                if isinstance(result, Exception):
+                    LOGGER.error(result)
         if key not in ["checksum", "index-out", "out", "pause", "select-file"]:
             await cls.aria2.changeGlobalOption({key: value})
             aria2_options[key] = value
@@ -39,6 +39,7 @@ from .ext_utils.files_utils import (
     SevenZ,
 )
 from .ext_utils.links_utils import (
+    is_cloud_dest,
     is_gdrive_id,
     is_rclone_path,
     is_gdrive_link,
@@ -54,6 +55,7 @@ from .telegram_helper.message_utils import (
     send_message,
     send_status_message,
     get_tg_link_message,
+    get_message,
     temp_download,
 )
 
@@ -68,6 +70,7 @@ class TaskConfig:
         self.up_dir = ""
         self.link = ""
         self.up_dest = ""
+        self.up_dests = []
         self.rc_flags = ""
         self.tag = ""
         self.name = ""
@@ -111,6 +114,7 @@ class TaskConfig:
         self.as_med = False
         self.as_doc = False
         self.is_file = False
+        self.keep_source = False
         self.bot_trans = False
         self.user_trans = False
         self.progress = True
@@ -158,6 +162,71 @@ class TaskConfig:
             if not await aiopath.exists(token_path):
                 raise ValueError(f"NO TOKEN! {token_path} not Exists!")
 
+    def get_upload_path(self, dest):
+        if self.user_dict.get("UPLOAD_PATHS", False):
+            return self.user_dict["UPLOAD_PATHS"].get(dest, dest)
+        elif "UPLOAD_PATHS" not in self.user_dict and Config.UPLOAD_PATHS:
+            return Config.UPLOAD_PATHS.get(dest, dest)
+        return dest
+
+    async def get_cloud_dest(self, dest):
+        default_upload = (
+            self.user_dict.get("DEFAULT_UPLOAD", "") or Config.DEFAULT_UPLOAD
+        )
+        if (not dest and default_upload == "rc") or dest == "rc":
+            dest = self.user_dict.get("RCLONE_PATH") or Config.RCLONE_PATH
+        elif (not dest and default_upload == "gd") or dest == "gd":
+            dest = self.user_dict.get("GDRIVE_ID") or Config.GDRIVE_ID
+        if not dest:
+            raise ValueError("No Upload Destination!")
+        if is_gdrive_id(dest):
+            if not dest.startswith(("mtp:", "tp:", "sa:")) and self.user_dict.get(
+                "USER_TOKENS", False
+            ):
+                dest = f"mtp:{dest}"
+        elif is_rclone_path(dest):
+            if not dest.startswith("mrcc:") and self.user_dict.get(
+                "USER_TOKENS", False
+            ):
+                dest = f"mrcc:{dest}"
+            dest = dest.strip("/")
+        else:
+            raise ValueError("Wrong Upload Destination!")
+
+        if dest not in ["rcl", "gdl"]:
+            await self.is_token_exists(dest, "up")
+
+        if dest == "rcl":
+            if self.is_clone:
+                if not is_rclone_path(self.link):
+                    raise ValueError("You can't clone from different types of tools")
+                config_path = self.get_config_path(self.link)
+            else:
+                config_path = None
+            dest = await RcloneList(self).get_rclone_path("rcu", config_path)
+            if not is_rclone_path(dest):
+                raise ValueError(dest)
+        elif dest == "gdl":
+            if self.is_clone:
+                if not is_gdrive_link(self.link):
+                    raise ValueError("You can't clone from different types of tools")
+                token_path = self.get_token_path(self.link)
+            else:
+                token_path = None
+            dest = await GoogleDriveList(self).get_target_id("gdu", token_path)
+            if not is_gdrive_id(dest):
+                raise ValueError(dest)
+        elif self.is_clone:
+            if is_gdrive_link(self.link) and self.get_token_path(
+                self.link
+            ) != self.get_token_path(dest):
+                raise ValueError("You must use the same token to clone!")
+            elif is_rclone_path(self.link) and self.get_config_path(
+                self.link
+            ) != self.get_config_path(dest):
+                raise ValueError("You must use the same config to clone!")
+        return dest
+
     async def before_start(self):
         self.name_sub = (
             self.name_sub
@@ -211,12 +280,24 @@ class TaskConfig:
             and "USER_TRANSMISSION" not in self.user_dict
         )
 
-        if self.user_dict.get("UPLOAD_PATHS", False):
-            if self.up_dest in self.user_dict["UPLOAD_PATHS"]:
-                self.up_dest = self.user_dict["UPLOAD_PATHS"][self.up_dest]
-        elif "UPLOAD_PATHS" not in self.user_dict and Config.UPLOAD_PATHS:
-            if self.up_dest in Config.UPLOAD_PATHS:
-                self.up_dest = Config.UPLOAD_PATHS[self.up_dest]
+        if isinstance(self.up_dest, str) and "," in self.up_dest:
+            if self.is_clone:
+                raise ValueError("Clone supports only one upload destination!")
+            dests = [
+                self.get_upload_path(dest)
+                for dest in map(str.strip, self.up_dest.split(","))
+                if dest
+            ]
+            if self.is_leech:
+                self.up_dests = [dest for dest in dests if is_cloud_dest(dest)]
+                tg_dests = [dest for dest in dests if not is_cloud_dest(dest)]
+                if len(tg_dests) > 1:
+                    raise ValueError("Only one telegram upload destination allowed!")
+                self.up_dest = tg_dests[0] if tg_dests else ""
+            else:
+                self.up_dest, *self.up_dests = dests
+        else:
+            self.up_dest = self.get_upload_path(self.up_dest)
 
         if self.ffmpeg_cmds and not isinstance(self.ffmpeg_cmds, list):
             if self.user_dict.get("FFMPEG_CMDS", None):
@@ -248,75 +329,15 @@ class TaskConfig:
                                 cmds.append(vl)
                 self.ffmpeg_cmds = cmds
 
+        self.up_dests = [await self.get_cloud_dest(dest) for dest in self.up_dests]
+
         if not self.is_leech:
             self.stop_duplicate = (
                 self.user_dict.get("STOP_DUPLICATE")
                 or "STOP_DUPLICATE" not in self.user_dict
                 and Config.STOP_DUPLICATE
             )
-            default_upload = (
-                self.user_dict.get("DEFAULT_UPLOAD", "") or Config.DEFAULT_UPLOAD
-            )
-            if (not self.up_dest and default_upload == "rc") or self.up_dest == "rc":
-                self.up_dest = self.user_dict.get("RCLONE_PATH") or Config.RCLONE_PATH
-            elif (not self.up_dest and default_upload == "gd") or self.up_dest == "gd":
-                self.up_dest = self.user_dict.get("GDRIVE_ID") or Config.GDRIVE_ID
-            if not self.up_dest:
-                raise ValueError("No Upload Destination!")
-            if is_gdrive_id(self.up_dest):
-                if not self.up_dest.startswith(
-                    ("mtp:", "tp:", "sa:")
-                ) and self.user_dict.get("USER_TOKENS", False):
-                    self.up_dest = f"mtp:{self.up_dest}"
-            elif is_rclone_path(self.up_dest):
-                if not self.up_dest.startswith("mrcc:") and self.user_dict.get(
-                    "USER_TOKENS", False
-                ):
-                    self.up_dest = f"mrcc:{self.up_dest}"
-                self.up_dest = self.up_dest.strip("/")
-            else:
-                raise ValueError("Wrong Upload Destination!")
-
-            if self.up_dest not in ["rcl", "gdl"]:
-                await self.is_token_exists(self.up_dest, "up")
-
-            if self.up_dest == "rcl":
-                if self.is_clone:
-                    if not is_rclone_path(self.link):
-                        raise ValueError(
-                            "You can't clone from different types of tools"
-                        )
-                    config_path = self.get_config_path(self.link)
-                else:
-                    config_path = None
-                self.up_dest = await RcloneList(self).get_rclone_path(
-                    "rcu", config_path
-                )
-                if not is_rclone_path(self.up_dest):
-                    raise ValueError(self.up_dest)
-            elif self.up_dest == "gdl":
-                if self.is_clone:
-                    if not is_gdrive_link(self.link):
-                        raise ValueError(
-                            "You can't clone from different types of tools"
-                        )
-                    token_path = self.get_token_path(self.link)
-                else:
-                    token_path = None
-                self.up_dest = await GoogleDriveList(self).get_target_id(
-                    "gdu", token_path
-                )
-                if not is_gdrive_id(self.up_dest):
-                    raise ValueError(self.up_dest)
-            elif self.is_clone:
-                if is_gdrive_link(self.link) and self.get_token_path(
-                    self.link
-                ) != self.get_token_path(self.up_dest):
-                    raise ValueError("You must use the same token to clone!")
-                elif is_rclone_path(self.link) and self.get_config_path(
-                    self.link
-                ) != self.get_config_path(self.up_dest):
-                    raise ValueError("You must use the same config to clone!")
+            self.up_dest = await self.get_cloud_dest(self.up_dest)
         else:
             self.up_dest = (
                 self.up_dest
@@ -516,17 +537,16 @@ class TaskConfig:
             msg = [s.strip() for s in input_list]
             index = msg.index("-i")
             msg[index + 1] = f"{self.multi - 1}"
-            nextmsg = await self.client.get_messages(
-                chat_id=self.message.chat.id,
-                message_ids=self.message.reply_to_message_id + 1,
+            nextmsg = await get_message(
+                self.client,
+                self.message.chat.id,
+                self.message.reply_to_message_id + 1,
             )
             msgts = " ".join(msg)
             if self.multi > 2:
                 msgts += f"\nCancel Multi: <code>/{BotCommands.CancelTaskCommand[1]} {self.multi_tag}</code>"
             nextmsg = await send_message(nextmsg, msgts)
-        nextmsg = await self.client.get_messages(
-            chat_id=self.message.chat.id, message_ids=nextmsg.id
-        )
+        nextmsg = await get_message(self.client, self.message.chat.id, nextmsg.id)
         if self.message.from_user:
             nextmsg.from_user = self.user
         else:
@@ -565,8 +585,8 @@ class TaskConfig:
                 multi_tags.add(self.multi_tag)
                 msg += f"\nCancel Multi: <code>/{BotCommands.CancelTaskCommand[1]} {self.multi_tag}</code>"
             nextmsg = await send_message(self.message, msg)
-            nextmsg = await self.client.get_messages(
-                chat_id=self.message.chat.id, message_ids=nextmsg.id
+            nextmsg = await get_message(
+                self.client, self.message.chat.id, nextmsg.id
             )
             if self.message.from_user:
                 nextmsg.from_user = self.user
@@ -5,6 +5,7 @@ from concurrent.futures import ThreadPoolExecutor
 from asyncio import (
     create_subprocess_exec,
     create_subprocess_shell,
+    gather,
     run_coroutine_threadsafe,
     sleep,
 )
@@ -71,14 +72,15 @@ def bt_selection_buttons(id_):
 
 
 async def get_telegraph_list(telegraph_content):
-    path = [
-        (
-            await telegraph.create_page(
+    pages = await gather(
+        *(
+            telegraph.create_page(
                 title="Mirror-Leech-Bot Drive Search", content=content
             )
-        )["path"]
-        for content in telegraph_content
-    ]
+            for content in telegraph_content
+        )
+    )
+    path = [page["path"] for page in pages]
     if len(path) > 1:
         await telegraph.edit_telegraph(path, telegraph_content)
     buttons = ButtonMaker()
@@ -205,6 +205,77 @@ class DbManager:
         await self.db.tasks[TgClient.ID].drop()
         return notifier_dict
 
+    async def get_leech_file(self, fingerprint, key, session):
+        if self._return:
+            return None
+        return await self.db.leech[TgClient.ID].find_one(
+            {"_id": f"{fingerprint}_{key}", "session": session}
+        )
+
+    async def add_leech_file(self, fingerprint, key, session, msg, file_id):
+        if self._return:
+            return
+        await self.db.leech[TgClient.ID].replace_one(
+            {"_id": f"{fingerprint}_{key}"},
+            {
+                "session": session,
+                "chat_id": msg.chat.id,
+                "message_id": msg.id,
+                "file_id": file_id,
+            },
+            upsert=True,
+        )
+
+    async def rm_leech_file(self, fingerprint, key):
+        if self._return:
+            return
+        await self.db.leech[TgClient.ID].delete_one({"_id": f"{fingerprint}_{key}"})
+
+    async def update_sa_usage(self, name, usage):
+        if self._return:
+            return
+        await self.db.sa_usage[TgClient.ID].replace_one(
+            {"_id": name}, usage, upsert=True
+        )
+
+    async def update_rclone_tuning(self, bucket, profiles):
+        if self._return:
+            return
+        await self.db.rclone_tuning[TgClient.ID].replace_one(
+            {"_id": bucket}, {"profiles": profiles}, upsert=True
+        )
+
+    async def get_torrent_file(self, infohash):
+        if self._return:
+            return None
+        if doc := await self.db.torrents[TgClient.ID].find_one({"_id": infohash}):
+            return doc["data"]
+        return None
+
+    async def update_torrent_file(self, infohash, data):
+        if self._return:
+            return
+        await self.db.torrents[TgClient.ID].replace_one(
+            {"_id": infohash}, {"data": data}, upsert=True
+        )
+
+    async def get_upload_session(self, key):
+        if self._return:
+            return None
+        return await self.db.uploads[TgClient.ID].find_one({"_id": key})
+
+    async def update_upload_session(self, key, session):
+        if self._return:
+            return
+        await self.db.uploads[TgClient.ID].replace_one(
+            {"_id": key}, session, upsert=True
+        )
+
+    async def rm_upload_session(self, key):
+        if self._return:
+            return
+        await self.db.uploads[TgClient.ID].delete_one({"_id": key})
+
     async def trunc_table(self, name):
         if self._return:
             return
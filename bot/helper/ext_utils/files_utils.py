@@ -1,6 +1,7 @@
 from aioshutil import rmtree as aiormtree, move
 from asyncio import create_subprocess_exec, sleep, wait_for
 from asyncio.subprocess import PIPE
+from hashlib import sha256
 from magic import Magic
 from os import walk, path as ospath, readlink
 from re import split as re_split, I, search as re_search, escape
@@ -207,6 +208,15 @@ def get_mime_type(file_path):
     return mime_type
 
 
+def get_file_fingerprint(file_path, block_size=4194304):
+    # Full content hash, a sampled one can match different files of equal size
+    fhash = sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(block_size):
+            fhash.update(chunk)
+    return f"{fhash.hexdigest()}_{ospath.getsize(file_path)}"
+
+
 async def remove_excluded_files(fpath, ee):
     for root, _, files in await sync_to_async(walk, fpath):
         for f in files:
@@ -84,6 +84,10 @@ when you should use b:(leech by bot)? When your default settings is leech by use
 
 In case you want to specify whether using token.pickle or service accounts you can add tp:gdrive_id (using token.pickle) or sa:gdrive_id (using service accounts) or mtp:gdrive_id (using token.pickle uploaded from usetting).
 DEFAULT_UPLOAD doesn't affect on leech cmds.
+
+To upload to multiple destinations at once separate them by comma:
+/cmd link -up gd, remote:dir, mtp:gdrive_id
+/leech link -up id/@username, gd, remote:dir (one telegram chat, the rest are gdrive/rclone destinations)
 """
 
 user_download = """<b>User Download</b>: link
@@ -40,6 +40,13 @@ def is_rclone_path(path: str):
     )
 
 
+def is_cloud_dest(dest: str):
+    return dest in ["gd", "rc"] or (
+        not dest.startswith(("b:", "u:", "h:"))
+        and (is_gdrive_id(dest) or is_rclone_path(dest))
+    )
+
+
 def is_gdrive_id(id_: str):
     return bool(
         re_match(
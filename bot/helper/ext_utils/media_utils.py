@@ -32,6 +32,11 @@ async def create_thumb(msg, _id=""):
     return output
 
 
+def get_image_size(path):
+    with Image.open(path) as img:
+        return img.size
+
+
 async def get_media_info(path):
     try:
         result = await cmd_exec(
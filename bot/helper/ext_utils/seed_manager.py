@@ -0,0 +1,106 @@
+from asyncio import gather, sleep
+from psutil import disk_usage
+from time import time
+
+from ... import (
+    DOWNLOAD_DIR,
+    LOGGER,
+    intervals,
+    non_queued_up,
+    task_dict,
+    task_dict_lock,
+)
+from ...core.config_manager import Config
+from .bot_utils import new_task, sync_to_async
+
+CHECK_INTERVAL = 10
+
+# mid -> seeding start, last upload activity and applied upload limit
+_seeds = {}
+
+
+async def _get_seeds():
+    async with task_dict_lock:
+        tasks = [
+            task
+            for task in task_dict.values()
+            if getattr(task, "seeding", False) and hasattr(task, "seed_info")
+        ]
+    await gather(*(task.update() for task in tasks))
+    now = time()
+    seeds = []
+    for task in tasks:
+        if (info := task.seed_info()) is None:
+            continue
+        size, ratio, peers, speed = info
+        state = _seeds.setdefault(
+            task.listener.mid, {"start": now, "active": now, "limit": None}
+        )
+        if speed:
+            state["active"] = now
+        idle = (now - state["active"]) / 3600
+        age = (now - state["start"]) / 86400
+        # well shared, idle and old seeds are worth the least
+        value = (1 + peers) / ((1 + ratio) * (1 + idle) * (1 + age))
+        seeds.append((value, task, size))
+    for mid in set(_seeds) - {task.listener.mid for _, task, _ in seeds}:
+        del _seeds[mid]
+    seeds.sort(key=lambda s: s[0])
+    return seeds
+
+
+async def _evict(task, reason):
+    LOGGER.info(f"Evicting seed: {task.name()} - {reason}")
+    _seeds.pop(task.listener.mid, None)
+    await task.cancel_task()
+
+
+async def _apply_budgets(seeds):
+    if limit := Config.SEED_DISK_LIMIT:
+        total = sum(size for _, _, size in seeds)
+        while seeds and total > limit:
+            _, task, size = seeds.pop(0)
+            await _evict(task, "Seed disk limit reached")
+            total -= size
+    if not seeds:
+        return
+    limit = Config.SEED_UPLOAD_LIMIT
+    if non_queued_up and Config.SEED_THROTTLE_LIMIT:
+        limit = Config.SEED_THROTTLE_LIMIT
+    per_seed = max(limit // len(seeds), 1024) if limit else 0
+    for _, task, _ in seeds:
+        state = _seeds[task.listener.mid]
+        if state["limit"] != per_seed:
+            await task.set_seed_limit(per_seed)
+            state["limit"] = per_seed
+
+
+async def free_space(size):
+    if not Config.SEED_DISK_LIMIT or not size or not intervals["seed"]:
+        return
+    free = (await sync_to_async(disk_usage, DOWNLOAD_DIR)).free
+    if free >= size:
+        return
+    for _, task, seed_size in await _get_seeds():
+        await _evict(task, "Not enough space for a new download")
+        free += seed_size
+        if free >= size:
+            break
+
+
+@new_task
+async def _seed_listener():
+    while True:
+        try:
+            if not (seeds := await _get_seeds()):
+                intervals["seed"] = ""
+                break
+            await _apply_budgets(seeds)
+        except Exception as e:
+            LOGGER.error(f"Seed manager: {e}")
+        await sleep(CHECK_INTERVAL)
+
+
+async def on_seed_start():
+    if not intervals["seed"]:
+        intervals["seed"] = await _seed_listener()
@@ -10,9 +10,10 @@ from ... import (
 )
 from ...core.config_manager import Config
 from ..mirror_leech_utils.gdrive_utils.search import GoogleDriveSearch
-from .bot_utils import sync_to_async, get_telegraph_list
+from .bot_utils import get_telegraph_list
 from .files_utils import get_base_name
 from .links_utils import is_gdrive_id
+from .seed_manager import free_space
 
 
 async def stop_duplicate_check(listener):
@@ -39,12 +40,9 @@ async def stop_duplicate_check(listener):
             name = None
 
     if name is not None:
-        telegraph_content, contents_no = await sync_to_async(
-            GoogleDriveSearch(stop_dup=True, no_multi=listener.is_clone).drive_list,
-            name,
-            listener.up_dest,
-            listener.user_id,
-        )
+        telegraph_content, contents_no = await GoogleDriveSearch(
+            stop_dup=True, no_multi=listener.is_clone
+        ).drive_list(name, listener.up_dest, listener.user_id)
         if telegraph_content:
             msg = f"File/Folder is already available in Drive.\nHere are {contents_no} list results:"
             button = await get_telegraph_list(telegraph_content)
@@ -54,6 +52,8 @@ async def stop_duplicate_check(listener):
 
 
 async def check_running_tasks(listener, state="dl"):
+    if state == "dl":
+        await free_space(listener.size)
     all_limit = Config.QUEUE_ALL
     state_limit = Config.QUEUE_DOWNLOAD if state == "dl" else Config.QUEUE_UPLOAD
     event = None
@@ -1,4 +1,4 @@
-from asyncio import sleep
+from asyncio import gather, sleep
 from secrets import token_urlsafe
 from telegraph.aio import Telegraph
 from telegraph.exceptions import RetryAfterError
@@ -55,27 +55,23 @@ class TelegraphHelper:
             return await self.edit_page(path, title, content)
 
     async def edit_telegraph(self, path, telegraph_content):
-        nxt_page = 1
-        prev_page = 0
         num_of_path = len(path)
-        for content in telegraph_content:
-            if nxt_page == 1:
-                content += (
-                    f'<b><a href="https://telegra.ph/{path[nxt_page]}">Next</a></b>'
-                )
-                nxt_page += 1
+        pages = []
+        for index, content in enumerate(telegraph_content):
+            if index:
+                content += f'<b><a href="https://telegra.ph/{path[index - 1]}">Prev</a></b>'
+                if index + 1 < num_of_path:
+                    content += f'<b> | <a href="https://telegra.ph/{path[index + 1]}">Next</a></b>'
             else:
-                if prev_page <= num_of_path:
-                    content += f'<b><a href="https://telegra.ph/{path[prev_page]}">Prev</a></b>'
-                    prev_page += 1
-                if nxt_page < num_of_path:
-                    content += f'<b> | <a href="https://telegra.ph/{path[nxt_page]}">Next</a></b>'
-                    nxt_page += 1
-            await self.edit_page(
-                path=path[prev_page],
-                title="Mirror-leech-bot Torrent Search",
-                content=content,
+                content += f'<b><a href="https://telegra.ph/{path[1]}">Next</a></b>'
+            pages.append(
+                self.edit_page(
+                    path=path[index],
+                    title="Mirror-leech-bot Torrent Search",
+                    content=content,
+                )
             )
+        await gather(*pages)
         return
 
 
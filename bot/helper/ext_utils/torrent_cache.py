@@ -0,0 +1,62 @@
+from aiofiles import open as aiopen
+from aiofiles.os import listdir, makedirs, path as aiopath, remove
+from base64 import b16encode, b32decode
+from logging import getLogger
+from re import search as re_search
+
+from .db_handler import database
+
+LOGGER = getLogger(__name__)
+
+CACHE_DIR = "torrents_cache"
+CACHE_LIMIT = 1000
+
+
+def get_magnet_hash(magnet):
+    match = re_search(r"xt=urn:btih:([a-zA-Z0-9]+)", magnet)
+    if match is None:
+        return None
+    hash_ = match.group(1)
+    if len(hash_) == 32:
+        hash_ = b16encode(b32decode(hash_.upper())).decode()
+    return hash_.lower() if len(hash_) == 40 else None
+
+
+async def get_cached_torrent(magnet):
+    if (hash_ := get_magnet_hash(magnet)) is None:
+        return None
+    path = f"{CACHE_DIR}/{hash_}.torrent"
+    if await aiopath.exists(path):
+        async with aiopen(path, "rb") as f:
+            return await f.read()
+    if data := await database.get_torrent_file(hash_):
+        await _save(path, data)
+        return data
+    return None
+
+
+async def _save(path, data):
+    await makedirs(CACHE_DIR, exist_ok=True)
+    async with aiopen(path, "wb") as f:
+        await f.write(data)
+    files = await listdir(CACHE_DIR)
+    if len(files) > CACHE_LIMIT:
+        paths = [f"{CACHE_DIR}/{name}" for name in files]
+        mtimes = {p: await aiopath.getmtime(p) for p in paths}
+        for p in sorted(paths, key=mtimes.get)[: len(files) - CACHE_LIMIT]:
+            await remove(p)
+
+
+async def is_cached(infohash):
+    return await aiopath.exists(f"{CACHE_DIR}/{infohash.lower()}.torrent")
+
+
+async def cache_torrent(infohash, data):
+    path = f"{CACHE_DIR}/{infohash.lower()}.torrent"
+    if not data or await aiopath.exists(path):
+        return
+    try:
+        await _save(path, data)
+        await database.update_torrent_file(infohash.lower(), data)
+    except Exception as e:
+        LOGGER.error(f"While caching torrent metadata {infohash}: {e}")
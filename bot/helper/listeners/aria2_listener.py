@@ -1,6 +1,7 @@
 from contextlib import suppress
+from aiofiles import open as aiopen
 from aiofiles.os import remove, path as aiopath
-from asyncio import sleep, TimeoutError
+from asyncio import gather, sleep, TimeoutError
 from time import time
 from aiohttp.client_exceptions import ClientError
 
@@ -9,6 +10,8 @@ from ...core.config_manager import Config
 from ...core.torrent_manager import TorrentManager, is_metadata, aria2_name
 from ..ext_utils.bot_utils import bt_selection_buttons
 from ..ext_utils.files_utils import clean_unwanted
+from ..ext_utils.seed_manager import on_seed_start
+from ..ext_utils.torrent_cache import cache_torrent
 from ..ext_utils.status_utils import get_task_by_gid
 from ..ext_utils.task_manager import stop_duplicate_check
 from ..mirror_leech_utils.status_utils.aria2_status import Aria2Status
@@ -19,10 +22,11 @@ from ..telegram_helper.message_utils import (
 )
 
 
-async def _on_download_started(api, data):
+async def _on_download_started(_, data):
     gid = data["params"][0]["gid"]
-    download = await api.tellStatus(gid)
-    options = await api.getOption(gid)
+    download, options = await gather(
+        TorrentManager.aria2.tellStatus(gid), TorrentManager.aria2.getOption(gid)
+    )
     if options.get("follow-torrent", "") == "false":
         return
     if is_metadata(download):
@@ -40,7 +44,7 @@ async def _on_download_started(api, data):
                     ):
                         await delete_message(meta)
                         break
-                    download = await api.tellStatus(gid)
+                    download = await TorrentManager.aria2.tellStatus(gid)
         return
     else:
         LOGGER.info(f"onDownloadStarted: {aria2_name(download)} - Gid: {gid}")
@@ -48,7 +52,7 @@ async def _on_download_started(api, data):
 
     await sleep(2)
     if task := await get_task_by_gid(gid):
-        download = await api.tellStatus(gid)
+        download = await TorrentManager.aria2.tellStatus(gid)
         if "bittorrent" in download:
             task.listener.is_torrent = True
         task.listener.name = aria2_name(download)
@@ -58,11 +62,27 @@ async def _on_download_started(api, data):
             await task.listener.on_download_error(msg, button)
 
 
-async def _on_download_complete(api, data):
+async def _cache_metadata(download):
+    infohash = download.get("infoHash", "")
+    path = f"{download.get('dir', '')}/{infohash}.torrent"
+    if not infohash or not await aiopath.exists(path):
+        return
+    try:
+        async with aiopen(path, "rb") as f:
+            data = await f.read()
+        await remove(path)
+    except Exception as e:
+        LOGGER.error(f"{e}: while reading saved metadata. Path: {path}")
+        return
+    await cache_torrent(infohash, data)
+
+
+async def _on_download_complete(_, data):
     try:
         gid = data["params"][0]["gid"]
-        download = await api.tellStatus(gid)
-        options = await api.getOption(gid)
+        download, options = await gather(
+            TorrentManager.aria2.tellStatus(gid), TorrentManager.aria2.getOption(gid)
+        )
     except (TimeoutError, ClientError, Exception) as e:
         LOGGER.error(f"onDownloadComplete: {e}")
         return
@@ -71,11 +91,12 @@ async def _on_download_complete(api, data):
     if download.get("followedBy", []):
         new_gid = download.get("followedBy", [])[0]
         LOGGER.info(f"Gid changed from {gid} to {new_gid}")
+        await _cache_metadata(download)
         if task := await get_task_by_gid(new_gid):
             task.listener.is_torrent = True
             if Config.BASE_URL and task.listener.select:
                 if not task.queued:
-                    await api.forcePause(new_gid)
+                    await TorrentManager.aria2.forcePause(new_gid)
                 SBUTTONS = bt_selection_buttons(new_gid)
                 msg = "Your download paused. Choose files then press Done Selecting button to start downloading."
                 await send_message(task.listener.message, msg, SBUTTONS)
@@ -99,10 +120,10 @@ async def _on_download_complete(api, data):
             await TorrentManager.aria2_remove(download)
 
 
-async def _on_bt_download_complete(api, data):
+async def _on_bt_download_complete(_, data):
     gid = data["params"][0]["gid"]
     await sleep(1)
-    download = await api.tellStatus(gid)
+    download = await TorrentManager.aria2.tellStatus(gid)
     LOGGER.info(f"onBtDownloadComplete: {aria2_name(download)} - Gid: {gid}")
     if task := await get_task_by_gid(gid):
         task.listener.is_torrent = True
@@ -120,20 +141,20 @@ async def _on_bt_download_complete(api, data):
             await clean_unwanted(download.get("dir", ""))
         if task.listener.seed:
             try:
-                await api.changeOption(gid, {"max-upload-limit": "0"})
+                await TorrentManager.aria2.changeOption(gid, {"max-upload-limit": "0"})
             except (TimeoutError, ClientError, Exception) as e:
                 LOGGER.error(
                     f"{e} You are not able to seed because you added global option seed-time=0 without adding specific seed_time for this torrent GID: {gid}"
                 )
         else:
             try:
-                await api.forcePause(gid)
+                await TorrentManager.aria2.forcePause(gid)
             except (TimeoutError, ClientError, Exception) as e:
                 LOGGER.error(f"onBtDownloadComplete: {e} GID: {gid}")
         await task.listener.on_download_complete()
         if intervals["stopAll"]:
             return
-        download = await api.tellStatus(gid)
+        download = await TorrentManager.aria2.tellStatus(gid)
         if (
             task.listener.seed
             and download.get("status", "") == "complete"
@@ -159,6 +180,7 @@ async def _on_bt_download_complete(api, data):
                 task_dict[task.listener.mid].start_time = time()
             LOGGER.info(f"Seeding started: {aria2_name(download)} - Gid: {gid}")
             await update_status_message(task.listener.message.chat.id)
+            await on_seed_start()
         else:
             await TorrentManager.aria2_remove(download)
 
@@ -170,14 +192,15 @@ async def _on_download_stopped(_, data):
         await task.listener.on_download_error("Dead torrent!")
 
 
-async def _on_download_error(api, data):
+async def _on_download_error(_, data):
     gid = data["params"][0]["gid"]
     await sleep(1)
     LOGGER.info(f"onDownloadError: {gid}")
     error = "None"
     with suppress(TimeoutError, ClientError, Exception):
-        download = await api.tellStatus(gid)
-        options = await api.getOption(gid)
+        download, options = await gather(
+            TorrentManager.aria2.tellStatus(gid), TorrentManager.aria2.getOption(gid)
+        )
         error = download.get("errorMessage", "")
         LOGGER.info(f"Download Error: {error}")
     if options.get("follow-torrent", "") == "false":
@@ -16,6 +16,8 @@ from ...core.config_manager import Config
 from ...core.torrent_manager import TorrentManager
 from ..ext_utils.bot_utils import new_task
 from ..ext_utils.files_utils import clean_unwanted
+from ..ext_utils.seed_manager import free_space, on_seed_start
+from ..ext_utils.torrent_cache import cache_torrent, is_cached
 from ..ext_utils.status_utils import get_readable_time, get_task_by_gid
 from ..ext_utils.task_manager import stop_duplicate_check
 from ..mirror_leech_utils.status_utils.qbit_status import QbittorrentStatus
@@ -51,9 +53,22 @@ async def _on_seed_finish(tor):
     await _remove_torrent(ext_hash, tor.tags[0])
 
 
+@new_task
+async def save_metadata(ext_hash):
+    if await is_cached(ext_hash):
+        return
+    try:
+        data = await TorrentManager.qbittorrent.torrents.export(ext_hash)
+    except (ClientError, TimeoutError, Exception, AQError) as e:
+        LOGGER.error(f"{e}: while exporting torrent metadata. Hash: {ext_hash}")
+        return
+    await cache_torrent(ext_hash, data)
+
+
 @new_task
 async def _stop_duplicate(tor):
     if task := await get_task_by_gid(tor.hash[:12]):
+        await free_space(tor.amount_left)
         if task.listener.stop_duplicate:
             task.listener.name = tor.content_path.rsplit("/", 1)[-1].rsplit(".!qB", 1)[
                 0
@@ -102,6 +117,7 @@ async def _on_download_complete(tor):
                     return
             await update_status_message(task.listener.message.chat.id)
             LOGGER.info(f"Seeding started: {tor.name} - Hash: {ext_hash}")
+            await on_seed_start()
         else:
             await _remove_torrent(ext_hash, tag)
     else:
@@ -139,6 +155,7 @@ async def _qb_listener():
                         if not qb_torrents[tag]["stop_dup_check"]:
                             qb_torrents[tag]["stop_dup_check"] = True
                             await _stop_duplicate(tor_info)
+                            await save_metadata(tor_info.hash)
                     elif state == "stalledDL":
                         if (
                             not qb_torrents[tag]["rechecked"]
@@ -1,6 +1,7 @@
 from aiofiles.os import path as aiopath, listdir, remove
 from asyncio import sleep, gather
 from html import escape
+from os import path as ospath, walk
 from requests import utils as rutils
 
 from ... import (
@@ -33,14 +34,16 @@ from ..ext_utils.files_utils import (
 from ..ext_utils.links_utils import is_gdrive_id
 from ..ext_utils.status_utils import get_readable_file_size
 from ..ext_utils.task_manager import start_from_queued, check_running_tasks
-from ..mirror_leech_utils.gdrive_utils.upload import GoogleDriveUpload
+from ..mirror_leech_utils.gdrive_utils.upload import GoogleDriveUpload, SharedReads
 from ..mirror_leech_utils.rclone_utils.transfer import RcloneTransferHelper
+from ..mirror_leech_utils.status_utils.fanout_status import FanoutStatus
 from ..mirror_leech_utils.status_utils.gdrive_status import GoogleDriveStatus
 from ..mirror_leech_utils.status_utils.queue_status import QueueStatus
 from ..mirror_leech_utils.status_utils.rclone_status import RcloneStatus
 from ..mirror_leech_utils.status_utils.telegram_status import TelegramStatus
 from ..mirror_leech_utils.telegram_uploader import TelegramUploader
 from ..telegram_helper.button_build import ButtonMaker
+from ..telegram_helper.rate_limiter import tg_governor
 from ..telegram_helper.message_utils import (
     send_message,
     delete_status,
@@ -48,6 +51,35 @@ from ..telegram_helper.message_utils import (
 )
 
 
+class UploadDestination:
+    def __init__(self, listener, up_dest, is_leech=False):
+        self.__dict__.update(
+            _listener=listener,
+            up_dest=up_dest,
+            is_leech=is_leech,
+            keep_source=True,
+            result=None,
+            error="",
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._listener, name)
+
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            self.__dict__[name] = value
+        else:
+            setattr(self._listener, name, value)
+
+    async def on_upload_complete(
+        self, link, files, folders, mime_type, rclone_path="", dir_id=""
+    ):
+        self.result = (link, files, folders, mime_type, rclone_path, dir_id)
+
+    async def on_upload_error(self, error):
+        self.error = str(error)
+
+
 class TaskListener(TaskConfig):
     def __init__(self):
         super().__init__()
@@ -253,7 +285,7 @@ class TaskListener(TaskConfig):
         self.name = up_path.replace(f"{up_dir}/", "").split("/", 1)[0]
         self.size = await get_path_size(up_dir)
 
-        if self.is_leech and not self.compress:
+        if self.is_leech and not self.compress and not self.up_dests:
             await self.proceed_split(up_path, gid)
             if self.is_cancelled:
                 return
@@ -274,7 +306,9 @@ class TaskListener(TaskConfig):
 
         self.size = await get_path_size(up_dir)
 
-        if self.is_leech:
+        if self.up_dests:
+            await self._fanout_upload(up_dir, up_path, gid)
+        elif self.is_leech:
             LOGGER.info(f"Leech Name: {self.name}")
             tg = TelegramUploader(self, up_dir)
             async with task_dict_lock:
@@ -291,7 +325,7 @@ class TaskListener(TaskConfig):
                 task_dict[self.mid] = GoogleDriveStatus(self, drive, gid, "up")
             await gather(
                 update_status_message(self.message.chat.id),
-                sync_to_async(drive.upload),
+                drive.upload(),
             )
             del drive
         else:
@@ -306,6 +340,112 @@ class TaskListener(TaskConfig):
             del RCTransfer
         return
 
+    def _get_uploader(self, dest, up_dir, up_path, gid, shared_reads):
+        if dest.is_leech:
+            tg = TelegramUploader(dest, up_dir)
+            return TelegramStatus(dest, tg, gid, "up"), tg.upload()
+        elif is_gdrive_id(dest.up_dest):
+            drive = GoogleDriveUpload(dest, up_path, shared_reads)
+            return GoogleDriveStatus(dest, drive, gid, "up"), drive.upload()
+        RCTransfer = RcloneTransferHelper(dest)
+        return RcloneStatus(dest, RCTransfer, gid, "up"), RCTransfer.upload(up_path)
+
+    async def _run_uploads(self, dests, up_dir, up_path, gid):
+        # rclone and pyrogram open the files themselves, only drive reads are ours
+        drives = sum(
+            not dest.is_leech and is_gdrive_id(dest.up_dest) for dest in dests
+        )
+        shared_reads = SharedReads(drives) if drives > 1 else None
+        statuses, uploads = zip(
+            *(
+                self._get_uploader(dest, up_dir, up_path, gid, shared_reads)
+                for dest in dests
+            )
+        )
+        async with task_dict_lock:
+            task_dict[self.mid] = FanoutStatus(self, list(statuses), gid)
+        await gather(update_status_message(self.message.chat.id), *uploads)
+
+    async def _needs_split(self, up_path):
+        if self.compress:
+            return False
+        if self.is_file:
+            return await get_path_size(up_path) > self.split_size
+        for dirpath, _, files in await sync_to_async(walk, up_path):
+            for file_ in files:
+                if await get_path_size(ospath.join(dirpath, file_)) > self.split_size:
+                    return True
+        return False
+
+    async def _fanout_upload(self, up_dir, up_path, gid):
+        dests = [UploadDestination(self, dest) for dest in self.up_dests]
+        tg_dest = None
+        if self.is_leech:
+            tg_dest = UploadDestination(self, self.up_dest, True)
+        else:
+            dests.insert(0, UploadDestination(self, self.up_dest))
+        LOGGER.info(
+            f"Upload Name: {self.name} to {len(dests) + bool(tg_dest)} destinations"
+        )
+        # splitting rewrites the files, so telegram waits for the cloud uploads
+        split = tg_dest is not None and await self._needs_split(up_path)
+        if tg_dest is not None and not split:
+            dests.append(tg_dest)
+        await self._run_uploads(dests, up_dir, up_path, gid)
+        if split and not self.is_cancelled:
+            await self.proceed_split(up_path, gid)
+            if self.is_cancelled:
+                return
+            self.clear()
+            dests.append(tg_dest)
+            await self._run_uploads([tg_dest], up_dir, up_path, gid)
+        if self.is_cancelled:
+            error = next((dest.error for dest in dests if dest.error), "")
+            await self.on_upload_error(error or "your upload has been stopped!")
+            return
+        if not any(dest.result for dest in dests):
+            await self.on_upload_error(
+                "\n".join(f"{dest.up_dest}: {dest.error}" for dest in dests)
+            )
+            return
+        await self.on_fanout_complete(tg_dest, dests)
+
+    async def proceed_tg_copy(self, message, session):
+        media = (
+            message.document
+            or message.photo
+            or message.video
+            or message.audio
+            or message.voice
+            or message.video_note
+            or message.sticker
+            or message.animation
+        )
+        if (
+            not self.is_leech
+            or self.up_dests
+            or self.name
+            or self.folder_name
+            or self.thumb
+            or self.extract
+            or self.compress
+            or self.join
+            or self.name_sub
+            or self.ffmpeg_cmds
+            or self.convert_audio
+            or self.convert_video
+            or self.sample_video
+            or self.screen_shots
+            or self.as_doc
+            and not message.document
+            or media.file_size > self.split_size
+            or (getattr(media, "file_name", None) or "")
+            .lower()
+            .endswith(tuple(self.excluded_extensions))
+        ):
+            return False
+        return await TelegramUploader(self, self.dir).copy_message(message, session)
+
     async def on_upload_complete(
         self, link, files, folders, mime_type, rclone_path="", dir_id=""
     ):
@@ -318,63 +458,116 @@ class TaskListener(TaskConfig):
         msg = f"<b>Name: </b><code>{escape(self.name)}</code>\n\n<b>Size: </b>{get_readable_file_size(self.size)}"
         LOGGER.info(f"Task Done: {self.name}")
         if self.is_leech:
-            msg += f"\n<b>Total Files: </b>{folders}"
-            if mime_type != 0:
-                msg += f"\n<b>Corrupted Files: </b>{mime_type}"
-            msg += f"\n<b>cc: </b>{self.tag}\n\n"
-            if not files:
-                await send_message(self.message, msg)
-            else:
-                fmsg = ""
-                for index, (link, name) in enumerate(files.items(), start=1):
-                    fmsg += f"{index}. <a href='{link}'>{name}</a>\n"
-                    if len(fmsg.encode() + msg.encode()) > 4000:
-                        await send_message(self.message, msg + fmsg)
-                        await sleep(1)
-                        fmsg = ""
-                if fmsg != "":
-                    await send_message(self.message, msg + fmsg)
+            await self._send_leech_message(msg, files, folders, mime_type)
         else:
-            msg += f"\n\n<b>Type: </b>{mime_type}"
-            if mime_type == "Folder":
-                msg += f"\n<b>SubFolders: </b>{folders}"
-                msg += f"\n<b>Files: </b>{files}"
-            if (
-                link
-                or rclone_path
-                and Config.RCLONE_SERVE_URL
-                and not self.private_link
-            ):
-                buttons = ButtonMaker()
-                if link:
-                    buttons.url_button("☁️ Cloud Link", link)
-                else:
-                    msg += f"\n\nPath: <code>{rclone_path}</code>"
-                if rclone_path and Config.RCLONE_SERVE_URL and not self.private_link:
-                    remote, rpath = rclone_path.split(":", 1)
-                    url_path = rutils.quote(f"{rpath}")
-                    share_url = f"{Config.RCLONE_SERVE_URL}/{remote}/{url_path}"
-                    if mime_type == "Folder":
-                        share_url += "/"
-                    buttons.url_button("🔗 Rclone Link", share_url)
-                if not rclone_path and dir_id:
-                    INDEX_URL = ""
-                    if self.private_link:
-                        INDEX_URL = self.user_dict.get("INDEX_URL", "") or ""
-                    elif Config.INDEX_URL:
-                        INDEX_URL = Config.INDEX_URL
-                    if INDEX_URL:
-                        share_url = f"{INDEX_URL}findpath?id={dir_id}"
-                        buttons.url_button("⚡ Index Link", share_url)
-                        if mime_type.startswith(("image", "video", "audio")):
-                            share_urls = f"{INDEX_URL}findpath?id={dir_id}&view=true"
-                            buttons.url_button("🌐 View Link", share_urls)
-                button = buttons.build_menu(2)
+            await self._send_cloud_message(
+                msg, [(link, files, folders, mime_type, rclone_path, dir_id)]
+            )
+        await self._finish_upload()
+
+    async def on_fanout_complete(self, tg_dest, dests):
+        if (
+            self.is_super_chat
+            and Config.INCOMPLETE_TASK_NOTIFIER
+            and Config.DATABASE_URL
+        ):
+            await database.rm_complete_task(self.message.link)
+        msg = f"<b>Name: </b><code>{escape(self.name)}</code>\n\n<b>Size: </b>{get_readable_file_size(self.size)}"
+        LOGGER.info(f"Task Done: {self.name}")
+        for dest in dests:
+            if not dest.result:
+                msg += f"\n<b>Failed: </b><code>{escape(str(dest.up_dest))}</code> {escape(dest.error)}"
+        results = [
+            dest.result for dest in dests if dest.result and dest is not tg_dest
+        ]
+        if tg_dest is not None and tg_dest.result:
+            _, files, folders, corrupted, _, _ = tg_dest.result
+            text, button = self._get_cloud_buttons(results)
+            await self._send_leech_message(
+                msg, files, folders, corrupted, text, button
+            )
+        else:
+            await self._send_cloud_message(msg, results)
+        await self._finish_upload()
+
+    async def _send_leech_message(
+        self, msg, files, folders, corrupted, text="", button=None
+    ):
+        msg += f"\n<b>Total Files: </b>{folders}"
+        if corrupted != 0:
+            msg += f"\n<b>Corrupted Files: </b>{corrupted}"
+        msg += f"{text}\n<b>cc: </b>{self.tag}\n\n"
+        if not files:
+            await send_message(self.message, msg, button, priority=tg_governor.UPLOAD)
+        else:
+            fmsg = ""
+            for index, (link, name) in enumerate(files.items(), start=1):
+                fmsg += f"{index}. <a href='{link}'>{name}</a>\n"
+                if len(fmsg.encode() + msg.encode()) > 4000:
+                    await send_message(
+                        self.message, msg + fmsg, priority=tg_governor.UPLOAD
+                    )
+                    fmsg = ""
+            if fmsg != "" or button is not None:
+                await send_message(
+                    self.message, msg + fmsg, button, priority=tg_governor.UPLOAD
+                )
+
+    async def _send_cloud_message(self, msg, results):
+        _, files, folders, mime_type, _, _ = results[0]
+        msg += f"\n\n<b>Type: </b>{mime_type}"
+        if mime_type == "Folder":
+            msg += f"\n<b>SubFolders: </b>{folders}"
+            msg += f"\n<b>Files: </b>{files}"
+        text, button = self._get_cloud_buttons(results)
+        msg += f"{text}\n\n<b>cc: </b>{self.tag}"
+        await send_message(self.message, msg, button, priority=tg_governor.UPLOAD)
+
+    def _get_cloud_buttons(self, results):
+        text = ""
+        buttons = ButtonMaker()
+        has_buttons = False
+        for link, _, _, mime_type, rclone_path, dir_id in results:
+            label = ""
+            if len(results) > 1:
+                remote = rclone_path.split(":", 1)[0] if rclone_path else "Drive"
+                label = f" ({remote})"
+            if link:
+                buttons.url_button(f"☁️ Cloud Link{label}", link)
+                has_buttons = True
             else:
-                msg += f"\n\nPath: <code>{rclone_path}</code>"
-                button = None
-            msg += f"\n\n<b>cc: </b>{self.tag}"
-            await send_message(self.message, msg, button)
+                text += f"\n\nPath: <code>{rclone_path}</code>"
+            if rclone_path and Config.RCLONE_SERVE_URL and not self.private_link:
+                remote, rpath = rclone_path.split(":", 1)
+                url_path = rutils.quote(f"{rpath}")
+                share_url = f"{Config.RCLONE_SERVE_URL}/{remote}/{url_path}"
+                if mime_type == "Folder":
+                    share_url += "/"
+                buttons.url_button(f"🔗 Rclone Link{label}", share_url)
+                has_buttons = True
+            if not rclone_path and dir_id:
+                INDEX_URL = ""
+                if self.private_link:
+                    INDEX_URL = self.user_dict.get("INDEX_URL", "") or ""
+                elif Config.INDEX_URL:
+                    INDEX_URL = Config.INDEX_URL
+                if INDEX_URL:
+                    share_url = f"{INDEX_URL}findpath?id={dir_id}"
+                    buttons.url_button(f"⚡ Index Link{label}", share_url)
+                    if mime_type.startswith(("image", "video", "audio")):
+                        share_urls = f"{INDEX_URL}findpath?id={dir_id}&view=true"
+                        buttons.url_button(f"🌐 View Link{label}", share_urls)
+                    has_buttons = True
+        return text, buttons.build_menu(2) if has_buttons else None
+
+    async def _clean_links(self):
+        # telegram fan-out legs hardlink renamed files next to the upload dir
+        for path in (self.dir, self.up_dir):
+            if path:
+                await clean_download(f"{path}.links")
+
+    async def _finish_upload(self):
+        await self._clean_links()
         if self.seed:
             await clean_target(self.up_dir)
             async with queue_dict_lock:
@@ -435,6 +628,7 @@ class TaskListener(TaskConfig):
         await clean_download(self.dir)
         if self.up_dir:
             await clean_download(self.up_dir)
+        await self._clean_links()
         if self.thumb and await aiopath.exists(self.thumb):
             await remove(self.thumb)
 
@@ -473,5 +667,6 @@ class TaskListener(TaskConfig):
         await clean_download(self.dir)
         if self.up_dir:
             await clean_download(self.up_dir)
+        await self._clean_links()
         if self.thumb and await aiopath.exists(self.thumb):
             await remove(self.thumb)
@@ -9,6 +9,7 @@ from ....core.config_manager import Config
 from ....core.torrent_manager import TorrentManager, is_metadata, aria2_name
 from ...ext_utils.bot_utils import bt_selection_buttons
 from ...ext_utils.task_manager import check_running_tasks
+from ...ext_utils.torrent_cache import get_cached_torrent
 from ...mirror_leech_utils.status_utils.aria2_status import Aria2Status
 from ...telegram_helper.message_utils import send_status_message, send_message
 
@@ -26,17 +27,25 @@ async def add_aria2_download(listener, dpath, header, ratio, seed_time):
     if TORRENT_TIMEOUT := Config.TORRENT_TIMEOUT:
         a2c_opt["bt-stop-timeout"] = f"{TORRENT_TIMEOUT}"
 
+    torrent = None
+    if listener.link.startswith("magnet:"):
+        if torrent := await get_cached_torrent(listener.link):
+            LOGGER.info(f"Using cached torrent metadata for: {listener.link}")
+        else:
+            a2c_opt["bt-save-metadata"] = "true"
+
     add_to_queue, event = await check_running_tasks(listener)
     if add_to_queue:
-        if listener.link.startswith("magnet:"):
+        if listener.link.startswith("magnet:") and torrent is None:
             a2c_opt["pause-metadata"] = "true"
         else:
             a2c_opt["pause"] = "true"
 
     try:
-        if await aiopath.exists(listener.link):
+        if torrent is None and await aiopath.exists(listener.link):
             async with aiopen(listener.link, "rb") as tf:
                 torrent = await tf.read()
+        if torrent is not None:
             encoded = b64encode(torrent).decode()
             params = [encoded, [], a2c_opt]
             gid = await TorrentManager.aria2.jsonrpc("addTorrent", params)
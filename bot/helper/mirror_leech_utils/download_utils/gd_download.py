@@ -1,7 +1,6 @@
 from secrets import token_urlsafe
 
 from .... import task_dict, task_dict_lock, LOGGER
-from ...ext_utils.bot_utils import sync_to_async
 from ...ext_utils.task_manager import check_running_tasks, stop_duplicate_check
 from ...mirror_leech_utils.gdrive_utils.count import GoogleDriveCount
 from ...mirror_leech_utils.gdrive_utils.download import GoogleDriveDownload
@@ -12,8 +11,8 @@ from ...telegram_helper.message_utils import send_status_message
 
 async def add_gd_download(listener, path):
     drive = GoogleDriveCount()
-    name, mime_type, listener.size, _, _ = await sync_to_async(
-        drive.count, listener.link, listener.user_id
+    name, mime_type, listener.size, _, _ = await drive.count(
+        listener.link, listener.user_id
     )
     if mime_type is None:
         await listener.on_download_error(name)
@@ -51,4 +50,4 @@ async def add_gd_download(listener, path):
         if listener.multi <= 1:
             await send_status_message(listener.message)
 
-    await sync_to_async(drive.download)
+    await drive.download()
@@ -15,7 +15,8 @@ from ....core.config_manager import Config
 from ....core.torrent_manager import TorrentManager
 from ...ext_utils.bot_utils import bt_selection_buttons
 from ...ext_utils.task_manager import check_running_tasks
-from ...listeners.qbit_listener import on_download_start
+from ...ext_utils.torrent_cache import get_cached_torrent
+from ...listeners.qbit_listener import on_download_start, save_metadata
 from ...mirror_leech_utils.status_utils.qbit_status import QbittorrentStatus
 from ...telegram_helper.message_utils import (
     send_message,
@@ -45,10 +46,16 @@ def _get_hash_file(fpath):
 async def add_qb_torrent(listener, path, ratio, seed_time):
     try:
         form = AddFormBuilder.with_client(TorrentManager.qbittorrent)
+        cached = None
         if await aiopath.exists(listener.link):
             async with aiopen(listener.link, "rb") as f:
                 data = await f.read()
                 form = form.include_file(data)
+        elif listener.link.startswith("magnet:") and (
+            cached := await get_cached_torrent(listener.link)
+        ):
+            LOGGER.info(f"Using cached torrent metadata for: {listener.link}")
+            form = form.include_file(cached)
         else:
             form = form.include_url(listener.link)
         form = form.savepath(path).tags([f"{listener.mid}"])
@@ -96,7 +103,7 @@ async def add_qb_torrent(listener, path, ratio, seed_time):
         await listener.on_download_start()
 
         if Config.BASE_URL and listener.select:
-            if listener.link.startswith("magnet:"):
+            if listener.link.startswith("magnet:") and not cached:
                 metamsg = "Downloading Metadata, wait then you can select files. Use torrent file to avoid this wait."
                 meta = await send_message(listener.message, metamsg)
                 while True:
@@ -114,6 +121,7 @@ async def add_qb_torrent(listener, path, ratio, seed_time):
                             "stoppedDL",
                         ]:
                             await delete_message(meta)
+                            await save_metadata(tor_info.hash)
                             break
                     except:
                         await delete_message(meta)
@@ -1,11 +1,10 @@
 from asyncio import gather
-from json import loads
 from secrets import token_urlsafe
 from aiofiles.os import remove
 
 from .... import task_dict, task_dict_lock, LOGGER
-from ...ext_utils.bot_utils import cmd_exec
 from ...ext_utils.task_manager import check_running_tasks, stop_duplicate_check
+from ...mirror_leech_utils.rclone_utils.rcd import RcloneError, get_rcd
 from ...mirror_leech_utils.rclone_utils.transfer import RcloneTransferHelper
 from ...mirror_leech_utils.status_utils.queue_status import QueueStatus
 from ...mirror_leech_utils.status_utils.rclone_status import RcloneStatus
@@ -28,59 +27,40 @@ async def add_rclone_download(listener, path):
     else:
         rpath = listener.link
 
-    cmd1 = [
-        "rclone",
-        "lsjson",
-        "--fast-list",
-        "--stat",
-        "--no-mimetype",
-        "--no-modtime",
-        "--config",
-        config_path,
-        f"{remote}:{rpath}",
-        "-v",
-        "--log-systemd",
-    ]
-    cmd2 = [
-        "rclone",
-        "size",
-        "--fast-list",
-        "--json",
-        "--config",
-        config_path,
-        f"{remote}:{rpath}",
-        "-v",
-        "--log-systemd",
-    ]
+    rcd = get_rcd(config_path)
     if rclone_select:
-        cmd2.extend(("--files-from", listener.link))
-        res = await cmd_exec(cmd2)
-        if res[2] != 0:
-            if res[2] != -9:
-                msg = f"Error: While getting rclone stat/size. Path: {remote}:{listener.link}. Stderr: {res[1][:4000]}"
-                await listener.on_download_error(msg)
-            return
         try:
-            rsize = loads(res[0])
-        except Exception as err:
-            await listener.on_download_error(f"RcloneDownload JsonLoad: {err}")
+            rsize = await rcd.call(
+                "operations/size",
+                fs=f"{remote}:{rpath}",
+                _config={"UseListR": True},
+                _filter={"FilesFrom": [listener.link]},
+            )
+        except RcloneError as err:
+            msg = f"Error: While getting rclone stat/size. Path: {remote}:{listener.link}. Error: {str(err)[:4000]}"
+            await listener.on_download_error(msg)
             return
         if not listener.name:
             listener.name = listener.link
         path += listener.name
     else:
-        res1, res2 = await gather(cmd_exec(cmd1), cmd_exec(cmd2))
-        if res1[2] != 0 or res2[2] != 0:
-            if res1[2] != -9:
-                err = res1[1] or res2[1]
-                msg = f"Error: While getting rclone stat/size. Path: {remote}:{listener.link}. Stderr: {err[:4000]}"
-                await listener.on_download_error(msg)
-            return
         try:
-            rstat = loads(res1[0])
-            rsize = loads(res2[0])
-        except Exception as err:
-            await listener.on_download_error(f"RcloneDownload JsonLoad: {err}")
+            rstat, rsize = await gather(
+                rcd.stat(f"{remote}:", rpath, noModTime=True, noMimeType=True),
+                rcd.call(
+                    "operations/size",
+                    fs=f"{remote}:{rpath}",
+                    _config={"UseListR": True},
+                ),
+            )
+        except RcloneError as err:
+            msg = f"Error: While getting rclone stat/size. Path: {remote}:{listener.link}. Error: {str(err)[:4000]}"
+            await listener.on_download_error(msg)
+            return
+        if rstat is None:
+            await listener.on_download_error(
+                f"Error: Path not found: {remote}:{listener.link}"
+            )
             return
         if rstat["IsDir"]:
             if not listener.name:
@@ -123,6 +103,6 @@ async def add_rclone_download(listener, path):
             await send_status_message(listener.message)
         LOGGER.info(f"Download with rclone: {listener.link}")
 
-    await RCTransfer.download(remote, config_path, path)
+    await RCTransfer.download(remote, config_path, path, rsize.get("count"))
     if rclone_select:
         await remove(listener.link)
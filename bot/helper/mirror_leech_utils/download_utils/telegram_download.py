@@ -11,7 +11,7 @@ from ....core.mltb_client import TgClient
 from ...ext_utils.task_manager import check_running_tasks, stop_duplicate_check
 from ...mirror_leech_utils.status_utils.queue_status import QueueStatus
 from ...mirror_leech_utils.status_utils.telegram_status import TelegramStatus
-from ...telegram_helper.message_utils import send_status_message
+from ...telegram_helper.message_utils import send_status_message, get_message
 
 global_lock = Lock()
 GLOBAL_GID = set()
@@ -95,9 +95,7 @@ class TelegramDownloadHelper:
         if not self.session:
             if self._listener.user_transmission and self._listener.is_super_chat:
                 self.session = "user"
-                message = await TgClient.user.get_messages(
-                    chat_id=message.chat.id, message_ids=message.id
-                )
+                message = await get_message(TgClient.user, message.chat.id, message.id)
             else:
                 self.session = "bot"
         media = (
@@ -147,14 +145,15 @@ class TelegramDownloadHelper:
                     if self._listener.multi <= 1:
                         await send_status_message(self._listener.message)
                     await event.wait()
-                    if self.session == "bot":
-                        message = await self._listener.client.get_messages(
-                            chat_id=message.chat.id, message_ids=message.id
-                        )
-                    else:
-                        message = await TgClient.user.get_messages(
-                            chat_id=message.chat.id, message_ids=message.id
-                        )
+                    message = await get_message(
+                        (
+                            self._listener.client
+                            if self.session == "bot"
+                            else TgClient.user
+                        ),
+                        message.chat.id,
+                        message.id,
+                    )
                     if self._listener.is_cancelled:
                         async with global_lock:
                             if self._id in GLOBAL_GID:
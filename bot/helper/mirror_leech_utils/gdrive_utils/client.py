@@ -0,0 +1,208 @@
+from asyncio import Lock, sleep
+from contextlib import asynccontextmanager
+from google.auth.transport.requests import Request
+from httpx import AsyncClient, Limits, Timeout, TransportError
+
+from ...ext_utils.bot_utils import sync_to_async
+
+
+class DriveError(Exception):
+    def __init__(self, status, reason="", message=""):
+        self.status = status
+        self.reason = reason
+        super().__init__(f"{message} ({reason})" if reason else message)
+
+
+def _raise_for_status(response):
+    if response.status_code < 400:
+        return
+    try:
+        error = response.json()["error"]
+        message = error.get("message", "")
+        reason = error.get("errors", [{}])[0].get("reason", "")
+    except Exception:
+        message = response.text
+        reason = ""
+    raise DriveError(response.status_code, reason, message)
+
+
+class DriveClient:
+    API_URL = "https://www.googleapis.com/drive/v3"
+    UPLOAD_URL = "https://www.googleapis.com/upload/drive/v3"
+    RETRY_STATUS = [429, 500, 502, 503, 504]
+    _http = None
+
+    def __init__(self, credentials):
+        self._credentials = credentials
+        self._lock = Lock()
+
+    @classmethod
+    def http(cls):
+        if cls._http is None:
+            cls._http = AsyncClient(
+                http2=True,
+                timeout=Timeout(120, connect=30),
+                limits=Limits(max_connections=200, max_keepalive_connections=50),
+            )
+        return cls._http
+
+    async def _headers(self, headers=None):
+        async with self._lock:
+            if not self._credentials.valid:
+                await sync_to_async(self._credentials.refresh, Request())
+        headers = dict(headers or {})
+        headers["Authorization"] = f"Bearer {self._credentials.token}"
+        return headers
+
+    async def request(self, method, url, retries=5, **kwargs):
+        headers = kwargs.pop("headers", None)
+        for attempt in range(retries + 1):
+            try:
+                response = await self.http().request(
+                    method, url, headers=await self._headers(headers), **kwargs
+                )
+            except TransportError:
+                if attempt == retries:
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUS or attempt == retries:
+                    _raise_for_status(response)
+                    return response
+            await sleep(min(2**attempt, 30))
+
+    async def get_file(self, file_id, fields="name, id, mimeType, size"):
+        response = await self.request(
+            "GET",
+            f"{self.API_URL}/files/{file_id}",
+            params={"supportsAllDrives": True, "fields": fields},
+        )
+        return response.json()
+
+    async def list_files(self, **params):
+        response = await self.request("GET", f"{self.API_URL}/files", params=params)
+        return response.json()
+
+    async def create_file(self, body, fields="id, name"):
+        response = await self.request(
+            "POST",
+            f"{self.API_URL}/files",
+            params={"supportsAllDrives": True, "fields": fields},
+            json=body,
+        )
+        return response.json()
+
+    async def copy_file(self, file_id, body, fields="id, name"):
+        response = await self.request(
+            "POST",
+            f"{self.API_URL}/files/{file_id}/copy",
+            params={"supportsAllDrives": True, "fields": fields},
+            json=body,
+        )
+        return response.json()
+
+    async def delete_file(self, file_id):
+        await self.request(
+            "DELETE",
+            f"{self.API_URL}/files/{file_id}",
+            params={"supportsAllDrives": True},
+        )
+
+    async def create_permission(self, file_id, body):
+        response = await self.request(
+            "POST",
+            f"{self.API_URL}/files/{file_id}/permissions",
+            params={"supportsAllDrives": True},
+            json=body,
+        )
+        return response.json()
+
+    async def list_drives(self, page_size=100):
+        response = await self.request(
+            "GET", f"{self.API_URL}/drives", params={"pageSize": page_size}
+        )
+        return response.json()
+
+    async def get_start_page_token(self, drive_id=""):
+        params = {"supportsAllDrives": True}
+        if drive_id:
+            params["driveId"] = drive_id
+        response = await self.request(
+            "GET", f"{self.API_URL}/changes/startPageToken", params=params
+        )
+        return response.json()["startPageToken"]
+
+    async def list_changes(self, **params):
+        response = await self.request("GET", f"{self.API_URL}/changes", params=params)
+        return response.json()
+
+    async def create_upload_session(self, body, mime_type, size):
+        response = await self.request(
+            "POST",
+            f"{self.UPLOAD_URL}/files",
+            params={"uploadType": "resumable", "supportsAllDrives": True},
+            headers={
+                "X-Upload-Content-Type": mime_type,
+                "X-Upload-Content-Length": str(size),
+            },
+            json=body,
+        )
+        return response.headers["Location"]
+
+    @staticmethod
+    def _upload_result(response):
+        # 308 means the session is still open, Range holds the persisted bytes
+        if response.status_code == 308:
+            if committed := response.headers.get("Range"):
+                return int(committed.rsplit("-", 1)[1]) + 1, None
+            return 0, None
+        _raise_for_status(response)
+        return None, response.json()
+
+    async def upload_chunk(self, session_url, content, start, end, total):
+        response = await self.http().put(
+            session_url,
+            content=content,
+            headers=await self._headers(
+                {
+                    "Content-Length": str(end - start + 1),
+                    "Content-Range": f"bytes {start}-{end}/{total}",
+                }
+            ),
+        )
+        return self._upload_result(response)
+
+    async def upload_status(self, session_url, total):
+        response = await self.http().put(
+            session_url,
+            headers=await self._headers(
+                {"Content-Length": "0", "Content-Range": f"bytes */{total}"}
+            ),
+        )
+        return self._upload_result(response)
+
+    @asynccontextmanager
+    async def stream_media(self, file_id, export_mime="", start=0, end=None):
+        if export_mime:
+            url = f"{self.API_URL}/files/{file_id}/export"
+            params = {"mimeType": export_mime}
+        else:
+            url = f"{self.API_URL}/files/{file_id}"
+            params = {
+                "alt": "media",
+                "supportsAllDrives": True,
+                "acknowledgeAbuse": True,
+            }
+        headers = None
+        if start or end is not None:
+            headers = {"Range": f"bytes={start}-{'' if end is None else end}"}
+        async with self.http().stream(
+            "GET",
+            url,
+            params=params,
+            headers=await self._headers(headers),
+            follow_redirects=True,
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                _raise_for_status(response)
+            yield response
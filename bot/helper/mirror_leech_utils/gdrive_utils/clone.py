@@ -1,6 +1,5 @@
-from googleapiclient.errors import HttpError
+from collections import deque
 from logging import getLogger
-from os import path as ospath
 from tenacity import (
     retry,
     wait_exponential,
@@ -8,18 +7,19 @@ from tenacity import (
     retry_if_exception_type,
     RetryError,
 )
-from time import time
 
-from ...ext_utils.bot_utils import async_to_sync
+from ....core.config_manager import Config
+from ...mirror_leech_utils.gdrive_utils.client import DriveError
 from ...mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from ...mirror_leech_utils.gdrive_utils.sa_pool import sa_pool
 
 LOGGER = getLogger(__name__)
 
 
 class GoogleDriveClone(GoogleDriveHelper):
-    def __init__(self, listener):
+    def __init__(self, listener, manifest=None):
         self.listener = listener
-        self._start_time = time()
+        self._manifest = manifest
         super().__init__()
         self.is_cloning = True
         self.user_setting()
@@ -40,7 +40,7 @@ class GoogleDriveClone(GoogleDriveHelper):
             self.listener.up_dest = self.listener.up_dest.replace("sa:", "", 1)
             self.use_sa = True
 
-    def clone(self):
+    async def clone(self):
         try:
             file_id = self.get_id_from_url(self.listener.link)
         except (KeyError, IndexError):
@@ -55,22 +55,21 @@ class GoogleDriveClone(GoogleDriveHelper):
         msg = ""
         LOGGER.info(f"File ID: {file_id}")
         try:
-            meta = self.get_file_metadata(file_id)
+            meta = await self.get_file_metadata(file_id)
             mime_type = meta.get("mimeType")
             if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                dir_id = self.create_directory(meta.get("name"), self.listener.up_dest)
-                self._clone_folder(meta.get("name"), meta.get("id"), dir_id)
+                dir_id = await self.create_directory(meta.get("name"), self.listener.up_dest)
+                await self._clone_folder(meta.get("id"), dir_id)
                 durl = self.G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(dir_id)
                 if self.listener.is_cancelled:
                     LOGGER.info("Deleting cloned data from Drive...")
-                    self.service.files().delete(
-                        fileId=dir_id, supportsAllDrives=True
-                    ).execute()
+                    await self.service.delete_file(dir_id)
                     return None, None, None, None, None
                 mime_type = "Folder"
                 self.listener.size = self.proc_bytes
             else:
-                file = self._copy_file(meta.get("id"), self.listener.up_dest)
+                file = await self._copy_file(meta.get("id"), self.listener.up_dest)
+                await sa_pool.add_bytes(self.sa_name, int(meta.get("size", 0)))
                 msg += f'<b>Name: </b><code>{file.get("name")}</code>'
                 durl = self.G_DRIVE_BASE_DOWNLOAD_URL.format(file.get("id"))
                 if mime_type is None:
@@ -95,72 +94,115 @@ class GoogleDriveClone(GoogleDriveHelper):
                     self.alt_auth = True
                     self.use_sa = False
                     LOGGER.error("File not found. Trying with token.pickle...")
-                    return self.clone()
+                    return await self.clone()
                 msg = "File not found."
             else:
                 msg = f"Error.\n{err}"
-            async_to_sync(self.listener.on_upload_error, msg)
+            await self.listener.on_upload_error(msg)
             return None, None, None, None, None
 
-    def _clone_folder(self, folder_name, folder_id, dest_id):
-        LOGGER.info(f"Syncing: {folder_name}")
-        files = self.get_files_by_folder_id(folder_id)
-        if len(files) == 0:
-            return dest_id
-        for file in files:
-            if file.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
-                self.total_folders += 1
-                file_path = ospath.join(folder_name, file.get("name"))
-                current_dir_id = self.create_directory(file.get("name"), dest_id)
-                self._clone_folder(file_path, file.get("id"), current_dir_id)
-            elif (
-                not file.get("name")
-                .strip()
-                .lower()
-                .endswith(tuple(self.listener.excluded_extensions))
+    async def _list_tree(self, folder_id):
+        # same layout as GoogleDriveCount.manifest
+        folders = [(-1, folder_id, "")]
+        files = []
+        level = [0]
+        while level and not self.listener.is_cancelled:
+            results = await self.run_bounded(
+                (self.get_files_by_folder_id(folders[index][1]) for index in level),
+                Config.GDRIVE_CLONE_WORKERS,
+            )
+            next_level = []
+            for index, items in zip(level, results):
+                for item in items:
+                    if item.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
+                        next_level.append(len(folders))
+                        folders.append((index, item["id"], item["name"]))
+                    else:
+                        files.append(
+                            (index, item["id"], item["name"], int(item.get("size", 0)))
+                        )
+            level = next_level
+        return folders, files
+
+    async def _clone_folder(self, folder_id, dest_id):
+        if self._manifest and self._manifest[0][0][1] == folder_id:
+            folders, files = self._manifest
+        else:
+            folders, files = await self._list_tree(folder_id)
+        dest_ids = [dest_id]
+        start = 1
+        while start < len(folders) and not self.listener.is_cancelled:
+            # a batch only holds folders whose parents already exist
+            end = start
+            while (
+                end < len(folders)
+                and folders[end][0] < start
+                and end - start < Config.GDRIVE_CLONE_WORKERS * 10
             ):
-                self.total_files += 1
-                self._copy_file(file.get("id"), dest_id)
-                self.proc_bytes += int(file.get("size", 0))
-                self.total_time = int(time() - self._start_time)
-            if self.listener.is_cancelled:
-                break
+                end += 1
+            dest_ids.extend(
+                await self.run_bounded(
+                    (
+                        self.create_directory(name, dest_ids[parent], False)
+                        for parent, _, name in folders[start:end]
+                    ),
+                    Config.GDRIVE_CLONE_WORKERS,
+                )
+            )
+            self.total_folders += end - start
+            start = end
+        excluded = tuple(self.listener.excluded_extensions)
+        queue = deque(
+            (dest_ids[index], file_id, size)
+            for index, file_id, name, size in files
+            if not name.strip().lower().endswith(excluded)
+        )
+        workers = []
+        for _ in range(min(max(Config.GDRIVE_CLONE_WORKERS, 1), len(queue))):
+            worker = GoogleDriveClone(self.listener)
+            worker.token_path = self.token_path
+            worker.use_sa = self.use_sa
+            worker.service = worker.authorize()
+            workers.append(worker)
+        await self.run_workers(self._clone_worker(worker, queue) for worker in workers)
+
+    async def _clone_worker(self, worker, queue):
+        while queue and not self.listener.is_cancelled:
+            dest_id, file_id, size = queue.popleft()
+            await worker._copy_file(file_id, dest_id)
+            await sa_pool.add_bytes(worker.sa_name, size)
+            self.total_files += 1
+            self.proc_bytes += size
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type(Exception),
     )
-    def _copy_file(self, file_id, dest_id):
+    async def _copy_file(self, file_id, dest_id):
         body = {"parents": [dest_id]}
         try:
-            return (
-                self.service.files()
-                .copy(fileId=file_id, body=body, supportsAllDrives=True)
-                .execute()
-            )
-        except HttpError as err:
-            if err.resp.get("content-type", "").startswith("application/json"):
-                reason = eval(err.content).get("error").get("errors")[0].get("reason")
-                if reason not in [
-                    "userRateLimitExceeded",
-                    "dailyLimitExceeded",
-                    "cannotCopyFile",
-                ]:
+            return await self.service.copy_file(file_id, body)
+        except DriveError as err:
+            if err.reason not in [
+                "userRateLimitExceeded",
+                "dailyLimitExceeded",
+                "cannotCopyFile",
+            ]:
+                raise err
+            if err.reason == "cannotCopyFile":
+                LOGGER.error(err)
+            elif self.use_sa:
+                if self.sa_count >= self.sa_number:
+                    LOGGER.info(
+                        f"Reached maximum number of service accounts switching, which is {self.sa_count}"
+                    )
                     raise err
-                if reason == "cannotCopyFile":
-                    LOGGER.error(err)
-                elif self.use_sa:
-                    if self.sa_count >= self.sa_number:
-                        LOGGER.info(
-                            f"Reached maximum number of service accounts switching, which is {self.sa_count}"
-                        )
-                        raise err
-                    else:
-                        if self.listener.is_cancelled:
-                            return
-                        self.switch_service_account()
-                        return self._copy_file(file_id, dest_id)
                 else:
-                    LOGGER.error(f"Got: {reason}")
-                    raise err
+                    if self.listener.is_cancelled:
+                        return
+                    await self.switch_service_account(err.reason)
+                    return await self._copy_file(file_id, dest_id)
+            else:
+                LOGGER.error(f"Got: {err.reason}")
+                raise err
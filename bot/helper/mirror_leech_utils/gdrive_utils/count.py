@@ -5,12 +5,22 @@ from ...mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
 
+LIST_WORKERS = 10
+
 
 class GoogleDriveCount(GoogleDriveHelper):
     def __init__(self):
         super().__init__()
+        # folders: (parent index, id, name), files: (folder index, id, name, size)
+        self.folders = []
+        self.files = []
+
+    @property
+    def manifest(self):
+        if self.folders:
+            return self.folders, self.files
 
-    def count(self, link, user_id):
+    async def count(self, link, user_id):
         try:
             file_id = self.get_id_from_url(link, user_id)
         except (KeyError, IndexError):
@@ -24,7 +34,7 @@ class GoogleDriveCount(GoogleDriveHelper):
         self.service = self.authorize()
         LOGGER.info(f"File ID: {file_id}")
         try:
-            return self._proceed_count(file_id)
+            return await self._proceed_count(file_id)
         except Exception as err:
             if isinstance(err, RetryError):
                 LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
@@ -35,19 +45,21 @@ class GoogleDriveCount(GoogleDriveHelper):
                     self.alt_auth = True
                     self.use_sa = False
                     LOGGER.error("File not found. Trying with token.pickle...")
-                    return self.count(link, user_id)
+                    return await self.count(link, user_id)
                 msg = "File not found."
             else:
                 msg = f"Error.\n{err}"
         return msg, None, None, None, None
 
-    def _proceed_count(self, file_id):
-        meta = self.get_file_metadata(file_id)
+    async def _proceed_count(self, file_id):
+        meta = await self.get_file_metadata(file_id)
         name = meta["name"]
         LOGGER.info(f"Counting: {name}")
         mime_type = meta.get("mimeType")
         if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-            self._gdrive_directory(meta)
+            self.folders = [(-1, meta["id"], name)]
+            self.files = []
+            await self._gdrive_directory(meta)
             mime_type = "Folder"
         else:
             if mime_type is None:
@@ -56,25 +68,56 @@ class GoogleDriveCount(GoogleDriveHelper):
             self._gdrive_file(meta)
         return name, mime_type, self.proc_bytes, self.total_files, self.total_folders
 
-    def _gdrive_file(self, filee):
+    def _gdrive_file(self, filee, index=None):
         size = int(filee.get("size", 0))
         self.proc_bytes += size
+        if index is not None:
+            self.files.append((index, filee["id"], filee["name"], size))
 
-    def _gdrive_directory(self, drive_folder):
-        files = self.get_files_by_folder_id(drive_folder["id"])
-        if len(files) == 0:
-            return
-        for filee in files:
-            shortcut_details = filee.get("shortcutDetails")
-            if shortcut_details is not None:
-                mime_type = shortcut_details["targetMimeType"]
-                file_id = shortcut_details["targetId"]
-                filee = self.get_file_metadata(file_id)
-            else:
-                mime_type = filee.get("mimeType")
-            if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                self.total_folders += 1
-                self._gdrive_directory(filee)
-            else:
+    async def _gdrive_directory(self, drive_folder):
+        # every folder is listed once, so shortcut cycles can't loop
+        seen = {drive_folder["id"]}
+        targets = {}
+        level = [0]
+        while level:
+            results = await self.run_bounded(
+                (self.get_files_by_folder_id(self.folders[index][1]) for index in level),
+                LIST_WORKERS,
+            )
+            next_level = []
+            shortcuts = []
+            for index, files in zip(level, results):
+                for filee in files:
+                    shortcut_details = filee.get("shortcutDetails")
+                    if shortcut_details is not None:
+                        mime_type = shortcut_details["targetMimeType"]
+                        file_id = shortcut_details["targetId"]
+                    else:
+                        mime_type = filee.get("mimeType")
+                        file_id = filee["id"]
+                    if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
+                        if file_id in seen:
+                            continue
+                        seen.add(file_id)
+                        self.total_folders += 1
+                        next_level.append(len(self.folders))
+                        self.folders.append((index, file_id, filee["name"]))
+                    elif shortcut_details is not None:
+                        shortcuts.append((index, file_id))
+                    else:
+                        self.total_files += 1
+                        self._gdrive_file(filee, index)
+            missing = list({file_id for _, file_id in shortcuts} - targets.keys())
+            targets.update(
+                zip(
+                    missing,
+                    await self.run_bounded(
+                        (self.get_file_metadata(file_id) for file_id in missing),
+                        LIST_WORKERS,
+                    ),
+                )
+            )
+            for index, file_id in shortcuts:
                 self.total_files += 1
-                self._gdrive_file(filee)
+                self._gdrive_file(targets[file_id], index)
+            level = next_level
@@ -1,6 +1,6 @@
-from googleapiclient.errors import HttpError
 from logging import getLogger
 
+from ....helper.mirror_leech_utils.gdrive_utils.client import DriveError
 from ....helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
@@ -10,7 +10,7 @@ class GoogleDriveDelete(GoogleDriveHelper):
     def __init__(self):
         super().__init__()
 
-    def deletefile(self, link, user_id):
+    async def deletefile(self, link, user_id):
         try:
             file_id = self.get_id_from_url(link, user_id)
         except (KeyError, IndexError):
@@ -18,12 +18,10 @@ class GoogleDriveDelete(GoogleDriveHelper):
         self.service = self.authorize()
         msg = ""
         try:
-            self.service.files().delete(
-                fileId=file_id, supportsAllDrives=True
-            ).execute()
+            await self.service.delete_file(file_id)
             msg = "Successfully deleted"
             LOGGER.info(f"Delete Result: {msg}")
-        except HttpError as err:
+        except DriveError as err:
             if "File not found" in str(err) or "insufficientFilePermissions" in str(
                 err
             ):
@@ -31,7 +29,7 @@ class GoogleDriveDelete(GoogleDriveHelper):
                     self.alt_auth = True
                     self.use_sa = False
                     LOGGER.error("File not found. Trying with token.pickle...")
-                    return self.deletefile(link, user_id)
+                    return await self.deletefile(link, user_id)
                 err = "File not found or insufficientFilePermissions!"
             LOGGER.error(f"Delete Result: {err}")
             msg = str(err)
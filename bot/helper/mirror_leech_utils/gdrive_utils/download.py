@@ -1,8 +1,9 @@
-from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaIoBaseDownload
-from io import FileIO
+from aiofiles import open as aiopen
+from aiofiles.os import makedirs, path as aiopath
+from collections import deque
+from httpx import TransportError
 from logging import getLogger
-from os import makedirs, path as ospath
+from os import path as ospath
 from tenacity import (
     retry,
     wait_exponential,
@@ -11,33 +12,47 @@ from tenacity import (
     RetryError,
 )
 
-from ...ext_utils.bot_utils import async_to_sync
-from ...ext_utils.bot_utils import SetInterval
+from ....core.config_manager import Config
+from ...mirror_leech_utils.gdrive_utils.client import DriveError
 from ...mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
 
+RANGE_PARTS = 4
+RANGE_SPLIT_SIZE = 100 * 1024 * 1024
+
 
 class GoogleDriveDownload(GoogleDriveHelper):
     def __init__(self, listener, path):
         self.listener = listener
-        self._updater = None
         self._path = path
+        self._workers = []
         super().__init__()
         self.is_downloading = True
 
-    def download(self):
+    @property
+    def processed_bytes(self):
+        return (
+            self.proc_bytes
+            + self.file_processed_bytes
+            + sum(worker.processed_bytes for worker in self._workers)
+        )
+
+    async def download(self):
         file_id = self.get_id_from_url(self.listener.link, self.listener.user_id)
         self.service = self.authorize()
-        self._updater = SetInterval(self.update_interval, self.progress)
         try:
-            meta = self.get_file_metadata(file_id)
+            meta = await self.get_file_metadata(file_id)
             if meta.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
-                self._download_folder(file_id, self._path, self.listener.name)
+                await self._download_folder(file_id, self._path, self.listener.name)
             else:
-                makedirs(self._path, exist_ok=True)
-                self._download_file(
-                    file_id, self._path, self.listener.name, meta.get("mimeType")
+                await makedirs(self._path, exist_ok=True)
+                await self._download_file(
+                    file_id,
+                    self._path,
+                    self.listener.name,
+                    meta.get("mimeType"),
+                    size=int(meta.get("size", 0)),
                 )
         except Exception as err:
             if isinstance(err, RetryError):
@@ -51,61 +66,129 @@ class GoogleDriveDownload(GoogleDriveHelper):
                     self.alt_auth = True
                     self.use_sa = False
                     LOGGER.error("File not found. Trying with token.pickle...")
-                    self._updater.cancel()
-                    return self.download()
+                    return await self.download()
                 err = "File not found!"
-            async_to_sync(self.listener.on_download_error, err)
+            await self.listener.on_download_error(err)
             self.listener.is_cancelled = True
         finally:
-            self._updater.cancel()
             if self.listener.is_cancelled:
                 return
-            async_to_sync(self.listener.on_download_complete)
+            await self.listener.on_download_complete()
             return
 
-    def _download_folder(self, folder_id, path, folder_name):
-        folder_name = folder_name.replace("/", "")
-        if not ospath.exists(f"{path}/{folder_name}"):
-            makedirs(f"{path}/{folder_name}")
-        path += f"/{folder_name}"
-        result = self.get_files_by_folder_id(folder_id)
-        if len(result) == 0:
-            return
-        result = sorted(result, key=lambda k: k["name"])
-        for item in result:
-            file_id = item["id"]
-            filename = item["name"]
-            shortcut_details = item.get("shortcutDetails")
-            if shortcut_details is not None:
-                file_id = shortcut_details["targetId"]
-                mime_type = shortcut_details["targetMimeType"]
-            else:
-                mime_type = item.get("mimeType")
-            if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                self._download_folder(file_id, path, filename)
-            elif not ospath.isfile(
-                f"{path}{filename}"
-            ) and not filename.strip().lower().endswith(
-                tuple(self.listener.excluded_extensions)
-            ):
-                self._download_file(file_id, path, filename, mime_type)
-            if self.listener.is_cancelled:
-                break
+    async def _download_folder(self, folder_id, path, folder_name):
+        workers = max(Config.GDRIVE_DOWNLOAD_WORKERS, 1)
+        excluded = tuple(self.listener.excluded_extensions)
+        files = deque()
+        level = [(folder_id, f"{path}/{folder_name.replace('/', '')}")]
+        while level and not self.listener.is_cancelled:
+            for _, dir_path in level:
+                await makedirs(dir_path, exist_ok=True)
+            results = await self.run_bounded(
+                (self.get_files_by_folder_id(dir_id) for dir_id, _ in level), workers
+            )
+            next_level = []
+            for (_, dir_path), items in zip(level, results):
+                for item in sorted(items, key=lambda k: k["name"]):
+                    file_id = item["id"]
+                    filename = item["name"]
+                    shortcut_details = item.get("shortcutDetails")
+                    if shortcut_details is not None:
+                        file_id = shortcut_details["targetId"]
+                        mime_type = shortcut_details["targetMimeType"]
+                    else:
+                        mime_type = item.get("mimeType")
+                    if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
+                        next_level.append(
+                            (file_id, f"{dir_path}/{filename.replace('/', '')}")
+                        )
+                    elif not await aiopath.isfile(
+                        f"{dir_path}{filename}"
+                    ) and not filename.strip().lower().endswith(excluded):
+                        files.append(
+                            (
+                                file_id,
+                                dir_path,
+                                filename,
+                                mime_type,
+                                int(item.get("size", 0)),
+                            )
+                        )
+            level = next_level
+        for _ in range(min(workers, len(files))):
+            worker = GoogleDriveDownload(self.listener, self._path)
+            worker.token_path = self.token_path
+            worker.use_sa = self.use_sa
+            worker.service = worker.authorize()
+            self._workers.append(worker)
+        await self.run_workers(
+            self._download_worker(worker, files) for worker in self._workers
+        )
+
+    async def _download_worker(self, worker, files):
+        while files and not self.listener.is_cancelled:
+            file_id, path, filename, mime_type, size = files.popleft()
+            await worker._download_file(file_id, path, filename, mime_type, size=size)
+
+    async def _download_part(self, file_id, file_path, start=0, end=None, export_mime=""):
+        offset = start
+        retries = 0
+        async with aiopen(file_path, "wb" if end is None else "r+b") as f:
+            while not self.listener.is_cancelled:
+                try:
+                    async with self.service.stream_media(
+                        file_id, export_mime, offset, end
+                    ) as response:
+                        if response.status_code != 206 and (offset or end is not None):
+                            if end is not None:
+                                raise DriveError(
+                                    response.status_code,
+                                    "rangeNotSatisfied",
+                                    "Byte ranges are not supported for this file",
+                                )
+                            await f.seek(0)
+                            await f.truncate()
+                            self.file_processed_bytes -= offset
+                            offset = 0
+                        await f.seek(offset)
+                        async for chunk in response.aiter_bytes(4 * 1024 * 1024):
+                            if self.listener.is_cancelled:
+                                return
+                            await f.write(chunk)
+                            offset += len(chunk)
+                            self.file_processed_bytes += len(chunk)
+                    return
+                except TransportError as err:
+                    LOGGER.error(err)
+                    if retries >= 10:
+                        raise
+                    retries += 1
+                except DriveError as err:
+                    if err.status in [500, 502, 503, 504, 429] and retries < 10:
+                        LOGGER.error(err)
+                        retries += 1
+                        continue
+                    raise
+
+    async def _download_ranges(self, file_id, file_path, size, parts):
+        async with aiopen(file_path, "wb") as f:
+            await f.truncate(size)
+        part_size = -(-size // parts)
+        await self.run_workers(
+            self._download_part(
+                file_id, file_path, start, min(start + part_size, size) - 1
+            )
+            for start in range(0, size, part_size)
+        )
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type(Exception),
     )
-    def _download_file(self, file_id, path, filename, mime_type, export=False):
-        if export:
-            request = self.service.files().export_media(
-                fileId=file_id, mimeType="application/pdf"
-            )
-        else:
-            request = self.service.files().get_media(
-                fileId=file_id, supportsAllDrives=True, acknowledgeAbuse=True
-            )
+    async def _download_file(
+        self, file_id, path, filename, mime_type, export=False, size=0
+    ):
         filename = filename.replace("/", "")
         if export:
             filename = f"{filename}.pdf"
@@ -117,49 +200,49 @@ class GoogleDriveDownload(GoogleDriveHelper):
                 self.listener.name = filename
         if self.listener.is_cancelled:
             return
-        fh = FileIO(f"{path}/{filename}", "wb")
-        downloader = MediaIoBaseDownload(fh, request, chunksize=100 * 1024 * 1024)
-        done = False
-        retries = 0
-        while not done:
-            if self.listener.is_cancelled:
-                fh.close()
-                break
-            try:
-                self.status, done = downloader.next_chunk()
-            except HttpError as err:
-                LOGGER.error(err)
-                if err.resp.status in [500, 502, 503, 504, 429] and retries < 10:
-                    retries += 1
-                    continue
-                if err.resp.get("content-type", "").startswith("application/json"):
-                    reason = (
-                        eval(err.content).get("error").get("errors")[0].get("reason")
+        file_path = f"{path}/{filename}"
+        parts = min(RANGE_PARTS, size // RANGE_SPLIT_SIZE)
+        self.file_processed_bytes = 0
+        try:
+            if not export and parts > 1:
+                try:
+                    await self._download_ranges(file_id, file_path, size, parts)
+                except DriveError as err:
+                    if err.reason != "rangeNotSatisfied":
+                        raise
+                    self.file_processed_bytes = 0
+                    await self._download_part(file_id, file_path)
+            else:
+                await self._download_part(
+                    file_id, file_path, export_mime="application/pdf" if export else ""
+                )
+        except DriveError as err:
+            LOGGER.error(err)
+            if "fileNotDownloadable" in err.reason and "document" in mime_type:
+                return await self._download_file(
+                    file_id, path, filename, mime_type, True
+                )
+            if err.reason not in [
+                "downloadQuotaExceeded",
+                "dailyLimitExceeded",
+            ]:
+                raise err
+            if self.use_sa:
+                if self.sa_count >= self.sa_number:
+                    LOGGER.info(
+                        f"Reached maximum number of service accounts switching, which is {self.sa_count}"
                     )
-                    if "fileNotDownloadable" in reason and "document" in mime_type:
-                        return self._download_file(
-                            file_id, path, filename, mime_type, True
-                        )
-                    if reason not in [
-                        "downloadQuotaExceeded",
-                        "dailyLimitExceeded",
-                    ]:
-                        raise err
-                    if self.use_sa:
-                        if self.sa_count >= self.sa_number:
-                            LOGGER.info(
-                                f"Reached maximum number of service accounts switching, which is {self.sa_count}"
-                            )
-                            raise err
-                        else:
-                            if self.listener.is_cancelled:
-                                return
-                            self.switch_service_account()
-                            LOGGER.info(f"Got: {reason}, Trying Again...")
-                            return self._download_file(
-                                file_id, path, filename, mime_type
-                            )
-                    else:
-                        LOGGER.error(f"Got: {reason}")
-                        raise err
+                    raise err
+                else:
+                    if self.listener.is_cancelled:
+                        return
+                    await self.switch_service_account(err.reason)
+                    LOGGER.info(f"Got: {err.reason}, Trying Again...")
+                    return await self._download_file(
+                        file_id, path, filename, mime_type, size=size
+                    )
+            else:
+                LOGGER.error(f"Got: {err.reason}")
+                raise err
+        self.proc_bytes += self.file_processed_bytes
         self.file_processed_bytes = 0
@@ -0,0 +1,246 @@
+from asyncio import Lock
+from logging import getLogger
+from sqlite3 import connect
+from threading import Lock as ThreadLock
+from time import monotonic
+
+from .... import bot_loop, drives_ids
+from ....core.config_manager import Config
+from ...ext_utils.bot_utils import sync_to_async
+from .helper import GoogleDriveHelper
+
+LOGGER = getLogger(__name__)
+
+FILE_FIELDS = "id, name, mimeType, size, parents, driveId, ownedByMe, trashed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id TEXT PRIMARY KEY, drive TEXT, name TEXT, mime TEXT, size INTEGER, parents TEXT
+);
+CREATE INDEX IF NOT EXISTS files_drive_name ON files (drive, name);
+CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5 (
+    name, content='files', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+    INSERT INTO files_fts (rowid, name) VALUES (new.rowid, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+    INSERT INTO files_fts (files_fts, rowid, name) VALUES ('delete', old.rowid, old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS files_au AFTER UPDATE ON files BEGIN
+    INSERT INTO files_fts (files_fts, rowid, name) VALUES ('delete', old.rowid, old.name);
+    INSERT INTO files_fts (rowid, name) VALUES (new.rowid, new.name);
+END;
+CREATE TABLE IF NOT EXISTS drives (drive TEXT PRIMARY KEY, token TEXT);
+"""
+
+
+class DriveIndex(GoogleDriveHelper):
+    # changes older than this are pulled before answering a search
+    REFRESH_INTERVAL = 30
+
+    def __init__(self, path="drive_index.db"):
+        super().__init__()
+        self._path = path
+        self._db = None
+        self._db_lock = ThreadLock()
+        self._locks = {}
+        self._building = set()
+        self._refreshed = {}
+
+    def _connect(self):
+        if self._db is None:
+            self._db = connect(self._path, check_same_thread=False)
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def _get_token(self, drive):
+        with self._db_lock:
+            row = (
+                self._connect()
+                .execute("SELECT token FROM drives WHERE drive = ?", (drive,))
+                .fetchone()
+            )
+        return row[0] if row else None
+
+    def _apply(self, drive, files, removed, token=None, reset=False):
+        with self._db_lock:
+            db = self._connect()
+            with db:
+                if reset:
+                    db.execute("DELETE FROM files WHERE drive = ?", (drive,))
+                    db.execute("DELETE FROM drives WHERE drive = ?", (drive,))
+                db.executemany(
+                    "INSERT INTO files (id, drive, name, mime, size, parents) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET "
+                    "drive = excluded.drive, name = excluded.name, mime = excluded.mime, "
+                    "size = excluded.size, parents = excluded.parents",
+                    [
+                        (
+                            file["id"],
+                            drive,
+                            file["name"],
+                            file.get("mimeType", ""),
+                            file.get("size"),
+                            ",".join(file.get("parents", [])),
+                        )
+                        for file in files
+                    ],
+                )
+                db.executemany(
+                    "DELETE FROM files WHERE id = ? AND drive = ?",
+                    [(file_id, drive) for file_id in removed],
+                )
+                if token is not None:
+                    db.execute(
+                        "INSERT OR REPLACE INTO drives (drive, token) VALUES (?, ?)",
+                        (drive, token),
+                    )
+
+    def _query(self, drive, name, stop_dup, item_type, limit):
+        sql = "SELECT id, name, mime, size, parents FROM files WHERE drive = ?"
+        params = [drive]
+        if stop_dup:
+            sql += " AND name = ?"
+            params.append(name)
+        else:
+            terms = " ".join(
+                f'"{term.replace(chr(34), chr(34) * 2)}"*' for term in name.split()
+            )
+            if terms:
+                sql += " AND rowid IN (SELECT rowid FROM files_fts WHERE files_fts MATCH ?)"
+                params.append(terms)
+            if item_type == "files":
+                sql += " AND mime != ?"
+                params.append(self.G_DRIVE_DIR_MIME_TYPE)
+            elif item_type == "folders":
+                sql += " AND mime = ?"
+                params.append(self.G_DRIVE_DIR_MIME_TYPE)
+        sql += " ORDER BY mime != ?, name LIMIT ?"
+        params.extend([self.G_DRIVE_DIR_MIME_TYPE, limit])
+        with self._db_lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        files = []
+        for file_id, file_name, mime_type, size, parents in rows:
+            file = {"id": file_id, "name": file_name, "mimeType": mime_type}
+            if size is not None:
+                file["size"] = size
+            if parents:
+                file["parents"] = parents.split(",")
+            files.append(file)
+        return files
+
+    def _in_scope(self, drive, file):
+        if drive == "root":
+            return file.get("ownedByMe", False)
+        return file.get("driveId") == drive
+
+    async def _build(self, drive):
+        LOGGER.info(f"Building Drive index for: {drive}")
+        try:
+            token = await self.service.get_start_page_token(
+                "" if drive == "root" else drive
+            )
+            params = {
+                "q": "trashed = false",
+                "pageSize": 1000,
+                "fields": f"nextPageToken, files({FILE_FIELDS})",
+            }
+            if drive == "root":
+                params["q"] += " and 'me' in owners"
+            else:
+                params.update(
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True,
+                    driveId=drive,
+                    corpora="drive",
+                )
+            reset = True
+            while True:
+                response = await self.service.list_files(**params)
+                await sync_to_async(
+                    self._apply, drive, response.get("files", []), [], reset=reset
+                )
+                reset = False
+                if (page_token := response.get("nextPageToken")) is None:
+                    break
+                params["pageToken"] = page_token
+            await sync_to_async(self._apply, drive, [], [], token)
+            self._refreshed[drive] = monotonic()
+            LOGGER.info(f"Drive index is ready for: {drive}")
+        except Exception as e:
+            LOGGER.error(f"Drive index build failed for {drive}: {e}")
+        finally:
+            self._building.discard(drive)
+
+    async def _refresh(self, drive, token):
+        params = {
+            "pageSize": 1000,
+            "fields": f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))",
+            "supportsAllDrives": True,
+        }
+        if drive != "root":
+            params.update(includeItemsFromAllDrives=True, driveId=drive)
+        while token:
+            params["pageToken"] = token
+            response = await self.service.list_changes(**params)
+            files = []
+            removed = []
+            for change in response.get("changes", []):
+                file = change.get("file")
+                if (
+                    change.get("removed")
+                    or file is None
+                    or file.get("trashed")
+                    or not self._in_scope(drive, file)
+                ):
+                    removed.append(change["fileId"])
+                else:
+                    files.append(file)
+            new_token = response.get("newStartPageToken")
+            token = response.get("nextPageToken")
+            await sync_to_async(
+                self._apply, drive, files, removed, token or new_token
+            )
+        self._refreshed[drive] = monotonic()
+
+    async def search(self, drive, name, stop_dup=False, item_type=""):
+        if (
+            not Config.GDRIVE_INDEX
+            or drive not in drives_ids
+            or drive != "root"
+            and len(drive) > 23
+        ):
+            return None
+        if self.service is None:
+            self.use_sa = Config.USE_SERVICE_ACCOUNTS and len(drives_ids) <= 1
+            self.service = self.authorize()
+        lock = self._locks.setdefault(drive, Lock())
+        async with lock:
+            if (token := await sync_to_async(self._get_token, drive)) is None:
+                if drive not in self._building:
+                    self._building.add(drive)
+                    bot_loop.create_task(self._build(drive))
+                return None
+            if monotonic() - self._refreshed.get(drive, 0) > self.REFRESH_INTERVAL:
+                try:
+                    await self._refresh(drive, token)
+                except Exception as e:
+                    LOGGER.error(f"Drive index refresh failed for {drive}: {e}")
+                    return None
+        try:
+            files = await sync_to_async(
+                self._query,
+                drive,
+                name,
+                stop_dup,
+                item_type,
+                200 if drive == "root" else 150,
+            )
+        except Exception as e:
+            LOGGER.error(f"Drive index search failed for {drive}: {e}")
+            return None
+        return {"files": files}
+
+
+drive_index = DriveIndex()
@@ -1,11 +1,7 @@
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from google_auth_httplib2 import AuthorizedHttp
-from googleapiclient.http import build_http
-from logging import getLogger, ERROR
-from os import path as ospath, listdir
+from asyncio import Semaphore, gather
+from logging import getLogger
+from os import path as ospath
 from pickle import load as pload
-from random import randrange
 from re import search as re_search
 from urllib.parse import parse_qs, urlparse
 from tenacity import (
@@ -14,12 +10,15 @@ from tenacity import (
     stop_after_attempt,
     retry_if_exception_type,
 )
+from time import time
 
+from .... import bot_loop
 from ....core.config_manager import Config
 from ...ext_utils.links_utils import is_gdrive_id
+from .client import DriveClient
+from .sa_pool import sa_pool
 
 LOGGER = getLogger(__name__)
-getLogger("googleapiclient.discovery").setLevel(ERROR)
 
 
 class GoogleDriveHelper:
@@ -34,7 +33,7 @@ class GoogleDriveHelper:
         self.is_uploading = False
         self.is_downloading = False
         self.is_cloning = False
-        self.sa_index = 0
+        self.sa_name = ""
         self.sa_count = 1
         self.sa_number = 100
         self.alt_auth = False
@@ -43,60 +42,39 @@ class GoogleDriveHelper:
         self.total_folders = 0
         self.file_processed_bytes = 0
         self.proc_bytes = 0
-        self.total_time = 0
-        self.status = None
-        self.update_interval = 3
+        self.start_time = time()
         self.use_sa = Config.USE_SERVICE_ACCOUNTS
 
     @property
     def speed(self):
         try:
-            return self.proc_bytes / self.total_time
+            return self.processed_bytes / (time() - self.start_time)
         except:
             return 0
 
     @property
     def processed_bytes(self):
-        return self.proc_bytes
-
-    async def progress(self):
-        if self.status is not None:
-            chunk_size = (
-                self.status.total_size * self.status.progress()
-                - self.file_processed_bytes
-            )
-            self.file_processed_bytes = self.status.total_size * self.status.progress()
-            self.proc_bytes += chunk_size
-            self.total_time += self.update_interval
+        return self.proc_bytes + self.file_processed_bytes
 
     def authorize(self):
         credentials = None
         if self.use_sa:
-            json_files = listdir("accounts")
-            self.sa_number = len(json_files)
-            self.sa_index = randrange(self.sa_number)
-            LOGGER.info(f"Authorizing with {json_files[self.sa_index]} service account")
-            credentials = service_account.Credentials.from_service_account_file(
-                f"accounts/{json_files[self.sa_index]}", scopes=self._OAUTH_SCOPE
-            )
-        elif ospath.exists(self.token_path):
+            self.sa_name, service, self.sa_number = sa_pool.lease()
+            return service
+        self.sa_name = ""
+        if ospath.exists(self.token_path):
             LOGGER.info(f"Authorize with {self.token_path}")
             with open(self.token_path, "rb") as f:
                 credentials = pload(f)
         else:
             LOGGER.error("token.pickle not found!")
-        authorized_http = AuthorizedHttp(credentials, http=build_http())
-        authorized_http.http.disable_ssl_certificate_validation = True
-        return build("drive", "v3", http=authorized_http, cache_discovery=False)
+        return DriveClient(credentials)
 
-    def switch_service_account(self):
-        if self.sa_index == self.sa_number - 1:
-            self.sa_index = 0
-        else:
-            self.sa_index += 1
+    async def switch_service_account(self, reason):
+        await sa_pool.report_error(self.sa_name, reason)
         self.sa_count += 1
-        LOGGER.info(f"Switching to {self.sa_index} index")
-        self.service = self.authorize()
+        self.sa_name, self.service, self.sa_number = sa_pool.lease(self.sa_name)
+        LOGGER.info(f"Switching to {self.sa_name}")
 
     def get_id_from_url(self, link, user_id=""):
         if user_id and link.startswith("mtp:"):
@@ -125,41 +103,29 @@ class GoogleDriveHelper:
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type(Exception),
     )
-    def set_permission(self, file_id):
+    async def set_permission(self, file_id):
         permissions = {
             "role": "reader",
             "type": "anyone",
             "value": None,
             "withLink": True,
         }
-        return (
-            self.service.permissions()
-            .create(fileId=file_id, body=permissions, supportsAllDrives=True)
-            .execute()
-        )
+        return await self.service.create_permission(file_id, permissions)
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type(Exception),
     )
-    def get_file_metadata(self, file_id):
-        return (
-            self.service.files()
-            .get(
-                fileId=file_id,
-                supportsAllDrives=True,
-                fields="name, id, mimeType, size",
-            )
-            .execute()
-        )
+    async def get_file_metadata(self, file_id):
+        return await self.service.get_file(file_id)
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type(Exception),
     )
-    def get_files_by_folder_id(self, folder_id, item_type=""):
+    async def get_files_by_folder_id(self, folder_id, item_type=""):
         page_token = None
         files = []
         if not item_type:
@@ -169,20 +135,18 @@ class GoogleDriveHelper:
         else:
             q = f"'{folder_id}' in parents and mimeType != '{self.G_DRIVE_DIR_MIME_TYPE}' and trashed = false"
         while True:
-            response = (
-                self.service.files()
-                .list(
-                    supportsAllDrives=True,
-                    includeItemsFromAllDrives=True,
-                    q=q,
-                    spaces="drive",
-                    pageSize=200,
-                    fields="nextPageToken, files(id, name, mimeType, size, shortcutDetails)",
-                    orderBy="folder, name",
-                    pageToken=page_token,
-                )
-                .execute()
-            )
+            params = {
+                "supportsAllDrives": True,
+                "includeItemsFromAllDrives": True,
+                "q": q,
+                "spaces": "drive",
+                "pageSize": 200,
+                "fields": "nextPageToken, files(id, name, mimeType, size, shortcutDetails)",
+                "orderBy": "folder, name",
+            }
+            if page_token:
+                params["pageToken"] = page_token
+            response = await self.service.list_files(**params)
             files.extend(response.get("files", []))
             page_token = response.get("nextPageToken")
             if page_token is None:
@@ -194,7 +158,7 @@ class GoogleDriveHelper:
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type(Exception),
     )
-    def create_directory(self, directory_name, dest_id):
+    async def create_directory(self, directory_name, dest_id, permission=True):
         file_metadata = {
             "name": directory_name,
             "description": "Uploaded by Mirror-leech-telegram-bot",
@@ -202,17 +166,33 @@ class GoogleDriveHelper:
         }
         if dest_id is not None:
             file_metadata["parents"] = [dest_id]
-        file = (
-            self.service.files()
-            .create(body=file_metadata, supportsAllDrives=True)
-            .execute()
-        )
+        file = await self.service.create_file(file_metadata)
         file_id = file.get("id")
-        if not Config.IS_TEAM_DRIVE:
-            self.set_permission(file_id)
+        if permission and not Config.IS_TEAM_DRIVE:
+            await self.set_permission(file_id)
         LOGGER.info(f'Created G-Drive Folder:\nName: {file.get("name")}\nID: {file_id}')
         return file_id
 
+    @staticmethod
+    async def run_bounded(coros, limit):
+        semaphore = Semaphore(max(limit, 1))
+
+        async def _run(coro):
+            async with semaphore:
+                return await coro
+
+        return await gather(*(_run(coro) for coro in coros))
+
+    @staticmethod
+    async def run_workers(coros):
+        tasks = [bot_loop.create_task(coro) for coro in coros]
+        try:
+            return await gather(*tasks)
+        except:
+            for task in tasks:
+                task.cancel()
+            raise
+
     def escapes(self, estr):
         chars = ["\\", "'", '"', r"\a", r"\b", r"\f", r"\n", r"\r", r"\t"]
         for char in chars:
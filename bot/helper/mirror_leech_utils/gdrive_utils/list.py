@@ -8,6 +8,7 @@ from pyrogram.handlers import CallbackQueryHandler
 from tenacity import RetryError
 from time import time
 
+from .... import bot_loop
 from ....core.config_manager import Config
 from ...ext_utils.bot_utils import update_user_ldata, new_task
 from ...ext_utils.db_handler import database
@@ -23,6 +24,9 @@ from ...telegram_helper.message_utils import (
 LOGGER = getLogger(__name__)
 
 LIST_LIMIT = 6
+LIST_CACHE_TTL = 120
+
+list_cache = {}
 
 
 @new_task
@@ -159,6 +163,33 @@ class GoogleDriveList(GoogleDriveHelper):
             else:
                 await edit_message(self._reply_to, msg, button)
 
+    async def _get_files(self, folder_id, item_type):
+        key = (self.token_path, folder_id, item_type)
+        now = time()
+        if (cached := list_cache.get(key)) and now - cached[0] < LIST_CACHE_TTL:
+            task = cached[1]
+        else:
+            if len(list_cache) > 500:
+                for k, v in list(list_cache.items()):
+                    if now - v[0] >= LIST_CACHE_TTL:
+                        del list_cache[k]
+            task = bot_loop.create_task(
+                self.get_files_by_folder_id(folder_id, item_type)
+            )
+            list_cache[key] = (now, task)
+        try:
+            return await task
+        except:
+            if list_cache.get(key, (0, None))[1] is task:
+                del list_cache[key]
+            raise
+
+    async def _prefetch(self, folder_id, item_type):
+        try:
+            await self._get_files(folder_id, item_type)
+        except Exception as e:
+            LOGGER.debug(f"Prefetch failed for {folder_id}: {e}")
+
     async def get_items_buttons(self):
         items_no = len(self.items_list)
         pages = (items_no + LIST_LIMIT - 1) // LIST_LIMIT
@@ -175,6 +206,7 @@ class GoogleDriveList(GoogleDriveHelper):
             if item["mimeType"] == self.G_DRIVE_DIR_MIME_TYPE:
                 ptype = "fo"
                 name = item["name"]
+                bot_loop.create_task(self._prefetch(item["id"], self.item_type))
             else:
                 ptype = "fi"
                 name = f"[{get_readable_file_size(float(item['size']))}] {item['name']}"
@@ -227,7 +259,7 @@ class GoogleDriveList(GoogleDriveHelper):
         elif itype:
             self.item_type = itype
         try:
-            files = self.get_files_by_folder_id(self.id, self.item_type)
+            files = await self._get_files(self.id, self.item_type)
             if self.listener.is_cancelled:
                 return
         except Exception as err:
@@ -249,7 +281,7 @@ class GoogleDriveList(GoogleDriveHelper):
     async def list_drives(self):
         self.service = self.authorize()
         try:
-            result = self.service.drives().list(pageSize="100").execute()
+            result = await self.service.list_drives(100)
         except Exception as e:
             self.id = str(e)
             self.event.set()
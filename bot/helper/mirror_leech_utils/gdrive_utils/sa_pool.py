@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+from google.oauth2 import service_account
+from logging import getLogger
+from os import listdir
+from time import monotonic
+
+from ....helper.ext_utils.db_handler import database
+from .client import DriveClient
+
+LOGGER = getLogger(__name__)
+
+
+class ServiceAccountPool:
+    DAILY_LIMIT = 750 * 1024**3
+    # rate limit errors older than this don't count against an account
+    ERROR_WINDOW = 900
+    SAVE_INTERVAL = 30
+
+    def __init__(self):
+        self._clients = {}
+        self._errors = {}
+        self._leased = {}
+        self._saved = {}
+        self.usage = {}
+
+    @staticmethod
+    def _today():
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def _used_today(self, name):
+        usage = self.usage.get(name)
+        if usage is None or usage["day"] != self._today():
+            return 0
+        return usage["bytes"]
+
+    def _score(self, name, now):
+        errors = [t for t in self._errors.get(name, []) if now - t < self.ERROR_WINDOW]
+        self._errors[name] = errors
+        return (
+            self._used_today(name) >= self.DAILY_LIMIT,
+            len(errors),
+            self._used_today(name),
+            self._leased.get(name, 0),
+        )
+
+    def lease(self, exclude=None):
+        accounts = listdir("accounts")
+        for name in list(self._clients):
+            if name not in accounts:
+                del self._clients[name]
+        now = monotonic()
+        candidates = [name for name in accounts if name != exclude] or accounts
+        name = min(candidates, key=lambda n: self._score(n, now))
+        self._leased[name] = now
+        if (client := self._clients.get(name)) is None:
+            credentials = service_account.Credentials.from_service_account_file(
+                f"accounts/{name}", scopes=["https://www.googleapis.com/auth/drive"]
+            )
+            client = self._clients[name] = DriveClient(credentials)
+        LOGGER.info(f"Authorizing with {name} service account")
+        return name, client, len(accounts)
+
+    async def report_error(self, name, reason):
+        if reason == "dailyLimitExceeded":
+            self.usage[name] = {"day": self._today(), "bytes": self.DAILY_LIMIT}
+            await database.update_sa_usage(name, self.usage[name])
+        else:
+            self._errors.setdefault(name, []).append(monotonic())
+
+    async def add_bytes(self, name, size):
+        if not name or not size:
+            return
+        self.usage[name] = {"day": self._today(), "bytes": self._used_today(name) + size}
+        now = monotonic()
+        if now - self._saved.get(name, 0) >= self.SAVE_INTERVAL:
+            self._saved[name] = now
+            await database.update_sa_usage(name, self.usage[name])
+
+
+sa_pool = ServiceAccountPool()
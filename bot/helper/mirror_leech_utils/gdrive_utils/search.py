@@ -2,10 +2,13 @@ from logging import getLogger
 
 from .... import drives_names, drives_ids, index_urls, user_data
 from ....helper.ext_utils.status_utils import get_readable_file_size
+from ....helper.mirror_leech_utils.gdrive_utils.drive_index import drive_index
 from ....helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
 
+SEARCH_WORKERS = 10
+
 
 class GoogleDriveSearch(GoogleDriveHelper):
 
@@ -16,7 +19,7 @@ class GoogleDriveSearch(GoogleDriveHelper):
         self._is_recursive = is_recursive
         self._item_type = item_type
 
-    def _drive_query(self, dir_id, file_name, is_recursive):
+    async def _drive_query(self, dir_id, file_name, is_recursive):
         try:
             if is_recursive:
                 if self._stop_dup:
@@ -34,32 +37,24 @@ class GoogleDriveSearch(GoogleDriveHelper):
                         query += f"mimeType = '{self.G_DRIVE_DIR_MIME_TYPE}' and "
                 query += "trashed = false"
                 if dir_id == "root":
-                    return (
-                        self.service.files()
-                        .list(
-                            q=f"{query} and 'me' in owners",
-                            pageSize=200,
-                            spaces="drive",
-                            fields="files(id, name, mimeType, size, parents)",
-                            orderBy="folder, name asc",
-                        )
-                        .execute()
+                    return await self.service.list_files(
+                        q=f"{query} and 'me' in owners",
+                        pageSize=200,
+                        spaces="drive",
+                        fields="files(id, name, mimeType, size, parents)",
+                        orderBy="folder, name asc",
                     )
                 else:
-                    return (
-                        self.service.files()
-                        .list(
-                            supportsAllDrives=True,
-                            includeItemsFromAllDrives=True,
-                            driveId=dir_id,
-                            q=query,
-                            spaces="drive",
-                            pageSize=150,
-                            fields="files(id, name, mimeType, size, teamDriveId, parents)",
-                            corpora="drive",
-                            orderBy="folder, name asc",
-                        )
-                        .execute()
+                    return await self.service.list_files(
+                        supportsAllDrives=True,
+                        includeItemsFromAllDrives=True,
+                        driveId=dir_id,
+                        q=query,
+                        spaces="drive",
+                        pageSize=150,
+                        fields="files(id, name, mimeType, size, teamDriveId, parents)",
+                        corpora="drive",
+                        orderBy="folder, name asc",
                     )
             else:
                 if self._stop_dup:
@@ -75,26 +70,33 @@ class GoogleDriveSearch(GoogleDriveHelper):
                     elif self._item_type == "folders":
                         query += f"mimeType = '{self.G_DRIVE_DIR_MIME_TYPE}' and "
                 query += "trashed = false"
-                return (
-                    self.service.files()
-                    .list(
-                        supportsAllDrives=True,
-                        includeItemsFromAllDrives=True,
-                        q=query,
-                        spaces="drive",
-                        pageSize=150,
-                        fields="files(id, name, mimeType, size)",
-                        orderBy="folder, name asc",
-                    )
-                    .execute()
+                return await self.service.list_files(
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True,
+                    q=query,
+                    spaces="drive",
+                    pageSize=150,
+                    fields="files(id, name, mimeType, size)",
+                    orderBy="folder, name asc",
                 )
         except Exception as err:
             err = str(err).replace(">", "").replace("<", "")
             LOGGER.error(err)
             return {"files": []}
 
-    def drive_list(self, file_name, target_id="", user_id=""):
+    async def _search_drive(self, dir_id, name, file_name):
+        isRecur = False if self._is_recursive and len(dir_id) > 23 else self._is_recursive
+        if isRecur and (
+            response := await drive_index.search(
+                dir_id, name, self._stop_dup, self._item_type
+            )
+        ):
+            return response
+        return await self._drive_query(dir_id, file_name, isRecur)
+
+    async def drive_list(self, file_name, target_id="", user_id=""):
         msg = ""
+        name = str(file_name).strip()
         file_name = self.escapes(str(file_name))
         contents_no = 0
         telegraph_content = []
@@ -121,16 +123,17 @@ class GoogleDriveSearch(GoogleDriveHelper):
 
         self.service = self.authorize()
 
-        for drive_name, dir_id, index_url in drives:
-            isRecur = (
-                False if self._is_recursive and len(dir_id) > 23 else self._is_recursive
-            )
-            response = self._drive_query(dir_id, file_name, isRecur)
+        drives = list(drives)
+        if self._no_multi:
+            drives = drives[:1]
+        responses = await self.run_bounded(
+            (self._search_drive(dir_id, name, file_name) for _, dir_id, _ in drives),
+            SEARCH_WORKERS,
+        )
+
+        for (drive_name, dir_id, index_url), response in zip(drives, responses):
             if not response["files"]:
-                if self._no_multi:
-                    break
-                else:
-                    continue
+                continue
             if not Title:
                 msg += f"<h4>Search Result For {file_name}</h4>"
                 Title = True
@@ -166,8 +169,6 @@ class GoogleDriveSearch(GoogleDriveHelper):
                 if len(msg.encode("utf-8")) > 39000:
                     telegraph_content.append(msg)
                     msg = ""
-            if self._no_multi:
-                break
 
         if msg != "":
             telegraph_content.append(msg)
@@ -1,7 +1,10 @@
-from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload
+from aiofiles import open as aiopen
+from aiofiles.os import path as aiopath, listdir, remove, stat
+from asyncio import gather, shield
+from collections import deque
+from httpx import TransportError
 from logging import getLogger
-from os import path as ospath, listdir, remove
+from os import path as ospath
 from tenacity import (
     retry,
     wait_exponential,
@@ -9,24 +12,91 @@ from tenacity import (
     retry_if_exception_type,
     RetryError,
 )
+from time import time
 
+from .... import bot_loop
 from ....core.config_manager import Config
-from ...ext_utils.bot_utils import async_to_sync, SetInterval
+from ...ext_utils.bot_utils import sync_to_async
+from ...ext_utils.db_handler import database
 from ...ext_utils.files_utils import get_mime_type
+from ...mirror_leech_utils.gdrive_utils.client import DriveError
 from ...mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from ...mirror_leech_utils.gdrive_utils.sa_pool import sa_pool
 
 LOGGER = getLogger(__name__)
 
+MIN_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_CHUNK_SIZE = 512 * 1024 * 1024
+CHUNK_ALIGN = 256 * 1024
+CHUNK_DURATION = 20
+# Drive keeps resumable sessions for a week
+SESSION_LIFETIME = 6 * 24 * 3600
+
+upload_sessions = {}
+
+
+def _read_block(path, offset, size):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+class SharedReads:
+    # Drive legs of a fan-out upload read the same files, each block is read once
+    BLOCK_SIZE = 4 * 1024 * 1024
+    # a leg that falls this far behind reads the evicted blocks itself
+    MAX_BLOCKS = 32
+
+    def __init__(self, readers):
+        self._readers = readers
+        self._blocks = {}
+
+    async def read(self, reader, path, offset, size):
+        index, start = divmod(offset, self.BLOCK_SIZE)
+        key = (path, index)
+        if (entry := self._blocks.get(key)) is None:
+            while len(self._blocks) >= self.MAX_BLOCKS:
+                del self._blocks[next(iter(self._blocks))]
+            task = bot_loop.create_task(
+                sync_to_async(
+                    _read_block, path, index * self.BLOCK_SIZE, self.BLOCK_SIZE
+                )
+            )
+            entry = self._blocks[key] = (task, set())
+        try:
+            # another leg may be waiting on the same read
+            block = await shield(entry[0])
+        except:
+            if self._blocks.get(key) is entry:
+                del self._blocks[key]
+            raise
+        data = block[start : start + size]
+        # the block can go once every leg has read up to its end
+        if start + len(data) >= len(block):
+            entry[1].add(reader)
+            if len(entry[1]) >= self._readers and self._blocks.get(key) is entry:
+                del self._blocks[key]
+        return data
+
 
 class GoogleDriveUpload(GoogleDriveHelper):
-    def __init__(self, listener, path):
+    def __init__(self, listener, path, shared_reads=None):
         self.listener = listener
-        self._updater = None
         self._path = path
+        self._shared_reads = shared_reads
         self._is_errored = False
+        self._workers = []
         super().__init__()
         self.is_uploading = True
 
+    @property
+    def processed_bytes(self):
+        return (
+            self.proc_bytes
+            + self.file_processed_bytes
+            + sum(worker.processed_bytes for worker in self._workers)
+        )
+
     def user_setting(self):
         if self.listener.up_dest.startswith("mtp:"):
             self.token_path = f"tokens/{self.listener.user_id}.pickle"
@@ -39,15 +109,16 @@ class GoogleDriveUpload(GoogleDriveHelper):
             self.listener.up_dest = self.listener.up_dest.replace("sa:", "", 1)
             self.use_sa = True
 
-    def upload(self):
+    async def upload(self):
         self.user_setting()
         self.service = self.authorize()
         LOGGER.info(f"Uploading: {self._path}")
-        self._updater = SetInterval(self.update_interval, self.progress)
+        mime_type = ""
+        dir_id = ""
         try:
-            if ospath.isfile(self._path):
-                mime_type = get_mime_type(self._path)
-                link = self._upload_file(
+            if await aiopath.isfile(self._path):
+                mime_type = await sync_to_async(get_mime_type, self._path)
+                link = await self._upload_file(
                     self._path,
                     self.listener.name,
                     mime_type,
@@ -61,11 +132,11 @@ class GoogleDriveUpload(GoogleDriveHelper):
                 LOGGER.info(f"Uploaded To G-Drive: {self._path}")
             else:
                 mime_type = "Folder"
-                dir_id = self.create_directory(
+                dir_id = await self.create_directory(
                     ospath.basename(ospath.abspath(self.listener.name)),
                     self.listener.up_dest,
                 )
-                result = self._upload_dir(self._path, dir_id)
+                result = await self._upload_dir(self._path, dir_id)
                 if result is None:
                     raise ValueError("Upload has been manually cancelled!")
                 link = self.G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(dir_id)
@@ -78,21 +149,17 @@ class GoogleDriveUpload(GoogleDriveHelper):
                 err = err.last_attempt.exception()
             err = str(err).replace(">", "").replace("<", "")
             LOGGER.error(err)
-            async_to_sync(self.listener.on_upload_error, err)
+            await self.listener.on_upload_error(err)
             self._is_errored = True
         finally:
-            self._updater.cancel()
             if self.listener.is_cancelled and not self._is_errored:
                 if mime_type == "Folder" and dir_id:
                     LOGGER.info("Deleting uploaded data from Drive...")
-                    self.service.files().delete(
-                        fileId=dir_id, supportsAllDrives=True
-                    ).execute()
+                    await self.service.delete_file(dir_id)
                 return
             elif self._is_errored:
                 return
-            async_to_sync(
-                self.listener.on_upload_complete,
+            await self.listener.on_upload_complete(
                 link,
                 self.total_files,
                 self.total_folders,
@@ -101,33 +168,115 @@ class GoogleDriveUpload(GoogleDriveHelper):
             )
             return
 
-    def _upload_dir(self, input_directory, dest_id):
-        list_dirs = listdir(input_directory)
-        if len(list_dirs) == 0:
-            return dest_id
-        new_id = None
-        for item in list_dirs:
-            current_file_name = ospath.join(input_directory, item)
-            if ospath.isdir(current_file_name):
-                current_dir_id = self.create_directory(item, dest_id)
-                new_id = self._upload_dir(current_file_name, current_dir_id)
-                self.total_folders += 1
+    async def _upload_dir(self, input_directory, dest_id):
+        workers = max(Config.GDRIVE_UPLOAD_WORKERS, 1)
+        files = deque()
+        level = [(input_directory, dest_id)]
+        while level and not self.listener.is_cancelled:
+            dirs = []
+            for directory, parent_id in level:
+                for item in await listdir(directory):
+                    item_path = ospath.join(directory, item)
+                    if await aiopath.isdir(item_path):
+                        dirs.append((item_path, item, parent_id))
+                    else:
+                        files.append((item_path, item, parent_id))
+            level = []
+            for i in range(0, len(dirs), workers):
+                batch = dirs[i : i + workers]
+                ids = await gather(
+                    *(self.create_directory(name, parent) for _, name, parent in batch)
+                )
+                level.extend(
+                    (item[0], dir_id) for item, dir_id in zip(batch, ids)
+                )
+            self.total_folders += len(dirs)
+        workers = min(workers, len(files))
+        for _ in range(workers):
+            worker = GoogleDriveUpload(self.listener, self._path, self._shared_reads)
+            worker.token_path = self.token_path
+            worker.use_sa = self.use_sa
+            worker.service = worker.authorize()
+            self._workers.append(worker)
+        await self.run_workers(
+            self._upload_worker(worker, files) for worker in self._workers
+        )
+        return dest_id
+
+    async def _upload_worker(self, worker, files):
+        while files and not self.listener.is_cancelled:
+            file_path, file_name, dest_id = files.popleft()
+            mime_type = await sync_to_async(get_mime_type, file_path)
+            await worker._upload_file(file_path, file_name, mime_type, dest_id)
+            self.total_files += 1
+
+    async def _get_session(self, file_path, file_name, dest_id, size):
+        if size <= MIN_CHUNK_SIZE:
+            return None, None, 0, None
+        # a rewritten file gets a new mtime, so it can't resume the old session
+        st = await stat(file_path)
+        key = (
+            f"{ospath.abspath(file_path)}_{size}_{st.st_mtime_ns}_{dest_id}_{file_name}"
+        )
+        auth = self.sa_name or self.token_path
+        session = upload_sessions.get(key) or await database.get_upload_session(key)
+        if (
+            session is None
+            or session["auth"] != auth
+            or time() - session["time"] > SESSION_LIFETIME
+        ):
+            return key, None, 0, None
+        try:
+            offset, response = await self.service.upload_status(session["uri"], size)
+        except DriveError as err:
+            LOGGER.info(f"Saved upload session for {file_name} is gone: {err}")
+            await self._remove_session(key)
+            return key, None, 0, None
+        LOGGER.info(f"Resuming upload of {file_name} from byte {offset}")
+        return key, session["uri"], offset, response
+
+    async def _save_session(self, key, session_url, offset):
+        if key is None:
+            return
+        session = upload_sessions.get(key)
+        if session is None or session["uri"] != session_url:
+            session = {
+                "uri": session_url,
+                "auth": self.sa_name or self.token_path,
+                "time": time(),
+            }
+        session["offset"] = offset
+        upload_sessions[key] = session
+        await database.update_upload_session(key, session)
+
+    async def _remove_session(self, key):
+        if key is None:
+            return
+        upload_sessions.pop(key, None)
+        await database.rm_upload_session(key)
+
+    async def _read_chunk(self, f, file_path, offset, size):
+        while size > 0 and not self.listener.is_cancelled:
+            if self._shared_reads is None:
+                data = await f.read(min(size, 4 * 1024 * 1024))
             else:
-                mime_type = get_mime_type(current_file_name)
-                file_name = current_file_name.split("/")[-1]
-                self._upload_file(current_file_name, file_name, mime_type, dest_id)
-                self.total_files += 1
-                new_id = dest_id
-            if self.listener.is_cancelled:
+                # workers of one leg share its listener, so it names the reader
+                data = await self._shared_reads.read(
+                    self.listener, file_path, offset, size
+                )
+            if not data:
                 break
-        return new_id
+            size -= len(data)
+            offset += len(data)
+            self.file_processed_bytes += len(data)
+            yield data
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type(Exception),
     )
-    def _upload_file(self, file_path, file_name, mime_type, dest_id, in_dir=True):
+    async def _upload_file(self, file_path, file_name, mime_type, dest_id, in_dir=True):
         file_metadata = {
             "name": file_name,
             "description": "Uploaded by Mirror-leech-telegram-bot",
@@ -136,45 +285,62 @@ class GoogleDriveUpload(GoogleDriveHelper):
         if dest_id is not None:
             file_metadata["parents"] = [dest_id]
 
-        if ospath.getsize(file_path) == 0:
-            media_body = MediaFileUpload(file_path, mimetype=mime_type, resumable=False)
-            response = (
-                self.service.files()
-                .create(
-                    body=file_metadata, media_body=media_body, supportsAllDrives=True
-                )
-                .execute()
-            )
+        size = await aiopath.getsize(file_path)
+        if size == 0:
+            response = await self.service.create_file(file_metadata)
             if not Config.IS_TEAM_DRIVE:
-                self.set_permission(response["id"])
-
-            drive_file = (
-                self.service.files()
-                .get(fileId=response["id"], supportsAllDrives=True)
-                .execute()
-            )
-            return self.G_DRIVE_BASE_DOWNLOAD_URL.format(drive_file.get("id"))
-        media_body = MediaFileUpload(
-            file_path, mimetype=mime_type, resumable=True, chunksize=100 * 1024 * 1024
-        )
-
-        drive_file = self.service.files().create(
-            body=file_metadata, media_body=media_body, supportsAllDrives=True
+                await self.set_permission(response["id"])
+            return self.G_DRIVE_BASE_DOWNLOAD_URL.format(response["id"])
+        key, session_url, offset, response = await self._get_session(
+            file_path, file_name, dest_id, size
         )
-        response = None
+        if session_url is None:
+            session_url = await self.service.create_upload_session(
+                file_metadata, mime_type, size
+            )
+            await self._save_session(key, session_url, 0)
+        chunk_size = MIN_CHUNK_SIZE * 4
         retries = 0
-        while response is None and not self.listener.is_cancelled:
-            try:
-                self.status, response = drive_file.next_chunk()
-            except HttpError as err:
-                if err.resp.status in [500, 502, 503, 504, 429] and retries < 10:
+        async with aiopen(file_path, "rb") as f:
+            while response is None and not self.listener.is_cancelled:
+                try:
+                    end = min(offset + chunk_size, size) - 1
+                    await f.seek(offset)
+                    self.file_processed_bytes = offset
+                    chunk_start = offset
+                    start_time = time()
+                    offset, response = await self.service.upload_chunk(
+                        session_url,
+                        self._read_chunk(f, file_path, offset, end - offset + 1),
+                        offset,
+                        end,
+                        size,
+                    )
+                    # aim for chunks of CHUNK_DURATION seconds at the measured speed
+                    speed = (end + 1 - chunk_start) / max(
+                        time() - start_time, 0.001
+                    )
+                    chunk_size = min(
+                        max(int(speed * CHUNK_DURATION), MIN_CHUNK_SIZE), MAX_CHUNK_SIZE
+                    )
+                    chunk_size -= chunk_size % CHUNK_ALIGN
+                    if response is None:
+                        await self._save_session(key, session_url, offset)
+                except TransportError:
+                    if retries >= 10:
+                        raise
                     retries += 1
-                    continue
-                if err.resp.get("content-type", "").startswith("application/json"):
-                    reason = (
-                        eval(err.content).get("error").get("errors")[0].get("reason")
+                    offset, response = await self.service.upload_status(
+                        session_url, size
                     )
-                    if reason not in [
+                except DriveError as err:
+                    if err.status in [500, 502, 503, 504, 429] and retries < 10:
+                        retries += 1
+                        offset, response = await self.service.upload_status(
+                            session_url, size
+                        )
+                        continue
+                    if err.reason not in [
                         "userRateLimitExceeded",
                         "dailyLimitExceeded",
                     ]:
@@ -188,9 +354,12 @@ class GoogleDriveUpload(GoogleDriveHelper):
                         else:
                             if self.listener.is_cancelled:
                                 return
-                            self.switch_service_account()
-                            LOGGER.info(f"Got: {reason}, Trying Again...")
-                            return self._upload_file(
+                            await self._remove_session(key)
+                            # uploads report the 750 GB daily cap as a user rate limit
+                            await self.switch_service_account("dailyLimitExceeded")
+                            LOGGER.info(f"Got: {err.reason}, Trying Again...")
+                            self.file_processed_bytes = 0
+                            return await self._upload_file(
                                 file_path,
                                 file_name,
                                 mime_type,
@@ -198,22 +367,21 @@ class GoogleDriveUpload(GoogleDriveHelper):
                                 in_dir,
                             )
                     else:
-                        LOGGER.error(f"Got: {reason}")
+                        LOGGER.error(f"Got: {err.reason}")
                         raise err
+        self.file_processed_bytes = 0
         if self.listener.is_cancelled:
             return
-        try:
-            remove(file_path)
-        except:
-            pass
-        self.file_processed_bytes = 0
+        await self._remove_session(key)
+        self.proc_bytes += size
+        await sa_pool.add_bytes(self.sa_name, size)
+        if not self.listener.keep_source:
+            try:
+                await remove(file_path)
+            except:
+                pass
         if not Config.IS_TEAM_DRIVE:
-            self.set_permission(response["id"])
+            await self.set_permission(response["id"])
         if not in_dir:
-            drive_file = (
-                self.service.files()
-                .get(fileId=response["id"], supportsAllDrives=True)
-                .execute()
-            )
-            return self.G_DRIVE_BASE_DOWNLOAD_URL.format(drive_file.get("id"))
+            return self.G_DRIVE_BASE_DOWNLOAD_URL.format(response["id"])
         return
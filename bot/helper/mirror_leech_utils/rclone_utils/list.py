@@ -1,16 +1,14 @@
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath
 from asyncio import wait_for, Event, gather
-from configparser import RawConfigParser
 from functools import partial
-from json import loads
 from pyrogram.filters import regex, user
 from pyrogram.handlers import CallbackQueryHandler
 from time import time
 
 from .... import LOGGER
 from ....core.config_manager import Config
-from ...ext_utils.bot_utils import cmd_exec, update_user_ldata, new_task
+from ...ext_utils.bot_utils import update_user_ldata, new_task
 from ...ext_utils.db_handler import database
 from ...ext_utils.status_utils import get_readable_file_size, get_readable_time
 from ...telegram_helper.button_build import ButtonMaker
@@ -19,6 +17,7 @@ from ...telegram_helper.message_utils import (
     edit_message,
     delete_message,
 )
+from .rcd import RcloneError, get_config, get_rcd
 
 LIST_LIMIT = 6
 
@@ -257,56 +256,36 @@ class RcloneList:
             self.item_type = "--dirs-only"
         elif itype:
             self.item_type = itype
-        cmd = [
-            "rclone",
-            "lsjson",
-            self.item_type,
-            "--fast-list",
-            "--no-mimetype",
-            "--no-modtime",
-            "--config",
-            self.config_path,
-            f"{self.remote}{self.path}",
-            "-v",
-            "--log-systemd",
-        ]
         if self.listener.is_cancelled:
             return
-        res, err, code = await cmd_exec(cmd)
-        if code in [0, -9]:
-            result = loads(res)
-            if (
-                len(result) == 0
-                and itype != self.item_type
-                and self.list_status == "rcd"
-            ):
-                itype = (
-                    "--dirs-only"
-                    if self.item_type == "--files-only"
-                    else "--files-only"
-                )
-                self.item_type = itype
-                await self.get_path(itype)
-            else:
-                self.path_list = sorted(result, key=lambda x: x["Path"])
-                self.iter_start = 0
-                await self.get_path_buttons()
-        else:
+        try:
+            result = await get_rcd(self.config_path).list(
+                f"{self.remote}{self.path}",
+                dirsOnly=self.item_type == "--dirs-only",
+                filesOnly=self.item_type == "--files-only",
+                noModTime=True,
+                noMimeType=True,
+            )
+        except RcloneError as err:
             LOGGER.error(
-                f"While rclone listing. Path: {self.remote}{self.path}. Stderr: {err}"
+                f"While rclone listing. Path: {self.remote}{self.path}. Error: {err}"
             )
-            self.remote = err[:4000]
+            self.remote = str(err)[:4000]
             self.path = ""
             self.event.set()
+            return
+        if len(result) == 0 and itype != self.item_type and self.list_status == "rcd":
+            itype = "--dirs-only" if self.item_type == "--files-only" else "--files-only"
+            self.item_type = itype
+            await self.get_path(itype)
+        else:
+            self.path_list = sorted(result, key=lambda x: x["Path"])
+            self.iter_start = 0
+            await self.get_path_buttons()
 
     async def list_remotes(self):
-        config = RawConfigParser()
-        async with aiopen(self.config_path, "r") as f:
-            contents = await f.read()
-            config.read_string(contents)
-        if config.has_section("combine"):
-            config.remove_section("combine")
-        self._sections = config.sections()
+        config = await get_config(self.config_path)
+        self._sections = [section for section in config if section != "combine"]
         if len(self._sections) == 1:
             self.remote = f"{self._sections[0]}:"
             await self.get_path()
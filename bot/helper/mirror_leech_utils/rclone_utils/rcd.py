@@ -0,0 +1,213 @@
+from aiofiles import open as aiopen
+from aiofiles.os import path as aiopath
+from asyncio import Lock, create_subprocess_exec, gather, sleep, wait_for
+from configparser import RawConfigParser
+from httpx import AsyncClient, Timeout, TransportError
+from logging import getLogger
+from socket import socket
+from time import time
+
+from .... import bot_loop
+
+LOGGER = getLogger(__name__)
+
+POLL_INTERVAL = 1
+LIST_CACHE_TTL = 120
+# jobs run async, so no rc call should take longer than a big listing
+READ_TIMEOUT = 300
+# daemons for user and SA configs quit after this many idle seconds
+IDLE_TIMEOUT = 600
+
+
+class RcloneError(Exception):
+    pass
+
+
+class RcloneRcd:
+    def __init__(self, config_path):
+        self.config_path = config_path
+        self._proc = None
+        self._url = ""
+        self._http = None
+        self._lock = Lock()
+        self._options = None
+        self._cache = {}
+        self._pending = 0
+        self._last_used = time()
+
+    async def _start(self):
+        with socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        self._url = f"http://127.0.0.1:{port}"
+        if self._http is None:
+            self._http = AsyncClient(timeout=Timeout(READ_TIMEOUT, connect=10))
+        self._proc = await create_subprocess_exec(
+            "rclone",
+            "rcd",
+            "--rc-no-auth",
+            "--rc-addr",
+            f"127.0.0.1:{port}",
+            "--config",
+            self.config_path,
+            "-v",
+            "--log-systemd",
+        )
+        for _ in range(100):
+            if self._proc.returncode is not None:
+                break
+            try:
+                await self._http.post(f"{self._url}/rc/noop")
+            except TransportError:
+                await sleep(0.1)
+                continue
+            LOGGER.info(f"rclone rcd started for {self.config_path} on port {port}")
+            bot_loop.create_task(self._stop_when_idle())
+            return
+        raise RcloneError(f"rclone rcd failed to start for {self.config_path}")
+
+    async def _stop_when_idle(self):
+        while True:
+            await sleep(60)
+            async with self._lock:
+                if self._proc is None or self._proc.returncode is not None:
+                    return
+                # running jobs are polled every second, so they count as activity
+                if self._pending or time() - self._last_used < IDLE_TIMEOUT:
+                    continue
+                LOGGER.info(f"Stopping idle rclone rcd for {self.config_path}")
+                try:
+                    await self._http.post(f"{self._url}/core/quit")
+                    await wait_for(self._proc.wait(), 10)
+                except:
+                    if self._proc.returncode is None:
+                        self._proc.kill()
+                        await self._proc.wait()
+                self._proc = None
+                self._cache.clear()
+                return
+
+    async def call(self, method, **params):
+        self._pending += 1
+        try:
+            async with self._lock:
+                if self._proc is None or self._proc.returncode is not None:
+                    await self._start()
+            response = await self._http.post(f"{self._url}/{method}", json=params)
+        except TransportError as e:
+            raise RcloneError(f"{method}: {e}") from e
+        finally:
+            self._pending -= 1
+            self._last_used = time()
+        try:
+            result = response.json()
+        except Exception:
+            result = {"error": response.text}
+        if response.status_code != 200:
+            raise RcloneError(result.get("error", response.text))
+        return result
+
+    async def _cached(self, key, method, **params):
+        now = time()
+        if (cached := self._cache.get(key)) and now - cached[0] < LIST_CACHE_TTL:
+            task = cached[1]
+        else:
+            if len(self._cache) > 500:
+                for k, v in list(self._cache.items()):
+                    if now - v[0] >= LIST_CACHE_TTL:
+                        del self._cache[k]
+            task = bot_loop.create_task(self.call(method, **params))
+            self._cache[key] = (now, task)
+        try:
+            return await task
+        except:
+            if self._cache.get(key, (0, None))[1] is task:
+                del self._cache[key]
+            raise
+
+    async def list(self, fs, **opt):
+        result = await self._cached(
+            ("list", fs, tuple(sorted(opt.items()))),
+            "operations/list",
+            fs=fs,
+            remote="",
+            opt=opt,
+            _config={"UseListR": True},
+        )
+        return result["list"]
+
+    async def stat(self, fs, remote, **opt):
+        result = await self._cached(
+            ("stat", fs, remote, tuple(sorted(opt.items()))),
+            "operations/stat",
+            fs=fs,
+            remote=remote,
+            opt=opt,
+        )
+        return result["item"]
+
+    def invalidate(self, remote):
+        prefixes = (f"{remote}:", f"{remote},")
+        for key in [k for k in self._cache if k[1].startswith(prefixes)]:
+            del self._cache[key]
+
+    async def options_info(self):
+        if self._options is None:
+            self._options = await self.call("options/info")
+        return self._options
+
+    async def start_job(self, method, group, **params):
+        result = await self.call(method, _async=True, _group=group, **params)
+        return result["jobid"]
+
+    async def wait_job(self, job_id, group, on_stats, is_cancelled):
+        try:
+            while not is_cancelled():
+                await sleep(POLL_INTERVAL)
+                status, stats = await gather(
+                    self.call("job/status", jobid=job_id),
+                    self.call("core/stats", group=group),
+                )
+                on_stats(stats)
+                if status["finished"]:
+                    if not status["success"]:
+                        raise RcloneError(
+                            status.get("error") or stats.get("lastError", "")
+                        )
+                    return
+        finally:
+            try:
+                await self.call("core/stats-delete", group=group)
+            except RcloneError:
+                pass
+
+    async def stop_job(self, job_id):
+        try:
+            await self.call("job/stop", jobid=job_id)
+        except RcloneError as e:
+            LOGGER.error(f"While stopping rclone job {job_id}: {e}")
+
+
+rclone_daemons = {}
+config_cache = {}
+
+
+def get_rcd(config_path):
+    if (rcd := rclone_daemons.get(config_path)) is None:
+        rcd = rclone_daemons[config_path] = RcloneRcd(config_path)
+    return rcd
+
+
+async def get_config(config_path):
+    mtime = await aiopath.getmtime(config_path)
+    if (cached := config_cache.get(config_path)) and cached[0] == mtime:
+        return cached[1]
+    config = RawConfigParser()
+    async with aiopen(config_path, "r") as f:
+        config.read_string(await f.read())
+    sections = {
+        section: {opt: config.get(section, opt) for opt in config.options(section)}
+        for section in config.sections()
+    }
+    config_cache[config_path] = (mtime, sections)
+    return sections
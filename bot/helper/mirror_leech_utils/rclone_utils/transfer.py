@@ -1,19 +1,19 @@
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath, makedirs, listdir
-from asyncio import create_subprocess_exec, gather, sleep, wait_for
-from asyncio.subprocess import PIPE
-from configparser import RawConfigParser
-from json import loads
+from asyncio import gather
+from configparser import NoSectionError
 from logging import getLogger
 from random import randrange
-from re import findall as re_findall
 
 from ....core.config_manager import Config
-from ...ext_utils.bot_utils import cmd_exec, sync_to_async
+from ...ext_utils.bot_utils import sync_to_async
 from ...ext_utils.files_utils import (
     get_mime_type,
     count_files_and_folders,
 )
+from ...ext_utils.status_utils import get_readable_file_size, get_readable_time
+from .rcd import RcloneError, get_config, get_rcd
+from .tuner import rclone_tuner
 
 LOGGER = getLogger(__name__)
 
@@ -21,12 +21,17 @@ LOGGER = getLogger(__name__)
 class RcloneTransferHelper:
     def __init__(self, listener):
         self._listener = listener
-        self._proc = None
+        self._rcd = None
+        self._job_id = None
+        self._group = f"mltb/{listener.mid}/{id(self)}"
         self._transferred_size = "0 B"
         self._eta = "-"
         self._percentage = "0%"
         self._speed = "0 B/s"
         self._size = "0 B"
+        self._bytes = 0
+        self._elapsed = 0
+        self._tuning = (None, None)
         self._is_download = False
         self._is_upload = False
         self._sa_count = 1
@@ -55,31 +60,52 @@ class RcloneTransferHelper:
     def size(self):
         return self._size
 
-    async def _progress(self):
-        while not (
-            self._proc.returncode is not None
-            or self._proc.stdout.at_eof()
-            or self._listener.is_cancelled
-        ):
-            try:
-                data = await wait_for(self._proc.stdout.readline(), 60)
-            except:
-                break
-            if not data:
-                break
-            data = data.decode().strip()
-            if data := re_findall(
-                r"Transferred:\s+([\d.]+\s*\w+)\s+/\s+([\d.]+\s*\w+),\s+([\d.]+%)\s*,\s+([\d.]+\s*\w+/s),\s+ETA\s+([\dwdhms]+)",
-                data,
-            ):
-                (
-                    self._transferred_size,
-                    self._size,
-                    self._percentage,
-                    self._speed,
-                    self._eta,
-                ) = data[0]
-            await sleep(0.05)
+    def _update_stats(self, stats):
+        transferred = stats.get("bytes", 0)
+        size = stats.get("totalBytes", 0)
+        self._transferred_size = get_readable_file_size(transferred)
+        self._size = get_readable_file_size(size)
+        self._percentage = f"{round(transferred / size * 100, 2)}%" if size else "0%"
+        self._speed = f"{get_readable_file_size(stats.get('speed', 0))}/s"
+        self._eta = get_readable_time(eta) if (eta := stats.get("eta")) else "-"
+        self._bytes = (
+            transferred
+            + stats.get("serverSideCopyBytes", 0)
+            + stats.get("serverSideMoveBytes", 0)
+        )
+        self._elapsed = stats.get("elapsedTime", 0)
+
+    async def _run_job(self, rcd, method, params):
+        self._rcd = rcd
+        self._job_id = await rcd.start_job(method, self._group, **params)
+        try:
+            await rcd.wait_job(
+                self._job_id,
+                self._group,
+                self._update_stats,
+                lambda: self._listener.is_cancelled,
+            )
+        except RcloneError as err:
+            if not self._listener.is_cancelled:
+                await rclone_tuner.record(*self._tuning, error=str(err))
+            raise
+        if not self._listener.is_cancelled:
+            await rclone_tuner.record(*self._tuning, self._bytes, self._elapsed)
+
+    def _tune(self, op, remote, remote_type, files, size, baseline, config, backends):
+        if self._listener.rc_flags:
+            return
+        self._tuning = rclone_tuner.select(
+            op, remote, remote_type, files, size, baseline
+        )
+        profile = self._tuning[1]
+        config.update(
+            Transfers=profile["transfers"],
+            Checkers=profile["checkers"],
+            MultiThreadStreams=profile["streams"],
+        )
+        if chunk_size := profile["chunk_size"]:
+            backends[remote_type]["chunk_size"] = chunk_size
 
     def _switch_service_account(self):
         if self._sa_index == self._sa_number - 1:
@@ -116,18 +142,13 @@ class RcloneTransferHelper:
             await f.write(text)
         return sa_conf_file
 
-    async def _start_download(self, cmd, remote_type):
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        await self._progress()
-        _, stderr = await self._proc.communicate()
-        return_code = self._proc.returncode
-        if self._listener.is_cancelled:
-            return
-
-        if return_code == 0:
-            await self._listener.on_download_complete()
-        elif return_code != -9:
-            error = stderr.decode().strip()
+    async def _start_download(self, rcd, get_job, remote, remote_type):
+        try:
+            await self._run_job(rcd, *get_job(remote))
+        except RcloneError as err:
+            if self._listener.is_cancelled:
+                return
+            error = str(err).strip()
             if not error and remote_type == "drive" and self._use_service_accounts:
                 error = "Mostly your service accounts don't have access to this drive!"
             LOGGER.error(error)
@@ -140,10 +161,11 @@ class RcloneTransferHelper:
             ):
                 if self._sa_count < self._sa_number:
                     remote = self._switch_service_account()
-                    cmd[6] = f"{remote}:{cmd[6].split(':', 1)[1]}"
                     if self._listener.is_cancelled:
                         return
-                    return await self._start_download(cmd, remote_type)
+                    return await self._start_download(
+                        rcd, get_job, remote, remote_type
+                    )
                 else:
                     LOGGER.info(
                         f"Reached maximum number of service accounts switching, which is {self._sa_count}"
@@ -151,8 +173,11 @@ class RcloneTransferHelper:
 
             await self._listener.on_download_error(error[:4000])
             return
+        if self._listener.is_cancelled:
+            return
+        await self._listener.on_download_complete()
 
-    async def download(self, remote, config_path, path):
+    async def download(self, remote, config_path, path, files=None):
         self._is_download = True
         try:
             remote_opts = await self._get_remote_options(config_path, remote)
@@ -160,6 +185,22 @@ class RcloneTransferHelper:
             await self._listener.on_download_error(str(err))
             return
         remote_type = remote_opts["type"]
+        oremote = remote
+
+        src_path = self._listener.link
+        if src_path.startswith("rclone_select"):
+            self._rclone_select = True
+            src_path = ""
+            is_file = False
+        else:
+            try:
+                item = await get_rcd(config_path).stat(
+                    f"{remote}:", src_path, noModTime=True, noMimeType=True
+                )
+            except RcloneError as err:
+                await self._listener.on_download_error(str(err)[:4000])
+                return
+            is_file = item is not None and not item["IsDir"]
 
         if (
             remote_type == "drive"
@@ -176,74 +217,74 @@ class RcloneTransferHelper:
                 remote = f"sa{self._sa_index:03}"
                 LOGGER.info(f"Download with service account {remote}")
 
-        cmd = self._get_updated_command(
-            config_path, f"{remote}:{self._listener.link}", path, "copy"
-        )
-
+        rcd = get_rcd(config_path)
+        config, filters, backends = self._get_job_options(remote_type)
         if remote_type == "drive" and not self._listener.rc_flags:
-            cmd.extend(
-                (
-                    "--drive-acknowledge-abuse",
-                    "--drive-chunk-size",
-                    "128M",
-                    "--tpslimit",
-                    "1",
-                    "--tpslimit-burst",
-                    "1",
-                    "--transfers",
-                    "1",
-                )
-            )
-
-        await self._start_download(cmd, remote_type)
+            config.update(TPSLimit=1, TPSLimitBurst=1)
+            backends["drive"].update(acknowledge_abuse=True, chunk_size="128M")
+        self._tune(
+            "download",
+            oremote,
+            remote_type,
+            1 if is_file else files,
+            self._listener.size,
+            {"transfers": 1} if remote_type == "drive" else {},
+            config,
+            backends,
+        )
+        await self._apply_rc_flags(rcd, config, filters, backends)
+
+        await self._start_download(
+            rcd,
+            lambda rc_remote: self._get_job(
+                "copy",
+                (rc_remote, remote_type, src_path),
+                ("", "local", path),
+                is_file,
+                config,
+                filters,
+                backends,
+            ),
+            remote,
+            remote_type,
+        )
 
     async def _get_gdrive_link(self, config_path, destination, mime_type):
-        epath = destination.rsplit("/", 1)[0] if mime_type == "Folder" else destination
-        cmd = [
-            "rclone",
-            "lsjson",
-            "--fast-list",
-            "--no-mimetype",
-            "--no-modtime",
-            "--config",
-            config_path,
-            epath,
-            "-v",
-            "--log-systemd",
-        ]
-        res, err, code = await cmd_exec(cmd)
-
-        if code == 0:
-            result = loads(res)
-            fid = next(
-                (r["ID"] for r in result if r["Path"] == self._listener.name), "err"
-            )
-            link = (
-                f"https://drive.google.com/drive/folders/{fid}"
-                if mime_type == "Folder"
-                else f"https://drive.google.com/uc?id={fid}&export=download"
-            )
-        elif code != -9:
+        remote, path = destination.split(":", 1)
+        rcd = get_rcd(config_path)
+        rcd.invalidate(remote)
+        try:
+            item = await rcd.stat(f"{remote}:", path, noModTime=True, noMimeType=True)
+        except RcloneError as err:
             LOGGER.error(
-                f"while getting drive link. Path: {destination}. Stderr: {err}"
+                f"while getting drive link. Path: {destination}. Error: {err}"
             )
-            link = ""
-        return link
+            return ""
+        fid = item.get("ID", "err") if item else "err"
+        return (
+            f"https://drive.google.com/drive/folders/{fid}"
+            if mime_type == "Folder"
+            else f"https://drive.google.com/uc?id={fid}&export=download"
+        )
 
-    async def _start_upload(self, cmd, remote_type):
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        await self._progress()
-        _, stderr = await self._proc.communicate()
-        return_code = self._proc.returncode
+    async def _get_link(self, config_path, destination):
+        remote, path = destination.split(":", 1)
+        try:
+            result = await get_rcd(config_path).call(
+                "operations/publiclink", fs=f"{remote}:", remote=path
+            )
+        except RcloneError as err:
+            LOGGER.error(f"while getting link. Path: {destination} | Error: {err}")
+            return ""
+        return result.get("url", "")
 
-        if self._listener.is_cancelled:
-            return False
-        if return_code == -9:
-            return False
-        elif return_code == 0:
-            return True
-        else:
-            error = stderr.decode().strip()
+    async def _start_upload(self, rcd, get_job, remote, remote_type):
+        try:
+            await self._run_job(rcd, *get_job(remote))
+        except RcloneError as err:
+            if self._listener.is_cancelled:
+                return False
+            error = str(err).strip()
             LOGGER.error(error)
             if (
                 self._sa_number != 0
@@ -253,11 +294,12 @@ class RcloneTransferHelper:
             ):
                 if self._sa_count < self._sa_number:
                     remote = self._switch_service_account()
-                    cmd[7] = f"{remote}:{cmd[7].split(':', 1)[1]}"
                     return (
                         False
                         if self._listener.is_cancelled
-                        else await self._start_upload(cmd, remote_type)
+                        else await self._start_upload(
+                            rcd, get_job, remote, remote_type
+                        )
                     )
                 else:
                     LOGGER.info(
@@ -265,6 +307,7 @@ class RcloneTransferHelper:
                     )
             await self._listener.on_upload_error(error[:4000])
             return False
+        return not self._listener.is_cancelled
 
     async def upload(self, path):
         self._is_upload = True
@@ -310,27 +353,42 @@ class RcloneTransferHelper:
                 fremote = f"sa{self._sa_index:03}"
                 LOGGER.info(f"Upload with service account {fremote}")
 
-        method = "move"
-        cmd = self._get_updated_command(
-            fconfig_path, path, f"{fremote}:{rc_path}", method
-        )
+        rcd = get_rcd(fconfig_path)
+        config, filters, backends = self._get_job_options(remote_type)
         if remote_type == "drive" and not self._listener.rc_flags:
-            cmd.extend(
-                (
-                    "--drive-chunk-size",
-                    "128M",
-                    "--drive-upload-cutoff",
-                    "128M",
-                    "--tpslimit",
-                    "1",
-                    "--tpslimit-burst",
-                    "1",
-                    "--transfers",
-                    "1",
-                )
-            )
-
-        result = await self._start_upload(cmd, remote_type)
+            config.update(TPSLimit=1, TPSLimitBurst=1)
+            backends["drive"].update(upload_cutoff="128M")
+        self._tune(
+            "upload",
+            oremote,
+            remote_type,
+            files,
+            self._listener.size,
+            (
+                {"transfers": 1, "chunk_size": "128M"}
+                if remote_type == "drive"
+                else {}
+            ),
+            config,
+            backends,
+        )
+        await self._apply_rc_flags(rcd, config, filters, backends)
+
+        result = await self._start_upload(
+            rcd,
+            lambda rc_remote: self._get_job(
+                "copy" if self._listener.keep_source else "move",
+                ("", "local", path),
+                (rc_remote, remote_type, rc_path),
+                mime_type != "Folder",
+                config,
+                filters,
+                backends,
+            ),
+            fremote,
+            remote_type,
+        )
+        get_rcd(oconfig_path).invalidate(oremote)
         if not result:
             return
 
@@ -344,22 +402,7 @@ class RcloneTransferHelper:
         if remote_type == "drive":
             link = await self._get_gdrive_link(oconfig_path, destination, mime_type)
         else:
-            cmd = [
-                "rclone",
-                "link",
-                "--config",
-                oconfig_path,
-                destination,
-                "-v",
-                "--log-systemd",
-            ]
-            res, err, code = await cmd_exec(cmd)
-
-            if code == 0:
-                link = res
-            elif code != -9:
-                LOGGER.error(f"while getting link. Path: {destination} | Stderr: {err}")
-                link = ""
+            link = await self._get_link(oconfig_path, destination)
         if self._listener.is_cancelled:
             return
         LOGGER.info(f"Upload Done. Path: {destination}")
@@ -386,132 +429,175 @@ class RcloneTransferHelper:
             dst_remote_opt["type"],
         )
 
-        cmd = self._get_updated_command(
-            config_path, f"{src_remote}:{src_path}", destination, method
+        self._rclone_select = self._listener.link.startswith("rclone_select")
+        rcd = get_rcd(config_path)
+        config, filters, backends = self._get_job_options(
+            src_remote_type, dst_remote_type
         )
         if not self._listener.rc_flags and src_remote_type == "drive":
-            cmd.extend(
-                (
-                    "--drive-acknowledge-abuse",
-                    "--tpslimit",
-                    "3",
-                    "--tpslimit-burst",
-                    "1",
-                    "--transfers",
-                    "3",
-                )
-            )
+            config.update(TPSLimit=3, TPSLimitBurst=1)
+            backends["drive"]["acknowledge_abuse"] = True
+        self._tune(
+            f"clone-{dst_remote_type}",
+            src_remote,
+            src_remote_type,
+            1 if mime_type != "Folder" else None,
+            None,
+            {"transfers": 3} if src_remote_type == "drive" else {},
+            config,
+            backends,
+        )
+        await self._apply_rc_flags(rcd, config, filters, backends)
 
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        await self._progress()
-        _, stderr = await self._proc.communicate()
-        return_code = self._proc.returncode
+        try:
+            await self._run_job(
+                rcd,
+                *self._get_job(
+                    method,
+                    (src_remote, src_remote_type, src_path),
+                    (dst_remote, dst_remote_type, dst_path),
+                    mime_type != "Folder",
+                    config,
+                    filters,
+                    backends,
+                ),
+            )
+        except RcloneError as err:
+            if self._listener.is_cancelled:
+                return None, None
+            error = str(err).strip()
+            LOGGER.error(error)
+            await self._listener.on_upload_error(error[:4000])
+            return None, None
+        finally:
+            rcd.invalidate(dst_remote)
 
         if self._listener.is_cancelled:
             return None, None
 
-        if return_code == -9:
-            return None, None
-        elif return_code == 0:
-            if mime_type != "Folder":
-                destination += (
-                    f"/{self._listener.name}" if dst_path else self._listener.name
-                )
-            if dst_remote_type == "drive":
-                link = await self._get_gdrive_link(config_path, destination, mime_type)
-                return (
-                    (None, None) if self._listener.is_cancelled else (link, destination)
+        if mime_type != "Folder":
+            destination += f"/{self._listener.name}" if dst_path else self._listener.name
+        if dst_remote_type == "drive":
+            link = await self._get_gdrive_link(config_path, destination, mime_type)
+        else:
+            link = await self._get_link(config_path, destination) or None
+        return (None, None) if self._listener.is_cancelled else (link, destination)
+
+    def _get_job_options(self, *remote_types):
+        config = {
+            "UseListR": True,
+            "RetriesInterval": 3 * 10**9,
+            "LowLevelRetries": 1,
+            "Metadata": True,
+        }
+        filters = {"IgnoreCase": True}
+        if self._rclone_select:
+            filters["FilesFrom"] = [self._listener.link]
+        else:
+            filters["ExcludeRule"] = [
+                "*.{" + ",".join(self._listener.excluded_extensions) + "}"
+            ]
+        backends = {remote_type: {} for remote_type in remote_types}
+        backends["local"] = {"copy_links": True}
+        return config, filters, backends
+
+    async def _apply_rc_flags(self, rcd, config, filters, backends):
+        if not (rcflags := self._listener.rc_flags):
+            return
+        try:
+            info = await rcd.options_info()
+        except RcloneError as err:
+            LOGGER.error(f"While getting rclone options info: {err}")
+            info = {}
+        options = {}
+        for block, target in (("main", config), ("filter", filters)):
+            for opt in info.get(block, []):
+                options[opt["Name"]] = (target, opt)
+                if short := opt.get("ShortOpt"):
+                    options[short] = (target, opt)
+        for flag in rcflags.split("|"):
+            if ":" in flag:
+                key, value = map(str.strip, flag.split(":", 1))
+            else:
+                key, value = flag.strip(), None
+            name = key.lstrip("-")
+            if not name:
+                continue
+            # options/info names use underscores, cli flags use dashes
+            if (option := options.get(name.replace("-", "_"))) is not None:
+                target, opt = option
+                field = opt["FieldName"]
+                value = self._get_option_value(opt.get("Type", ""), value)
+                if isinstance(value, list) and isinstance(target.get(field), list):
+                    value = target[field] + value
+                target[field] = value
+            elif (prefix := name.split("-", 1)[0]) in backends and "-" in name:
+                backends[prefix][name.split("-", 1)[1].replace("-", "_")] = (
+                    True if value is None else value
                 )
             else:
-                cmd = [
-                    "rclone",
-                    "link",
-                    "--config",
-                    config_path,
-                    destination,
-                    "-v",
-                    "--log-systemd",
-                ]
-                res, err, code = await cmd_exec(cmd)
-
-                if self._listener.is_cancelled:
-                    return None, None
-
-                if code == 0:
-                    return res, destination
-                elif code != -9:
-                    LOGGER.error(
-                        f"while getting link. Path: {destination} | Stderr: {err}"
-                    )
-                    return None, destination
+                LOGGER.warning(f"Unsupported rclone flag: {key}")
 
-        else:
-            error = stderr.decode().strip()
-            LOGGER.error(error)
-            await self._listener.on_upload_error(error[:4000])
-            return None, None
+    @staticmethod
+    def _get_option_value(option_type, value):
+        if value is None:
+            return True
+        if option_type == "bool":
+            return value.lower() in ["true", "1", "yes"]
+        if option_type.endswith("Array"):
+            return [value]
+        try:
+            if option_type.startswith("int"):
+                return int(value)
+            if option_type.startswith("float"):
+                return float(value)
+        except ValueError:
+            pass
+        return value
 
-    def _get_updated_command(
-        self,
-        config_path,
-        source,
-        destination,
-        method,
-    ):
-        if source.split(":")[-1].startswith("rclone_select"):
-            source = f"{source.split(":")[0]}:"
-            self._rclone_select = True
-        else:
-            ext = "*.{" + ",".join(self._listener.excluded_extensions) + "}"
-        cmd = [
-            "rclone",
-            method,
-            "--fast-list",
-            "--config",
-            config_path,
-            "-P",
-            source,
-            destination,
-            "-L",
-            "--retries-sleep",
-            "3s",
-            "--ignore-case",
-            "--low-level-retries",
-            "1",
-            "-M",
-            "-v",
-            "--log-systemd",
-        ]
-        if self._rclone_select:
-            cmd.extend(("--files-from", self._listener.link))
-        else:
-            cmd.extend(("--exclude", ext))
-        if rcflags := self._listener.rc_flags:
-            rcflags = rcflags.split("|")
-            for flag in rcflags:
-                if ":" in flag:
-                    key, value = map(str.strip, flag.split(":", 1))
-                    cmd.extend((key, value))
-                elif len(flag) > 0:
-                    cmd.append(flag.strip())
-        return cmd
+    @staticmethod
+    def _get_fs(remote, path, options):
+        params = "".join(
+            f",{key}" if value is True else f',{key}="{value}"'
+            for key, value in options.items()
+        )
+        return f"{remote or ':local'}{params}:{path}"
+
+    def _get_job(self, method, source, destination, is_file, config, filters, backends):
+        src_remote, src_type, src_path = source
+        dst_remote, dst_type, dst_path = destination
+        params = {"_config": config, "_filter": filters}
+        dst_fs = self._get_fs(dst_remote, dst_path, backends.get(dst_type, {}))
+        if is_file:
+            src_dir, src_name = (
+                src_path.rsplit("/", 1) if "/" in src_path else ("", src_path)
+            )
+            params.update(
+                srcFs=self._get_fs(src_remote, src_dir, backends.get(src_type, {})),
+                srcRemote=src_name,
+                dstFs=dst_fs,
+                dstRemote=self._listener.name,
+            )
+            return (
+                "operations/movefile" if method == "move" else "operations/copyfile"
+            ), params
+        params.update(
+            srcFs=self._get_fs(src_remote, src_path, backends.get(src_type, {})),
+            dstFs=dst_fs,
+        )
+        return f"sync/{method}", params
 
     @staticmethod
     async def _get_remote_options(config_path, remote):
-        config = RawConfigParser()
-        async with aiopen(config_path, "r") as f:
-            contents = await f.read()
-            config.read_string(contents)
-        options = config.options(remote)
-        return {opt: config.get(remote, opt) for opt in options}
+        config = await get_config(config_path)
+        if remote not in config:
+            raise NoSectionError(remote)
+        return config[remote]
 
     async def cancel_task(self):
         self._listener.is_cancelled = True
-        if self._proc is not None:
-            try:
-                self._proc.kill()
-            except:
-                pass
+        if self._job_id is not None:
+            await self._rcd.stop_job(self._job_id)
         if self._is_download:
             LOGGER.info(f"Cancelling Download: {self._listener.name}")
             await self._listener.on_download_error("Stopped by user!")
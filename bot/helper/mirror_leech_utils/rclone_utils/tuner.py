@@ -0,0 +1,175 @@
+from logging import getLogger
+from random import choice, random
+
+from ....core.config_manager import Config
+from ...ext_utils.db_handler import database
+
+LOGGER = getLogger(__name__)
+
+TRANSFERS = [1, 2, 4, 8, 16]
+CHECKERS = [4, 8, 16, 32]
+STREAMS = [2, 4, 8, 16]
+# first value is rclone's own default
+CHUNK_SIZES = {
+    "drive": ["8M", "32M", "64M", "128M", "256M"],
+    "s3": ["5M", "16M"],
+    "b2": ["96M", "192M"],
+    "dropbox": ["48M", "96M", "144M"],
+    "onedrive": ["10M", "50M", "100M"],
+}
+MAX_TRANSFERS = {"drive": 4}
+# transfers * chunk_size, upload chunks are buffered in memory
+MAX_BUFFER = 1024**3
+# errors that mean the profile itself was too aggressive for the remote
+THROTTLE_ERRORS = (
+    "RATE_LIMIT_EXCEEDED",
+    "rateLimitExceeded",
+    "TooManyRequests",
+    "SlowDown",
+    "429",
+)
+
+
+def _chunk_bytes(chunk):
+    return int(chunk[:-1]) * 1024**2
+
+
+def _step(values, value, up):
+    if up:
+        return next((v for v in values if v > value), None)
+    return next((v for v in reversed(values) if v < value), None)
+
+
+class RcloneTuner:
+    # chance of trying a neighbour of the best known profile
+    EXPLORE_RATE = 0.1
+    # runs smaller than this are dominated by listing and setup time
+    MIN_BYTES = 50 * 1024**2
+    MAX_ERRORS = 2
+    ALPHA = 0.3
+
+    def __init__(self):
+        self.stats = {}
+
+    @staticmethod
+    def _bucket(op, remote_type, files, size):
+        if files is None:
+            files = "?"
+        else:
+            files = next((b for b in (1, 10, 100) if files <= b), "many")
+        if not size:
+            size = "?"
+        else:
+            size = next(
+                (
+                    label
+                    for label, limit in (("100M", 100), ("1G", 1024), ("10G", 10240))
+                    if size < limit * 1024**2
+                ),
+                "big",
+            )
+        return f"{op}|{remote_type}|{files}|{size}"
+
+    @staticmethod
+    def _key(profile):
+        return "_".join(
+            str(profile[k]) for k in ("transfers", "checkers", "streams", "chunk_size")
+        )
+
+    @staticmethod
+    def _is_safe(remote_type, profile):
+        if profile["transfers"] > MAX_TRANSFERS.get(remote_type, TRANSFERS[-1]):
+            return False
+        if chunk := profile["chunk_size"]:
+            return profile["transfers"] * _chunk_bytes(chunk) <= MAX_BUFFER
+        return True
+
+    def _neighbours(self, remote_type, profile):
+        dims = {"transfers": TRANSFERS, "checkers": CHECKERS, "streams": STREAMS}
+        if profile["chunk_size"] in CHUNK_SIZES.get(remote_type, []):
+            dims["chunk_size"] = CHUNK_SIZES[remote_type]
+        for dim, values in dims.items():
+            for up in (True, False):
+                if dim == "chunk_size":
+                    index = values.index(profile[dim]) + (1 if up else -1)
+                    value = values[index] if 0 <= index < len(values) else None
+                else:
+                    value = _step(values, profile[dim], up)
+                if value is None:
+                    continue
+                neighbour = profile | {dim: value}
+                if self._is_safe(remote_type, neighbour):
+                    yield neighbour
+
+    def select(self, op, remote, remote_type, files, size, baseline):
+        profile = {
+            "transfers": 4,
+            "checkers": 8,
+            "streams": 4,
+            "chunk_size": (
+                CHUNK_SIZES[remote_type][0]
+                if op == "upload" and remote_type in CHUNK_SIZES
+                else None
+            ),
+        } | baseline
+        overrides = Config.RCLONE_TUNING.get(remote, {})
+        if not Config.RCLONE_AUTO_TUNE:
+            return None, profile | overrides
+        bucket = self._bucket(op, remote_type, files, size)
+        stats = self.stats.get(bucket, {})
+        usable = {
+            key: entry
+            for key, entry in stats.items()
+            if entry["runs"] and entry["errors"] < self.MAX_ERRORS
+        }
+        if usable:
+            profile = self._from_key(max(usable, key=lambda k: usable[k]["speed"]))
+        if random() < self.EXPLORE_RATE:
+            candidates = [
+                p
+                for p in self._neighbours(remote_type, profile)
+                if stats.get(self._key(p), {}).get("errors", 0) < self.MAX_ERRORS
+            ]
+            if candidates:
+                untried = [p for p in candidates if self._key(p) not in stats]
+                profile = choice(untried or candidates)
+                LOGGER.info(f"Trying rclone profile {self._key(profile)} for {bucket}")
+        return bucket, profile | overrides
+
+    @staticmethod
+    def _from_key(key):
+        transfers, checkers, streams, chunk = key.split("_")
+        return {
+            "transfers": int(transfers),
+            "checkers": int(checkers),
+            "streams": int(streams),
+            "chunk_size": None if chunk == "None" else chunk,
+        }
+
+    async def record(self, bucket, profile, size=0, elapsed=0, error=""):
+        if bucket is None:
+            return
+        if error:
+            if not any(e in error for e in THROTTLE_ERRORS):
+                return
+        elif size < self.MIN_BYTES or elapsed <= 0:
+            return
+        stats = self.stats.setdefault(bucket, {})
+        entry = stats.setdefault(
+            self._key(profile), {"speed": 0, "runs": 0, "errors": 0}
+        )
+        if error:
+            entry["errors"] += 1
+        else:
+            speed = size / elapsed
+            entry["speed"] = (
+                speed
+                if not entry["runs"]
+                else entry["speed"] * (1 - self.ALPHA) + speed * self.ALPHA
+            )
+            entry["runs"] += 1
+            entry["errors"] = 0
+        await database.update_rclone_tuning(bucket, stats)
+
+
+rclone_tuner = RcloneTuner()
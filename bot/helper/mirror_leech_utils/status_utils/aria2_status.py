@@ -107,6 +107,21 @@ class Aria2Status:
     def seeding_time(self):
         return get_readable_time(time() - self.start_time)
 
+    def seed_info(self):
+        if not self._download:
+            return None
+        return (
+            int(self._download.get("totalLength", "0")),
+            self.ratio(),
+            int(self._download.get("connections", "0")),
+            int(self._download.get("uploadSpeed", "0")),
+        )
+
+    async def set_seed_limit(self, limit):
+        await TorrentManager.aria2.changeOption(
+            self._gid, {"max-upload-limit": str(limit)}
+        )
+
     def task(self):
         return self
 
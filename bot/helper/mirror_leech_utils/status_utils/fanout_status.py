@@ -0,0 +1,54 @@
+from asyncio import gather
+
+from ...ext_utils.status_utils import MirrorStatus
+
+
+class FanoutStatus:
+    def __init__(self, listener, statuses, gid):
+        self.listener = listener
+        self._statuses = statuses
+        self._gid = gid
+
+    def _slowest(self):
+        def progress(status):
+            try:
+                return float(status.progress().strip("%"))
+            except:
+                return 0
+
+        return min(self._statuses, key=progress)
+
+    @property
+    def tool(self):
+        return self._slowest().tool
+
+    def gid(self):
+        return self._gid
+
+    def progress(self):
+        return self._slowest().progress()
+
+    def speed(self):
+        return self._slowest().speed()
+
+    def name(self):
+        return self.listener.name
+
+    def size(self):
+        return self._slowest().size()
+
+    def eta(self):
+        return self._slowest().eta()
+
+    def status(self):
+        return MirrorStatus.STATUS_UPLOAD
+
+    def processed_bytes(self):
+        return self._slowest().processed_bytes()
+
+    def task(self):
+        return self
+
+    async def cancel_task(self):
+        self.listener.is_cancelled = True
+        await gather(*(status.task().cancel_task() for status in self._statuses))
@@ -84,6 +84,21 @@ class QbittorrentStatus:
     def seeding_time(self):
         return get_readable_time(int(self._info.seeding_time.total_seconds()))
 
+    def seed_info(self):
+        if self._info is None:
+            return None
+        return (
+            self._info.size,
+            self._info.ratio,
+            self._info.num_leechs,
+            self._info.upspeed,
+        )
+
+    async def set_seed_limit(self, limit):
+        await TorrentManager.qbittorrent.torrents.set_upload_limit(
+            [self._info.hash], limit
+        )
+
     def task(self):
         return self
 
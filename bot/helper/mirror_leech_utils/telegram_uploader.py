@@ -1,6 +1,5 @@
-from PIL import Image
 from aioshutil import rmtree
-from asyncio import sleep
+from asyncio import gather
 from logging import getLogger
 from natsort import natsorted
 from os import walk, path as ospath
@@ -11,6 +10,8 @@ from aiofiles.os import (
     remove,
     path as aiopath,
     rename,
+    link,
+    makedirs,
 )
 from pyrogram.types import (
     InputMediaVideo,
@@ -25,14 +26,22 @@ from tenacity import (
     RetryError,
 )
 
+from ... import bot_loop
 from ...core.config_manager import Config
 from ...core.mltb_client import TgClient
 from ..ext_utils.bot_utils import sync_to_async
-from ..ext_utils.files_utils import is_archive, get_base_name
-from ..telegram_helper.message_utils import delete_message
+from ..ext_utils.db_handler import database
+from ..ext_utils.files_utils import (
+    is_archive,
+    get_base_name,
+    get_file_fingerprint,
+)
+from ..telegram_helper.message_utils import delete_message, get_message
+from ..telegram_helper.rate_limiter import tg_governor
 from ..ext_utils.media_utils import (
     get_media_info,
     get_document_type,
+    get_image_size,
     get_video_thumbnail,
     get_audio_thumbnail,
     get_multiple_frames_thumbnail,
@@ -61,7 +70,11 @@ class TelegramUploader:
         self._is_private = False
         self._sent_msg = None
         self._user_session = self._listener.user_transmission
+        self._links_dir = f"{path}.links"
+        self._is_link = False
         self._error = ""
+        self._prefetched = {}
+        self._fingerprint = ""
 
     async def _upload_progress(self, current, _):
         if self._listener.is_cancelled:
@@ -116,8 +129,8 @@ class TelegramUploader:
                 await self._listener.on_upload_error(str(e))
                 return False
         elif self._user_session:
-            self._sent_msg = await TgClient.user.get_messages(
-                chat_id=self._listener.message.chat.id, message_ids=self._listener.mid
+            self._sent_msg = await get_message(
+                TgClient.user, self._listener.message.chat.id, self._listener.mid
             )
             if self._sent_msg is None:
                 self._sent_msg = await TgClient.user.send_message(
@@ -130,13 +143,23 @@ class TelegramUploader:
             self._sent_msg = self._listener.message
         return True
 
+    async def _rename_up_path(self, name):
+        # other uploaders may still be reading the original file
+        if self._listener.keep_source and not self._is_link:
+            await makedirs(self._links_dir, exist_ok=True)
+            new_path = ospath.join(self._links_dir, name)
+            await link(self._up_path, new_path)
+            self._is_link = True
+        else:
+            new_path = ospath.join(ospath.dirname(self._up_path), name)
+            await rename(self._up_path, new_path)
+        self._up_path = new_path
+
     async def _prepare_file(self, file_, dirpath):
         if self._lprefix:
             cap_mono = f"{self._lprefix} <code>{file_}</code>"
             self._lprefix = re_sub("<.*?>", "", self._lprefix)
-            new_path = ospath.join(dirpath, f"{self._lprefix} {file_}")
-            await rename(self._up_path, new_path)
-            self._up_path = new_path
+            await self._rename_up_path(f"{self._lprefix} {file_}")
         else:
             cap_mono = f"<code>{file_}</code>"
         if len(file_) > 60:
@@ -155,9 +178,7 @@ class TelegramUploader:
             extn = len(ext)
             remain = 60 - extn
             name = name[:remain]
-            new_path = ospath.join(dirpath, f"{name}{ext}")
-            await rename(self._up_path, new_path)
-            self._up_path = new_path
+            await self._rename_up_path(f"{name}{ext}")
         return cap_mono
 
     def _get_input_media(self, subkey, key):
@@ -182,7 +203,10 @@ class TelegramUploader:
         for i in range(0, len(inputs), 10):
             batch = inputs[i : i + 10]
             self._sent_msg = (
-                await self._sent_msg.reply_media_group(
+                await tg_governor.call(
+                    tg_governor.UPLOAD,
+                    self._sent_msg.chat.id,
+                    self._sent_msg.reply_media_group,
                     media=batch,
                     quote=True,
                     disable_notification=True,
@@ -190,16 +214,16 @@ class TelegramUploader:
             )[-1]
 
     async def _send_media_group(self, subkey, key, msgs):
-        for index, msg in enumerate(msgs):
-            if self._listener.hybrid_leech or not self._user_session:
-                msgs[index] = await self._listener.client.get_messages(
-                    chat_id=msg[0], message_ids=msg[1]
-                )
-            else:
-                msgs[index] = await TgClient.user.get_messages(
-                    chat_id=msg[0], message_ids=msg[1]
-                )
-        msgs_list = await msgs[0].reply_to_message.reply_media_group(
+        client = (
+            self._listener.client
+            if self._listener.hybrid_leech or not self._user_session
+            else TgClient.user
+        )
+        msgs[:] = await gather(*[get_message(client, msg[0], msg[1]) for msg in msgs])
+        msgs_list = await tg_governor.call(
+            tg_governor.UPLOAD,
+            msgs[0].chat.id,
+            msgs[0].reply_to_message.reply_media_group,
             media=self._get_input_media(subkey, key),
             quote=True,
             disable_notification=True,
@@ -207,7 +231,7 @@ class TelegramUploader:
         for msg in msgs:
             if msg.link in self._msgs_dict:
                 del self._msgs_dict[msg.link]
-            await delete_message(msg)
+        await gather(*[delete_message(msg, tg_governor.UPLOAD) for msg in msgs])
         del self._media_dict[key][subkey]
         if self._listener.is_super_chat or self._listener.up_dest:
             for m in msgs_list:
@@ -219,15 +243,54 @@ class TelegramUploader:
         res = await self._msg_to_reply()
         if not res:
             return
+        try:
+            await self._upload_files()
+        finally:
+            # links only exist for fan-out legs, cancelled ones included
+            if self._listener.keep_source:
+                await rmtree(self._links_dir, ignore_errors=True)
+        if self._listener.is_cancelled:
+            return
+        for key, value in list(self._media_dict.items()):
+            for subkey, msgs in list(value.items()):
+                if len(msgs) > 1:
+                    try:
+                        await self._send_media_group(subkey, key, msgs)
+                    except Exception as e:
+                        LOGGER.info(
+                            f"While sending media group at the end of task. Error: {e}"
+                        )
+        if self._listener.is_cancelled:
+            return
+        if self._total_files == 0:
+            await self._listener.on_upload_error(
+                "No files to upload. In case you have filled EXCLUDED_EXTENSIONS, then check if all files have those extensions or not."
+            )
+            return
+        if self._total_files <= self._corrupted:
+            await self._listener.on_upload_error(
+                f"Files Corrupted or unable to upload. {self._error or 'Check logs!'}"
+            )
+            return
+        LOGGER.info(f"Leech Completed: {self._listener.name}")
+        await self._listener.on_upload_complete(
+            None, self._msgs_dict, self._total_files, self._corrupted
+        )
+        return
+
+    async def _upload_files(self):
         for dirpath, _, files in natsorted(await sync_to_async(walk, self._path)):
             if dirpath.strip().endswith("/yt-dlp-thumb"):
                 continue
             if dirpath.strip().endswith("_mltbss"):
                 await self._send_screenshots(dirpath, files)
-                await rmtree(dirpath, ignore_errors=True)
+                if not self._listener.keep_source:
+                    await rmtree(dirpath, ignore_errors=True)
                 continue
-            for file_ in natsorted(files):
+            files = natsorted(files)
+            for index, file_ in enumerate(files):
                 self._error = ""
+                self._is_link = False
                 self._up_path = f_path = ospath.join(dirpath, file_)
                 if not await aiopath.exists(self._up_path):
                     LOGGER.error(f"{self._up_path} not exists! Continue uploading!")
@@ -256,18 +319,19 @@ class TelegramUploader:
                                         await self._send_media_group(subkey, key, msgs)
                     if self._listener.hybrid_leech and self._listener.user_transmission:
                         self._user_session = f_size > 2097152000
-                        if self._user_session:
-                            self._sent_msg = await TgClient.user.get_messages(
-                                chat_id=self._sent_msg.chat.id,
-                                message_ids=self._sent_msg.id,
-                            )
-                        else:
-                            self._sent_msg = await self._listener.client.get_messages(
-                                chat_id=self._sent_msg.chat.id,
-                                message_ids=self._sent_msg.id,
-                            )
+                        self._sent_msg = await get_message(
+                            (
+                                TgClient.user
+                                if self._user_session
+                                else self._listener.client
+                            ),
+                            self._sent_msg.chat.id,
+                            self._sent_msg.id,
+                        )
                     self._last_msg_in_group = False
                     self._last_uploaded = 0
+                    self._prefetch_files(dirpath, files[index + 1 :])
+                    self._fingerprint = await self._get_fingerprint()
                     await self._upload_file(cap_mono, file_, f_path)
                     if self._listener.is_cancelled:
                         return
@@ -277,7 +341,6 @@ class TelegramUploader:
                         and not self._is_private
                     ):
                         self._msgs_dict[self._sent_msg.link] = file_
-                    await sleep(1)
                 except Exception as err:
                     if isinstance(err, RetryError):
                         LOGGER.info(
@@ -289,36 +352,159 @@ class TelegramUploader:
                     self._corrupted += 1
                     if self._listener.is_cancelled:
                         return
-                if not self._listener.is_cancelled and await aiopath.exists(
-                    self._up_path
+                if (
+                    not self._listener.is_cancelled
+                    and (not self._listener.keep_source or self._is_link)
+                    and await aiopath.exists(self._up_path)
                 ):
                     await remove(self._up_path)
-        for key, value in list(self._media_dict.items()):
-            for subkey, msgs in list(value.items()):
-                if len(msgs) > 1:
-                    try:
-                        await self._send_media_group(subkey, key, msgs)
-                    except Exception as e:
-                        LOGGER.info(
-                            f"While sending media group at the end of task. Error: {e}"
-                        )
-        if self._listener.is_cancelled:
-            return
-        if self._total_files == 0:
-            await self._listener.on_upload_error(
-                "No files to upload. In case you have filled EXCLUDED_EXTENSIONS, then check if all files have those extensions or not."
+            await self._clear_prefetched()
+
+    def _prefetch_files(self, dirpath, files):
+        for file_ in files[: Config.LEECH_PREFETCH_FILES]:
+            f_path = ospath.join(dirpath, file_)
+            if f_path not in self._prefetched:
+                self._prefetched[f_path] = bot_loop.create_task(
+                    self._prefetch_media(f_path, file_)
+                )
+
+    async def _prefetch_media(self, f_path, file_):
+        try:
+            if not await aiopath.exists(f_path) or not await aiopath.getsize(f_path):
+                return None
+            return await self._prepare_media(f_path, file_)
+        except Exception as e:
+            LOGGER.error(f"Prefetch media: {e}. Path: {f_path}")
+            return None
+
+    async def _get_media(self, o_path, file_, force_document):
+        media = None
+        if task := self._prefetched.pop(o_path, None):
+            media = await task
+            if media is not None and force_document and media["key"] != "documents":
+                await self._remove_thumb(media["thumb"])
+                media = None
+        if media is None:
+            media = await self._prepare_media(self._up_path, file_, force_document)
+        return media
+
+    async def _remove_thumb(self, thumb):
+        if self._thumb is None and thumb is not None and await aiopath.exists(thumb):
+            await remove(thumb)
+
+    async def _discard_prefetched(self, task):
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled() and (media := task.result()):
+            await self._remove_thumb(media["thumb"])
+
+    async def _clear_prefetched(self):
+        for task in self._prefetched.values():
+            await self._discard_prefetched(task)
+        self._prefetched.clear()
+
+    async def _get_fingerprint(self):
+        # Cached media keeps its original thumbnail, so skip it for custom ones
+        if not Config.LEECH_DEDUPE or not Config.DATABASE_URL or self._thumb:
+            return ""
+        fingerprint = await sync_to_async(get_file_fingerprint, self._up_path)
+        # file_id resends keep the first upload's name, so renames need their own entry
+        return f"{fingerprint}_{ospath.basename(self._up_path)}"
+
+    async def _send_cached(self, key, cap_mono):
+        if not self._fingerprint:
+            return False
+        session = "user" if self._user_session else "bot"
+        cached = await database.get_leech_file(self._fingerprint, key, session)
+        if not cached:
+            return False
+        try:
+            self._sent_msg = await tg_governor.call(
+                tg_governor.UPLOAD,
+                self._sent_msg.chat.id,
+                self._sent_msg.reply_cached_media,
+                file_id=cached["file_id"],
+                quote=True,
+                caption=cap_mono,
+                disable_notification=True,
             )
+        except (FloodWait, FloodPremiumWait):
+            raise
+        except Exception as e:
+            LOGGER.error(f"Cached media: {e}. Uploading {self._up_path}")
+            await database.rm_leech_file(self._fingerprint, key)
+            return False
+        LOGGER.info(f"Reused previously uploaded file: {self._up_path}")
+        return True
+
+    async def _save_cached(self, cache_key, key):
+        if not self._fingerprint or self._listener.is_cancelled:
             return
-        if self._total_files <= self._corrupted:
-            await self._listener.on_upload_error(
-                f"Files Corrupted or unable to upload. {self._error or 'Check logs!'}"
+        if media := getattr(self._sent_msg, key[:-1], None):
+            session = "user" if self._user_session else "bot"
+            await database.add_leech_file(
+                self._fingerprint, cache_key, session, self._sent_msg, media.file_id
             )
-            return
-        LOGGER.info(f"Leech Completed: {self._listener.name}")
-        await self._listener.on_upload_complete(
-            None, self._msgs_dict, self._total_files, self._corrupted
-        )
-        return
+
+    async def _prepare_media(self, path, file_, force_document=False):
+        if (
+            self._thumb is not None
+            and not await aiopath.exists(self._thumb)
+            and self._thumb != "none"
+        ):
+            self._thumb = None
+        thumb = self._thumb
+        media = {
+            "key": "photos",
+            "thumb": thumb,
+            "duration": 0,
+            "width": 480,
+            "height": 320,
+            "artist": None,
+            "title": None,
+        }
+        is_video, is_audio, is_image = await get_document_type(path)
+
+        if not is_image and thumb is None:
+            file_name = ospath.splitext(file_)[0]
+            thumb_path = f"{self._path}/yt-dlp-thumb/{file_name}.jpg"
+            if await aiopath.isfile(thumb_path):
+                thumb = thumb_path
+            elif is_audio and not is_video:
+                thumb = await get_audio_thumbnail(path)
+
+        if (
+            self._listener.as_doc
+            or force_document
+            or (not is_video and not is_audio and not is_image)
+        ):
+            media["key"] = "documents"
+            if is_video and thumb is None:
+                thumb = await get_video_thumbnail(path, None)
+        elif is_video:
+            media["key"] = "videos"
+            media["duration"] = (await get_media_info(path))[0]
+            if thumb is None and self._listener.thumbnail_layout:
+                thumb = await get_multiple_frames_thumbnail(
+                    path,
+                    self._listener.thumbnail_layout,
+                    self._listener.screen_shots,
+                )
+            if thumb is None:
+                thumb = await get_video_thumbnail(path, media["duration"])
+            if thumb is not None and thumb != "none":
+                media["width"], media["height"] = await sync_to_async(
+                    get_image_size, thumb
+                )
+        elif is_audio:
+            media["key"] = "audios"
+            (
+                media["duration"],
+                media["artist"],
+                media["title"],
+            ) = await get_media_info(path)
+        media["thumb"] = thumb
+        return media
 
     @retry(
         wait=wait_exponential(multiplier=2, min=4, max=8),
@@ -332,103 +518,80 @@ class TelegramUploader:
             and self._thumb != "none"
         ):
             self._thumb = None
-        thumb = self._thumb
+        thumb = None
+        key = "documents" if force_document else ""
         self._is_corrupted = False
         try:
-            is_video, is_audio, is_image = await get_document_type(self._up_path)
-
-            if not is_image and thumb is None:
-                file_name = ospath.splitext(file)[0]
-                thumb_path = f"{self._path}/yt-dlp-thumb/{file_name}.jpg"
-                if await aiopath.isfile(thumb_path):
-                    thumb = thumb_path
-                elif is_audio and not is_video:
-                    thumb = await get_audio_thumbnail(self._up_path)
-
-            if (
-                self._listener.as_doc
-                or force_document
-                or (not is_video and not is_audio and not is_image)
-            ):
-                key = "documents"
-                if is_video and thumb is None:
-                    thumb = await get_video_thumbnail(self._up_path, None)
-
+            # the media type only depends on the content and on sending as document
+            cache_key = (
+                "documents" if force_document or self._listener.as_doc else "media"
+            )
+            if await self._send_cached(cache_key, cap_mono):
+                self._processed_bytes += await aiopath.getsize(self._up_path)
+                if task := self._prefetched.pop(o_path, None):
+                    await self._discard_prefetched(task)
+            else:
+                media = await self._get_media(o_path, file, force_document)
+                key = media["key"]
+                thumb = media["thumb"]
                 if self._listener.is_cancelled:
                     return
-                if thumb == "none":
-                    thumb = None
-                self._sent_msg = await self._sent_msg.reply_document(
-                    document=self._up_path,
-                    quote=True,
-                    thumb=thumb,
-                    caption=cap_mono,
-                    force_document=True,
-                    disable_notification=True,
-                    progress=self._upload_progress,
-                )
-            elif is_video:
-                key = "videos"
-                duration = (await get_media_info(self._up_path))[0]
-                if thumb is None and self._listener.thumbnail_layout:
-                    thumb = await get_multiple_frames_thumbnail(
-                        self._up_path,
-                        self._listener.thumbnail_layout,
-                        self._listener.screen_shots,
+                if key == "documents":
+                    self._sent_msg = await tg_governor.call(
+                        tg_governor.UPLOAD,
+                        self._sent_msg.chat.id,
+                        self._sent_msg.reply_document,
+                        document=self._up_path,
+                        quote=True,
+                        thumb=None if thumb == "none" else thumb,
+                        caption=cap_mono,
+                        force_document=True,
+                        disable_notification=True,
+                        progress=self._upload_progress,
+                    )
+                elif key == "videos":
+                    self._sent_msg = await tg_governor.call(
+                        tg_governor.UPLOAD,
+                        self._sent_msg.chat.id,
+                        self._sent_msg.reply_video,
+                        video=self._up_path,
+                        quote=True,
+                        caption=cap_mono,
+                        duration=media["duration"],
+                        width=media["width"],
+                        height=media["height"],
+                        thumb=None if thumb == "none" else thumb,
+                        supports_streaming=True,
+                        disable_notification=True,
+                        progress=self._upload_progress,
+                    )
+                elif key == "audios":
+                    self._sent_msg = await tg_governor.call(
+                        tg_governor.UPLOAD,
+                        self._sent_msg.chat.id,
+                        self._sent_msg.reply_audio,
+                        audio=self._up_path,
+                        quote=True,
+                        caption=cap_mono,
+                        duration=media["duration"],
+                        performer=media["artist"],
+                        title=media["title"],
+                        thumb=None if thumb == "none" else thumb,
+                        disable_notification=True,
+                        progress=self._upload_progress,
                     )
-                if thumb is None:
-                    thumb = await get_video_thumbnail(self._up_path, duration)
-                if thumb is not None and thumb != "none":
-                    with Image.open(thumb) as img:
-                        width, height = img.size
                 else:
-                    width = 480
-                    height = 320
-                if self._listener.is_cancelled:
-                    return
-                if thumb == "none":
-                    thumb = None
-                self._sent_msg = await self._sent_msg.reply_video(
-                    video=self._up_path,
-                    quote=True,
-                    caption=cap_mono,
-                    duration=duration,
-                    width=width,
-                    height=height,
-                    thumb=thumb,
-                    supports_streaming=True,
-                    disable_notification=True,
-                    progress=self._upload_progress,
-                )
-            elif is_audio:
-                key = "audios"
-                duration, artist, title = await get_media_info(self._up_path)
-                if self._listener.is_cancelled:
-                    return
-                if thumb == "none":
-                    thumb = None
-                self._sent_msg = await self._sent_msg.reply_audio(
-                    audio=self._up_path,
-                    quote=True,
-                    caption=cap_mono,
-                    duration=duration,
-                    performer=artist,
-                    title=title,
-                    thumb=thumb,
-                    disable_notification=True,
-                    progress=self._upload_progress,
-                )
-            else:
-                key = "photos"
-                if self._listener.is_cancelled:
-                    return
-                self._sent_msg = await self._sent_msg.reply_photo(
-                    photo=self._up_path,
-                    quote=True,
-                    caption=cap_mono,
-                    disable_notification=True,
-                    progress=self._upload_progress,
-                )
+                    self._sent_msg = await tg_governor.call(
+                        tg_governor.UPLOAD,
+                        self._sent_msg.chat.id,
+                        self._sent_msg.reply_photo,
+                        photo=self._up_path,
+                        quote=True,
+                        caption=cap_mono,
+                        disable_notification=True,
+                        progress=self._upload_progress,
+                    )
+                await self._save_cached(cache_key, key)
 
             if (
                 not self._listener.is_cancelled
@@ -452,29 +615,12 @@ class TelegramUploader:
                     else:
                         self._last_msg_in_group = True
 
-            if (
-                self._thumb is None
-                and thumb is not None
-                and await aiopath.exists(thumb)
-            ):
-                await remove(thumb)
-        except (FloodWait, FloodPremiumWait) as f:
-            LOGGER.warning(str(f))
-            await sleep(f.value * 1.3)
-            if (
-                self._thumb is None
-                and thumb is not None
-                and await aiopath.exists(thumb)
-            ):
-                await remove(thumb)
+            await self._remove_thumb(thumb)
+        except (FloodWait, FloodPremiumWait):
+            await self._remove_thumb(thumb)
             return await self._upload_file(cap_mono, file, o_path)
         except Exception as err:
-            if (
-                self._thumb is None
-                and thumb is not None
-                and await aiopath.exists(thumb)
-            ):
-                await remove(thumb)
+            await self._remove_thumb(thumb)
             err_type = "RPCError: " if isinstance(err, RPCError) else ""
             LOGGER.error(f"{err_type}{err}. Path: {self._up_path}")
             if isinstance(err, BadRequest) and key != "documents":
@@ -482,6 +628,54 @@ class TelegramUploader:
                 return await self._upload_file(cap_mono, file, o_path, True)
             raise err
 
+    async def copy_message(self, message, session):
+        await self._user_settings()
+        if (
+            self._lprefix
+            or self._thumb
+            or (session == "user") != bool(self._user_session)
+        ):
+            return False
+        media = (
+            message.document
+            or message.photo
+            or message.video
+            or message.audio
+            or message.voice
+            or message.video_note
+            or message.sticker
+            or message.animation
+        )
+        name = getattr(media, "file_name", None) or media.file_unique_id
+        name = name.rsplit("/", 1)[-1]
+        if not await self._msg_to_reply():
+            return True
+        try:
+            self._sent_msg = await tg_governor.call(
+                tg_governor.UPLOAD,
+                self._sent_msg.chat.id,
+                message.copy,
+                chat_id=self._sent_msg.chat.id,
+                caption=f"<code>{name}</code>",
+                reply_to_message_id=self._sent_msg.id,
+                disable_notification=True,
+            )
+        except Exception as e:
+            LOGGER.error(f"Copy message: {e}. Downloading {name} instead")
+            if self._listener.up_dest:
+                await delete_message(self._sent_msg)
+            return False
+        if (
+            self._listener.is_super_chat or self._listener.up_dest
+        ) and not self._is_private:
+            self._msgs_dict[self._sent_msg.link] = name
+        self._listener.name = name
+        self._listener.size = media.file_size
+        self._processed_bytes = media.file_size
+        LOGGER.info(f"Leech Copied: {name}")
+        await self._listener.on_upload_complete(None, self._msgs_dict, 1, 0)
+        return True
+
     @property
     def speed(self):
         try:
@@ -496,4 +690,5 @@ class TelegramUploader:
     async def cancel_task(self):
         self._listener.is_cancelled = True
         LOGGER.info(f"Cancelling Upload: {self._listener.name}")
+        await self._clear_prefetched()
         await self._listener.on_upload_error("your upload has been stopped!")
@@ -3,17 +3,93 @@ from pyrogram.errors import FloodWait, FloodPremiumWait
 from re import match as re_match
 from time import time
 
-from ... import LOGGER, status_dict, task_dict_lock, intervals, DOWNLOAD_DIR
+from ... import (
+    LOGGER,
+    status_dict,
+    task_dict_lock,
+    intervals,
+    DOWNLOAD_DIR,
+    bot_loop,
+)
 from ...core.config_manager import Config
 from ...core.mltb_client import TgClient
 from ..ext_utils.bot_utils import SetInterval
 from ..ext_utils.exceptions import TgLinkException
 from ..ext_utils.status_utils import get_readable_message
+from .rate_limiter import tg_governor
 
 
-async def send_message(message, text, buttons=None, block=True):
+class MessageBatcher:
+    def __init__(self, window=0.1, limit=200):
+        self._window = window
+        self._limit = limit
+        self._pending = {}
+
+    def add(self, action, client, chat_id, message_id, priority):
+        key = (action, client, chat_id)
+        if (batch := self._pending.get(key)) is None:
+            batch = self._pending[key] = {"futures": {}, "priority": priority}
+            bot_loop.call_later(
+                self._window, lambda: bot_loop.create_task(self._flush(key, batch))
+            )
+        batch["priority"] = min(batch["priority"], priority)
+        if (future := batch["futures"].get(message_id)) is None:
+            future = batch["futures"][message_id] = bot_loop.create_future()
+        if len(batch["futures"]) >= self._limit:
+            bot_loop.create_task(self._flush(key, batch))
+        return future
+
+    async def _flush(self, key, batch):
+        if self._pending.get(key) is not batch:
+            return
+        del self._pending[key]
+        action, client, chat_id = key
+        ids = list(batch["futures"])
+        try:
+            if action == "get":
+                result = await tg_governor.call(
+                    batch["priority"],
+                    chat_id,
+                    client.get_messages,
+                    chat_id=chat_id,
+                    message_ids=ids,
+                )
+            else:
+                await tg_governor.call(
+                    batch["priority"],
+                    chat_id,
+                    client.delete_messages,
+                    chat_id=chat_id,
+                    message_ids=ids,
+                )
+                result = [None] * len(ids)
+        except Exception as e:
+            for future in batch["futures"].values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for message_id, message in zip(ids, result):
+            if not (future := batch["futures"][message_id]).done():
+                future.set_result(message)
+
+
+message_batcher = MessageBatcher()
+
+
+async def get_message(client, chat_id, message_id):
+    return await message_batcher.add(
+        "get", client, chat_id, message_id, tg_governor.REPLY
+    )
+
+
+async def send_message(
+    message, text, buttons=None, block=True, priority=tg_governor.REPLY
+):
     try:
-        return await message.reply(
+        return await tg_governor.call(
+            priority,
+            message.chat.id,
+            message.reply,
             text=text,
             quote=True,
             disable_web_page_preview=True,
@@ -21,29 +97,35 @@ async def send_message(message, text, buttons=None, block=True):
             reply_markup=buttons,
         )
     except FloodWait as f:
-        LOGGER.warning(str(f))
         if not block:
             return str(f)
-        await sleep(f.value * 1.2)
-        return await send_message(message, text, buttons)
+        return await send_message(message, text, buttons, priority=priority)
     except Exception as e:
         LOGGER.error(str(e))
         return str(e)
 
 
-async def edit_message(message, text, buttons=None, block=True):
+async def edit_message(
+    message, text, buttons=None, block=True, priority=tg_governor.REPLY
+):
     try:
-        return await message.edit(
+        return await tg_governor.call(
+            priority,
+            message.chat.id,
+            message.edit,
             text=text,
             disable_web_page_preview=True,
             reply_markup=buttons,
+            coalesce_key=(
+                (message.chat.id, message.id)
+                if priority == tg_governor.STATUS
+                else None
+            ),
         )
     except FloodWait as f:
-        LOGGER.warning(str(f))
         if not block:
             return str(f)
-        await sleep(f.value * 1.2)
-        return await edit_message(message, text, buttons)
+        return await edit_message(message, text, buttons, priority=priority)
     except Exception as e:
         LOGGER.error(str(e))
         return str(e)
@@ -51,12 +133,16 @@ async def edit_message(message, text, buttons=None, block=True):
 
 async def send_file(message, file, caption=""):
     try:
-        return await message.reply_document(
-            document=file, quote=True, caption=caption, disable_notification=True
+        return await tg_governor.call(
+            tg_governor.UPLOAD,
+            message.chat.id,
+            message.reply_document,
+            document=file,
+            quote=True,
+            caption=caption,
+            disable_notification=True,
         )
-    except FloodWait as f:
-        LOGGER.warning(str(f))
-        await sleep(f.value * 1.2)
+    except FloodWait:
         return await send_file(message, file, caption)
     except Exception as e:
         LOGGER.error(str(e))
@@ -66,25 +152,28 @@ async def send_file(message, file, caption=""):
 async def send_rss(text, chat_id, thread_id):
     try:
         app = TgClient.user or TgClient.bot
-        return await app.send_message(
+        return await tg_governor.call(
+            tg_governor.RSS,
+            chat_id,
+            app.send_message,
             chat_id=chat_id,
             text=text,
             disable_web_page_preview=True,
             message_thread_id=thread_id,
             disable_notification=True,
         )
-    except (FloodWait, FloodPremiumWait) as f:
-        LOGGER.warning(str(f))
-        await sleep(f.value * 1.2)
-        return await send_rss(text)
+    except (FloodWait, FloodPremiumWait):
+        return await send_rss(text, chat_id, thread_id)
     except Exception as e:
         LOGGER.error(str(e))
         return str(e)
 
 
-async def delete_message(message):
+async def delete_message(message, priority=tg_governor.REPLY):
     try:
-        await message.delete()
+        await message_batcher.add(
+            "delete", message._client, message.chat.id, message.id, priority
+        )
     except Exception as e:
         LOGGER.error(str(e))
 
@@ -150,7 +239,7 @@ async def get_tg_link_message(link):
 
     if not private:
         try:
-            message = await TgClient.bot.get_messages(chat_id=chat, message_ids=msg_id)
+            message = await get_message(TgClient.bot, chat, msg_id)
             if message.empty:
                 private = True
         except Exception as e:
@@ -162,9 +251,7 @@ async def get_tg_link_message(link):
         return (links, "bot") if links else (message, "bot")
     elif TgClient.user:
         try:
-            user_message = await TgClient.user.get_messages(
-                chat_id=chat, message_ids=msg_id
-            )
+            user_message = await get_message(TgClient.user, chat, msg_id)
         except Exception as e:
             raise TgLinkException(
                 f"You don't have access to this chat!. ERROR: {e}"
@@ -207,8 +294,14 @@ async def update_status_message(sid, force=False):
             return
         if text != status_dict[sid]["message"].text:
             message = await edit_message(
-                status_dict[sid]["message"], text, buttons, block=False
+                status_dict[sid]["message"],
+                text,
+                buttons,
+                block=False,
+                priority=tg_governor.STATUS,
             )
+            if message is None:
+                return
             if isinstance(message, str):
                 if message.startswith("Telegram says: [40"):
                     del status_dict[sid]
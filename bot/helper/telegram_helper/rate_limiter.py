@@ -0,0 +1,125 @@
+from asyncio import sleep
+from pyrogram.errors import FloodWait, FloodPremiumWait
+from time import monotonic
+
+from ... import LOGGER
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity, min_rate):
+        self.rate = self.max_rate = rate
+        self.min_rate = min_rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.blocked_until = 0
+        self._updated = monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def wait_time(self, now, need=1):
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= need:
+            return 0
+        return (need - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def penalize(self, now, seconds):
+        self._refill(now)
+        self.tokens = 0
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.rate = max(self.min_rate, self.rate / 2)
+
+    def reward(self):
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.min_rate)
+
+    def is_idle(self, now):
+        return now >= self.blocked_until and self.wait_time(now, self.capacity) == 0
+
+
+class RateGovernor:
+    UPLOAD = 0
+    REPLY = 1
+    RSS = 2
+    STATUS = 3
+
+    # Status edits run under task_dict_lock, so they are dropped instead of
+    # waiting longer than this and the next interval retries them
+    SHED_WAIT = 1
+
+    def __init__(self, global_rate=25, chat_rate=1, chat_capacity=3):
+        self._global = TokenBucket(global_rate, global_rate, 1)
+        self._chat_rate = chat_rate
+        self._chat_capacity = chat_capacity
+        self._chats = {}
+        self._latest = {}
+
+    def _chat(self, chat_id):
+        if (bucket := self._chats.get(chat_id)) is None:
+            if len(self._chats) > 1000:
+                now = monotonic()
+                for key, value in list(self._chats.items()):
+                    if value.is_idle(now):
+                        del self._chats[key]
+            bucket = self._chats[chat_id] = TokenBucket(
+                self._chat_rate, self._chat_capacity, 1 / 60
+            )
+        return bucket
+
+    async def _acquire(self, priority, chat_id, coalesce_key, token):
+        chat = None if chat_id is None else self._chat(chat_id)
+        while True:
+            if coalesce_key is not None and self._latest.get(coalesce_key) is not token:
+                return False
+            now = monotonic()
+            # Lower classes keep a reserve of global tokens for the higher ones
+            wait = self._global.wait_time(now, 1 + priority)
+            if chat is not None:
+                wait = max(wait, chat.wait_time(now))
+            if wait == 0:
+                self._global.consume()
+                if chat is not None:
+                    chat.consume()
+                return True
+            if priority == self.STATUS and wait > self.SHED_WAIT:
+                return False
+            await sleep(min(wait, 1))
+
+    def on_flood(self, chat_id, seconds):
+        now = monotonic()
+        if chat_id is None:
+            self._global.penalize(now, seconds)
+        else:
+            self._chat(chat_id).penalize(now, seconds)
+
+    async def call(self, priority, chat_id, func, *args, coalesce_key=None, **kwargs):
+        token = object()
+        if coalesce_key is not None:
+            self._latest[coalesce_key] = token
+        try:
+            if not await self._acquire(priority, chat_id, coalesce_key, token):
+                return None
+            try:
+                result = await func(*args, **kwargs)
+            except (FloodWait, FloodPremiumWait) as f:
+                LOGGER.warning(f"Chat: {chat_id}. {f}")
+                self.on_flood(chat_id, f.value)
+                raise
+            self._global.reward()
+            if chat_id is not None:
+                self._chat(chat_id).reward()
+            return result
+        finally:
+            if coalesce_key is not None and self._latest.get(coalesce_key) is token:
+                del self._latest[coalesce_key]
+
+
+tg_governor = RateGovernor()
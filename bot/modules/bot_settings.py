@@ -58,6 +58,10 @@ state = "view"
 handler_dict = {}
 DEFAULT_VALUES = {
     "LEECH_SPLIT_SIZE": TgClient.MAX_SPLIT_SIZE,
+    "LEECH_PREFETCH_FILES": 2,
+    "GDRIVE_UPLOAD_WORKERS": 4,
+    "GDRIVE_DOWNLOAD_WORKERS": 4,
+    "GDRIVE_CLONE_WORKERS": 10,
     "RSS_DELAY": 600,
     "STATUS_UPDATE_INTERVAL": 15,
     "SEARCH_LIMIT": 0,
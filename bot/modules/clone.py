@@ -1,12 +1,9 @@
-from asyncio import gather
-from json import loads
 from secrets import token_urlsafe
 from aiofiles.os import remove
 
 from .. import LOGGER, task_dict, task_dict_lock, bot_loop
 from ..helper.ext_utils.bot_utils import (
     sync_to_async,
-    cmd_exec,
     arg_parser,
     COMMAND_USAGE,
 )
@@ -24,6 +21,7 @@ from ..helper.mirror_leech_utils.download_utils.direct_link_generator import (
 )
 from ..helper.mirror_leech_utils.gdrive_utils.clone import GoogleDriveClone
 from ..helper.mirror_leech_utils.gdrive_utils.count import GoogleDriveCount
+from ..helper.mirror_leech_utils.rclone_utils.rcd import RcloneError, get_rcd
 from ..helper.mirror_leech_utils.rclone_utils.transfer import RcloneTransferHelper
 from ..helper.mirror_leech_utils.status_utils.gdrive_status import GoogleDriveStatus
 from ..helper.mirror_leech_utils.status_utils.rclone_status import RcloneStatus
@@ -132,8 +130,9 @@ class Clone(TaskListener):
                     await send_message(self.message, str(e))
                     return
         if is_gdrive_link(self.link) or is_gdrive_id(self.link):
-            self.name, mime_type, self.size, files, _ = await sync_to_async(
-                GoogleDriveCount().count, self.link, self.user_id
+            counter = GoogleDriveCount()
+            self.name, mime_type, self.size, files, _ = await counter.count(
+                self.link, self.user_id
             )
             if mime_type is None:
                 await send_message(self.message, self.name)
@@ -144,7 +143,8 @@ class Clone(TaskListener):
                 return
             await self.on_download_start()
             LOGGER.info(f"Clone Started: Name: {self.name} - Source: {self.link}")
-            drive = GoogleDriveClone(self)
+            drive = GoogleDriveClone(self, counter.manifest)
+            del counter
             if files <= 10:
                 msg = await send_message(
                     self.message, f"Cloning: <code>{self.link}</code>"
@@ -156,7 +156,7 @@ class Clone(TaskListener):
                     task_dict[self.mid] = GoogleDriveStatus(self, drive, gid, "cl")
                 if self.multi <= 1:
                     await send_status_message(self.message)
-            flink, mime_type, files, folders, dir_id = await sync_to_async(drive.clone)
+            flink, mime_type, files, folders, dir_id = await drive.clone()
             if msg:
                 await delete_message(msg)
             if not flink:
@@ -182,25 +182,19 @@ class Clone(TaskListener):
                     self.name = self.link
             else:
                 src_path = self.link
-                cmd = [
-                    "rclone",
-                    "lsjson",
-                    "--fast-list",
-                    "--stat",
-                    "--no-modtime",
-                    "--config",
-                    config_path,
-                    f"{remote}:{src_path}",
-                    "-v",
-                    "--log-systemd",
-                ]
-                res = await cmd_exec(cmd)
-                if res[2] != 0:
-                    if res[2] != -9:
-                        msg = f"Error: While getting rclone stat. Path: {remote}:{src_path}. Stderr: {res[1][:4000]}"
-                        await send_message(self.message, msg)
+                try:
+                    rstat = await get_rcd(config_path).stat(
+                        f"{remote}:", src_path, noModTime=True
+                    )
+                except RcloneError as err:
+                    msg = f"Error: While getting rclone stat. Path: {remote}:{src_path}. Error: {str(err)[:4000]}"
+                    await send_message(self.message, msg)
+                    return
+                if rstat is None:
+                    await send_message(
+                        self.message, f"Error: Path not found: {remote}:{src_path}"
+                    )
                     return
-                rstat = loads(res[0])
                 if rstat["IsDir"]:
                     if not self.name:
                         self.name = src_path.rsplit("/", 1)[-1] if src_path else remote
@@ -237,60 +231,25 @@ class Clone(TaskListener):
             if not destination:
                 return
             LOGGER.info(f"Cloning Done: {self.name}")
-            cmd1 = [
-                "rclone",
-                "lsf",
-                "--fast-list",
-                "-R",
-                "--files-only",
-                "--config",
-                config_path,
-                destination,
-                "-v",
-                "--log-systemd",
-            ]
-            cmd2 = [
-                "rclone",
-                "lsf",
-                "--fast-list",
-                "-R",
-                "--dirs-only",
-                "--config",
-                config_path,
-                destination,
-                "-v",
-                "--log-systemd",
-            ]
-            cmd3 = [
-                "rclone",
-                "size",
-                "--fast-list",
-                "--json",
-                "--config",
-                config_path,
-                destination,
-                "-v",
-                "--log-systemd",
-            ]
-            res1, res2, res3 = await gather(
-                cmd_exec(cmd1),
-                cmd_exec(cmd2),
-                cmd_exec(cmd3),
-            )
-            if res1[2] != 0 or res2[2] != 0 or res3[2] != 0:
-                if res1[2] == -9:
-                    return
-                files = None
-                folders = None
+            dst_remote, dst_path = destination.split(":", 1)
+            try:
+                if mime_type == "Folder":
+                    items = await get_rcd(config_path).list(
+                        destination, recurse=True, noModTime=True, noMimeType=True
+                    )
+                else:
+                    item = await get_rcd(config_path).stat(
+                        f"{dst_remote}:", dst_path, noModTime=True, noMimeType=True
+                    )
+                    items = [item] if item else []
+            except RcloneError as err:
                 self.size = 0
-                error = res1[1] or res2[1] or res3[1]
-                msg = f"Error: While getting rclone stat. Path: {destination}. Stderr: {error[:4000]}"
+                msg = f"Error: While getting rclone stat. Path: {destination}. Error: {str(err)[:4000]}"
                 await self.on_upload_error(msg)
             else:
-                files = len(res1[0].split("\n"))
-                folders = len(res2[0].strip().split("\n")) if res2[0] else 0
-                rsize = loads(res3[0])
-                self.size = rsize["bytes"]
+                files = sum(1 for item in items if not item["IsDir"])
+                folders = len(items) - files
+                self.size = sum(item["Size"] for item in items if not item["IsDir"])
                 await self.on_upload_complete(
                     flink, files, folders, mime_type, destination
                 )
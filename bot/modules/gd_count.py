@@ -1,4 +1,4 @@
-from ..helper.ext_utils.bot_utils import sync_to_async, new_task
+from ..helper.ext_utils.bot_utils import new_task
 from ..helper.ext_utils.links_utils import is_gdrive_link
 from ..helper.ext_utils.status_utils import get_readable_file_size
 from ..helper.mirror_leech_utils.gdrive_utils.count import GoogleDriveCount
@@ -20,8 +20,8 @@ async def count_node(_, message):
 
     if is_gdrive_link(link):
         msg = await send_message(message, f"Counting: <code>{link}</code>")
-        name, mime_type, size, files, folders = await sync_to_async(
-            GoogleDriveCount().count, link, user.id
+        name, mime_type, size, files, folders = await GoogleDriveCount().count(
+            link, user.id
         )
         if mime_type is None:
             await send_message(message, name)
@@ -1,6 +1,5 @@
 from .. import LOGGER, user_data
 from ..helper.ext_utils.bot_utils import (
-    sync_to_async,
     get_telegraph_list,
     new_task,
 )
@@ -40,12 +39,9 @@ async def _list_drive(key, message, item_type, is_recursive, user_token, user_id
         LOGGER.info(target_id)
     else:
         target_id = ""
-    telegraph_content, contents_no = await sync_to_async(
-        GoogleDriveSearch(is_recursive=is_recursive, item_type=item_type).drive_list,
-        key,
-        target_id,
-        user_id,
-    )
+    telegraph_content, contents_no = await GoogleDriveSearch(
+        is_recursive=is_recursive, item_type=item_type
+    ).drive_list(key, target_id, user_id)
     if telegraph_content:
         try:
             button = await get_telegraph_list(telegraph_content)
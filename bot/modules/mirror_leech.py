@@ -38,7 +38,11 @@ from ..helper.mirror_leech_utils.download_utils.rclone_download import (
 from ..helper.mirror_leech_utils.download_utils.telegram_download import (
     TelegramDownloadHelper,
 )
-from ..helper.telegram_helper.message_utils import send_message, get_tg_link_message
+from ..helper.telegram_helper.message_utils import (
+    send_message,
+    get_tg_link_message,
+    get_message,
+)
 
 
 class Mirror(TaskListener):
@@ -230,9 +234,7 @@ class Mirror(TaskListener):
             self.options = " ".join(input_list[1:])
             b_msg.append(f"{self.bulk[0]} -i {len(self.bulk)} {self.options}")
             nextmsg = await send_message(self.message, " ".join(b_msg))
-            nextmsg = await self.client.get_messages(
-                chat_id=self.message.chat.id, message_ids=nextmsg.id
-            )
+            nextmsg = await get_message(self.client, self.message.chat.id, nextmsg.id)
             if self.message.from_user:
                 nextmsg.from_user = self.user
             else:
@@ -338,6 +340,8 @@ class Mirror(TaskListener):
                     return
 
         if file_ is not None:
+            if await self.proceed_tg_copy(reply_to, session):
+                return
             await TelegramDownloadHelper(self).add_download(
                 reply_to, f"{path}/", session
             )
@@ -100,6 +100,8 @@ async def confirm_restart(_, query):
             jd.cancel()
         if nzb := intervals["nzb"]:
             nzb.cancel()
+        if seed := intervals["seed"]:
+            seed.cancel()
         if st := intervals["status"]:
             for intvl in list(st.values()):
                 intvl.cancel()
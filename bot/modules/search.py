@@ -1,5 +1,7 @@
+from asyncio import gather, sleep
 from httpx import AsyncClient
 from html import escape
+from time import time
 from urllib.parse import quote
 
 from .. import LOGGER
@@ -8,12 +10,17 @@ from ..core.torrent_manager import TorrentManager
 from ..helper.ext_utils.bot_utils import new_task
 from ..helper.ext_utils.status_utils import get_readable_file_size
 from ..helper.ext_utils.telegraph_helper import telegraph
+from ..helper.ext_utils.torrent_cache import get_magnet_hash
 from ..helper.telegram_helper.button_build import ButtonMaker
 from ..helper.telegram_helper.message_utils import edit_message, send_message
 
 PLUGINS = []
 SITES = None
 TELEGRAPH_LIMIT = 300
+SEARCH_TIMEOUT = 60
+SEARCH_CACHE_TTL = 300
+# (source, method, site, query) -> (time, results)
+SEARCH_CACHE = {}
 
 
 async def initiate_search_tools():
@@ -42,74 +49,175 @@ async def initiate_search_tools():
             SITES = None
 
 
-async def search(key, site, message, method):
+def _site_name(site, method):
+    if method == "combined":
+        return "All (API + Plugins)"
     if method.startswith("api"):
-        if method == "apisearch":
-            LOGGER.info(f"API Searching: {key} from {site}")
-            if site == "all":
-                api = f"{Config.SEARCH_API_LINK}/api/v1/all/search?query={key}&limit={Config.SEARCH_LIMIT}"
-            else:
-                api = f"{Config.SEARCH_API_LINK}/api/v1/search?site={site}&query={key}&limit={Config.SEARCH_LIMIT}"
-        elif method == "apitrend":
-            LOGGER.info(f"API Trending from {site}")
-            if site == "all":
-                api = f"{Config.SEARCH_API_LINK}/api/v1/all/trending?limit={Config.SEARCH_LIMIT}"
-            else:
-                api = f"{Config.SEARCH_API_LINK}/api/v1/trending?site={site}&limit={Config.SEARCH_LIMIT}"
-        elif method == "apirecent":
-            LOGGER.info(f"API Recent from {site}")
-            if site == "all":
-                api = f"{Config.SEARCH_API_LINK}/api/v1/all/recent?limit={Config.SEARCH_LIMIT}"
-            else:
-                api = f"{Config.SEARCH_API_LINK}/api/v1/recent?site={site}&limit={Config.SEARCH_LIMIT}"
-        try:
-            async with AsyncClient() as client:
-                response = await client.get(api)
-                search_results = response.json()
-            if "error" in search_results or search_results["total"] == 0:
-                await edit_message(
-                    message,
-                    f"No result found for <i>{key}</i>\nTorrent Site:- <i>{SITES.get(site)}</i>",
-                )
-                return
-            msg = f"<b>Found {min(search_results['total'], TELEGRAPH_LIMIT)}</b>"
-            if method == "apitrend":
-                msg += f" <b>trending result(s)\nTorrent Site:- <i>{SITES.get(site)}</i></b>"
-            elif method == "apirecent":
-                msg += (
-                    f" <b>recent result(s)\nTorrent Site:- <i>{SITES.get(site)}</i></b>"
-                )
-            else:
-                msg += f" <b>result(s) for <i>{key}</i>\nTorrent Site:- <i>{SITES.get(site)}</i></b>"
-            search_results = search_results["data"]
-        except Exception as e:
-            await edit_message(message, str(e))
-            return
+        return SITES.get(site)
+    return site.capitalize()
+
+
+def _api_url(key, site, method):
+    limit = f"limit={Config.SEARCH_LIMIT}"
+    if method == "apisearch":
+        if site == "all":
+            return f"{Config.SEARCH_API_LINK}/api/v1/all/search?query={key}&{limit}"
+        return f"{Config.SEARCH_API_LINK}/api/v1/search?site={site}&query={key}&{limit}"
+    endpoint = "trending" if method == "apitrend" else "recent"
+    if site == "all":
+        return f"{Config.SEARCH_API_LINK}/api/v1/all/{endpoint}?{limit}"
+    return f"{Config.SEARCH_API_LINK}/api/v1/{endpoint}?site={site}&{limit}"
+
+
+def _from_api(result):
+    link = result.get("magnet") or result.get("torrent", "")
+    return {
+        "name": result.get("name", ""),
+        "url": result.get("url", ""),
+        "size": result.get("size", ""),
+        "seeders": result.get("seeders"),
+        "leechers": result.get("leechers"),
+        "link": link,
+        "torrents": result.get("torrents"),
+        "hash": (result.get("hash") or get_magnet_hash(link) or "").lower(),
+    }
+
+
+def _from_plugin(result):
+    return {
+        "name": result.fileName,
+        "url": result.descrLink,
+        "size": get_readable_file_size(result.fileSize),
+        "seeders": result.nbSeeders,
+        "leechers": result.nbLeechers,
+        "link": result.fileUrl,
+        "torrents": None,
+        "hash": get_magnet_hash(result.fileUrl) or "",
+    }
+
+
+async def _api_search(key, site, method):
+    if method == "apisearch":
+        LOGGER.info(f"API Searching: {key} from {site}")
+    elif method == "apitrend":
+        LOGGER.info(f"API Trending from {site}")
     else:
-        LOGGER.info(f"PLUGINS Searching: {key} from {site}")
-        search = await TorrentManager.qbittorrent.search.start(
-            pattern=key, plugins=[site], category="all"
-        )
-        search_id = search.id
+        LOGGER.info(f"API Recent from {site}")
+    async with AsyncClient() as client:
+        response = await client.get(_api_url(key, site, method))
+        search_results = response.json()
+    if "error" in search_results or search_results["total"] == 0:
+        return []
+    return [_from_api(result) for result in search_results["data"]]
+
+
+async def _plugin_search(key, site, message):
+    LOGGER.info(f"PLUGINS Searching: {key} from {site}")
+    search = await TorrentManager.qbittorrent.search.start(
+        pattern=key, plugins=[site], category="all"
+    )
+    search_id = search.id
+    delay = 0.5
+    found = 0
+    start = time()
+    try:
         while True:
             result_status = await TorrentManager.qbittorrent.search.status(search_id)
-            status = result_status[0].status
-            if status != "Running":
+            if result_status[0].status != "Running":
+                break
+            if time() - start > SEARCH_TIMEOUT:
+                await TorrentManager.qbittorrent.search.stop(search_id)
                 break
+            if (total := result_status[0].total) != found and message is not None:
+                found = total
+                await edit_message(
+                    message,
+                    f"<b>Searching for <i>{key}</i>\nTorrent Site:- <i>{site.capitalize()}</i>\n"
+                    f"Found {found} result(s) so far...</b>",
+                )
+            await sleep(delay)
+            delay = min(delay * 1.5, 5)
         dict_search_results = await TorrentManager.qbittorrent.search.results(
             id=search_id, limit=TELEGRAPH_LIMIT
         )
-        search_results = dict_search_results.results
-        total_results = dict_search_results.total
-        if total_results == 0:
-            await edit_message(
-                message,
-                f"No result found for <i>{key}</i>\nTorrent Site:- <i>{site.capitalize()}</i>",
-            )
-            return
-        msg = f"<b>Found {min(total_results, TELEGRAPH_LIMIT)}</b>"
-        msg += f" <b>result(s) for <i>{key}</i>\nTorrent Site:- <i>{site.capitalize()}</i></b>"
+    finally:
         await TorrentManager.qbittorrent.search.delete(search_id)
+    return [_from_plugin(result) for result in dict_search_results.results]
+
+
+async def _cached_search(source, key, site, method, message=None):
+    cache_key = (source, method, site, key)
+    cached = SEARCH_CACHE.get(cache_key)
+    if cached and time() - cached[0] < SEARCH_CACHE_TTL:
+        return cached[1]
+    if source == "api":
+        results = await _api_search(key, site, method)
+    else:
+        results = await _plugin_search(key, site, message)
+    now = time()
+    for k in [k for k, v in SEARCH_CACHE.items() if now - v[0] >= SEARCH_CACHE_TTL]:
+        del SEARCH_CACHE[k]
+    SEARCH_CACHE[cache_key] = (now, results)
+    return results
+
+
+def _dedupe(results):
+    unique = {}
+    for result in results:
+        key = result["hash"] or result["link"] or result["name"]
+        if (old := unique.get(key)) is None or _seeders(result) > _seeders(old):
+            unique[key] = result
+    return sorted(unique.values(), key=_seeders, reverse=True)
+
+
+def _seeders(result):
+    try:
+        return int(result["seeders"])
+    except:
+        return 0
+
+
+async def search(key, site, message, method):
+    if method == "combined":
+        sources = [("api", "apisearch", None), ("plugin", "plugin", None)]
+    elif method.startswith("api"):
+        sources = [("api", method, None)]
+    else:
+        sources = [("plugin", method, message)]
+    outputs = await gather(
+        *(
+            _cached_search(source, key, site, smethod, smessage)
+            for source, smethod, smessage in sources
+        ),
+        return_exceptions=True,
+    )
+    errors = [output for output in outputs if isinstance(output, Exception)]
+    if len(errors) == len(outputs):
+        await edit_message(message, str(errors[0]))
+        return
+    for error in errors:
+        LOGGER.error(f"Torrent search: {error}")
+    search_results = [
+        result
+        for output in outputs
+        if not isinstance(output, Exception)
+        for result in output
+    ]
+    if method == "combined":
+        search_results = _dedupe(search_results)
+    if not search_results:
+        await edit_message(
+            message,
+            f"No result found for <i>{key}</i>\nTorrent Site:- <i>{_site_name(site, method)}</i>",
+        )
+        return
+    msg = f"<b>Found {min(len(search_results), TELEGRAPH_LIMIT)}</b>"
+    if method == "apitrend":
+        msg += f" <b>trending result(s)\nTorrent Site:- <i>{_site_name(site, method)}</i></b>"
+    elif method == "apirecent":
+        msg += f" <b>recent result(s)\nTorrent Site:- <i>{_site_name(site, method)}</i></b>"
+    else:
+        msg += f" <b>result(s) for <i>{key}</i>\nTorrent Site:- <i>{_site_name(site, method)}</i></b>"
     link = await get_result(search_results, key, message, method)
     buttons = ButtonMaker()
     buttons.url_button("🔎 VIEW", link)
@@ -117,6 +225,31 @@ async def search(key, site, message, method):
     await edit_message(message, msg, button)
 
 
+def _render(result):
+    msg = f"<code><a href='{result['url']}'>{escape(result['name'])}</a></code><br>"
+    if result["torrents"]:
+        for subres in result["torrents"]:
+            msg += f"<b>Quality: </b>{subres['quality']} | <b>Type: </b>{subres['type']} | "
+            msg += f"<b>Size: </b>{subres['size']}<br>"
+            if "torrent" in subres.keys():
+                msg += f"<a href='{subres['torrent']}'>Direct Link</a><br>"
+            elif "magnet" in subres.keys():
+                msg += "<b>Share Magnet to</b> "
+                msg += f"<a href='http://t.me/share/url?url={subres['magnet']}'>Telegram</a><br>"
+        return f"{msg}<br>"
+    msg += f"<b>Size: </b>{result['size']}<br>"
+    if result["seeders"] is not None:
+        msg += f"<b>Seeders: </b>{result['seeders']} | <b>Leechers: </b>{result['leechers']}<br>"
+    link = result["link"]
+    if link.startswith("magnet:"):
+        msg += f"<b>Share Magnet to</b> <a href='http://t.me/share/url?url={quote(link)}'>Telegram</a><br><br>"
+    elif link:
+        msg += f"<a href='{link}'>Direct Link</a><br><br>"
+    else:
+        msg += "<br>"
+    return msg
+
+
 async def get_result(search_results, key, message, method):
     telegraph_content = []
     if method == "apirecent":
@@ -125,47 +258,15 @@ async def get_result(search_results, key, message, method):
         msg = f"<h4>API Search Result(s) For {key}</h4>"
     elif method == "apitrend":
         msg = "<h4>API Trending Results</h4>"
+    elif method == "combined":
+        msg = f"<h4>API And PLUGINS Search Result(s) For {key}</h4>"
     else:
         msg = f"<h4>PLUGINS Search Result(s) For {key}</h4>"
     for index, result in enumerate(search_results, start=1):
-        if method.startswith("api"):
-            try:
-                if "name" in result.keys():
-                    msg += f"<code><a href='{result['url']}'>{escape(result['name'])}</a></code><br>"
-                if "torrents" in result.keys():
-                    for subres in result["torrents"]:
-                        msg += f"<b>Quality: </b>{subres['quality']} | <b>Type: </b>{subres['type']} | "
-                        msg += f"<b>Size: </b>{subres['size']}<br>"
-                        if "torrent" in subres.keys():
-                            msg += f"<a href='{subres['torrent']}'>Direct Link</a><br>"
-                        elif "magnet" in subres.keys():
-                            msg += "<b>Share Magnet to</b> "
-                            msg += f"<a href='http://t.me/share/url?url={subres['magnet']}'>Telegram</a><br>"
-                    msg += "<br>"
-                else:
-                    msg += f"<b>Size: </b>{result['size']}<br>"
-                    try:
-                        msg += f"<b>Seeders: </b>{result['seeders']} | <b>Leechers: </b>{result['leechers']}<br>"
-                    except:
-                        pass
-                    if "torrent" in result.keys():
-                        msg += f"<a href='{result['torrent']}'>Direct Link</a><br><br>"
-                    elif "magnet" in result.keys():
-                        msg += "<b>Share Magnet to</b> "
-                        msg += f"<a href='http://t.me/share/url?url={quote(result['magnet'])}'>Telegram</a><br><br>"
-                    else:
-                        msg += "<br>"
-            except:
-                continue
-        else:
-            msg += f"<a href='{result.descrLink}'>{escape(result.fileName)}</a><br>"
-            msg += f"<b>Size: </b>{get_readable_file_size(result.fileSize)}<br>"
-            msg += f"<b>Seeders: </b>{result.nbSeeders} | <b>Leechers: </b>{result.nbLeechers}<br>"
-            link = result.fileUrl
-            if link.startswith("magnet:"):
-                msg += f"<b>Share Magnet to</b> <a href='http://t.me/share/url?url={quote(link)}'>Telegram</a><br><br>"
-            else:
-                msg += f"<a href='{link}'>Direct Link</a><br><br>"
+        try:
+            msg += _render(result)
+        except:
+            continue
 
         if len(msg.encode("utf-8")) > 39000:
             telegraph_content.append(msg)
@@ -180,14 +281,15 @@ async def get_result(search_results, key, message, method):
     await edit_message(
         message, f"<b>Creating</b> {len(telegraph_content)} <b>Telegraph pages.</b>"
     )
-    path = [
-        (
-            await telegraph.create_page(
+    pages = await gather(
+        *(
+            telegraph.create_page(
                 title="Mirror-leech-bot Torrent Search", content=content
             )
-        )["path"]
-        for content in telegraph_content
-    ]
+            for content in telegraph_content
+        )
+    )
+    path = [page["path"] for page in pages]
     if len(path) > 1:
         await edit_message(
             message, f"<b>Editing</b> {len(telegraph_content)} <b>Telegraph pages.</b>"
@@ -239,6 +341,7 @@ async def torrent_search(_, message):
     elif SITES is not None and Config.SEARCH_PLUGINS:
         buttons.data_button("Api", f"torser {user_id} apisearch")
         buttons.data_button("Plugins", f"torser {user_id} plugin")
+        buttons.data_button("Both", f"torser {user_id} all combined")
         buttons.data_button("Cancel", f"torser {user_id} cancel")
         button = buttons.build_menu(2)
         await send_message(message, "Choose tool to search:", button)
@@ -289,7 +392,7 @@ async def torrent_search_update(_, query):
         else:
             await edit_message(
                 message,
-                f"<b>Searching for <i>{key}</i>\nTorrent Site:- <i>{site.capitalize()}</i></b>",
+                f"<b>Searching for <i>{key}</i>\nTorrent Site:- <i>{_site_name(site, method)}</i></b>",
             )
         await search(key, site, message, method)
     else:
@@ -27,9 +27,15 @@ GDRIVE_ID = ""
 IS_TEAM_DRIVE = False
 STOP_DUPLICATE = False
 INDEX_URL = ""
+GDRIVE_UPLOAD_WORKERS = 4
+GDRIVE_DOWNLOAD_WORKERS = 4
+GDRIVE_CLONE_WORKERS = 10
+GDRIVE_INDEX = False
 # Rclone
 RCLONE_PATH = ""
 RCLONE_FLAGS = ""
+RCLONE_AUTO_TUNE = False
+RCLONE_TUNING = {}
 RCLONE_SERVE_URL = ""
 RCLONE_SERVE_PORT = 0
 RCLONE_SERVE_USER = ""
@@ -72,10 +78,15 @@ MEDIA_GROUP = False
 USER_TRANSMISSION = False
 HYBRID_LEECH = False
 LEECH_FILENAME_PREFIX = ""
+LEECH_DEDUPE = False
+LEECH_PREFETCH_FILES = 2
 LEECH_DUMP_CHAT = ""
 THUMBNAIL_LAYOUT = ""
 # qBittorrent/Aria2c
 TORRENT_TIMEOUT = 0
+SEED_DISK_LIMIT = 0
+SEED_UPLOAD_LIMIT = 0
+SEED_THROTTLE_LIMIT = 0
 BASE_URL = ""
 BASE_URL_PORT = 0
 WEB_PINCODE = False
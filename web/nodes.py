@@ -1,33 +1,88 @@
-from anytree import NodeMixin
-
-
-class TorNode(NodeMixin):
-    def __init__(
-        self,
-        name,
-        is_folder=False,
-        is_file=False,
-        parent=None,
-        size=None,
-        priority=None,
-        file_id=None,
-        progress=None,
-    ):
-        super().__init__()
-        self.name = name
-        self.is_folder = is_folder
-        self.is_file = is_file
-
-        if parent is not None:
-            self.parent = parent
-        if size is not None:
-            self.fsize = size
-        if priority is not None:
-            self.priority = priority
-        if file_id is not None:
-            self.file_id = file_id
-        if progress is not None:
-            self.progress = progress
+class TorrentTree:
+    def __init__(self, root, engine):
+        self.engine = engine
+        self.etag = ""
+        # node 0 is the root, a parent is always added before its children
+        self.names = [root]
+        self.parents = [-1]
+        self.sizes = [0]
+        self.file_ids = [None]
+        self.progress = [None]
+        # file count and selected file count for folders, 1/0 for files
+        self.counts = [0]
+        self.selected = [0]
+        # folder name index while building, None for files
+        self.children = [{}]
+        self.folders = {}
+
+    def _add(self, name, parent, size, file_id, progress, count, selected, index):
+        node = len(self.names)
+        self.names.append(name)
+        self.parents.append(parent)
+        self.sizes.append(size)
+        self.file_ids.append(file_id)
+        self.progress.append(progress)
+        self.counts.append(count)
+        self.selected.append(selected)
+        self.children.append(index)
+        self.children[parent][name if index is not None else (name, node)] = node
+        return node
+
+    def add_file(self, folders, size, priority, file_id, progress):
+        parent = 0
+        for name in folders[:-1]:
+            node = self.children[parent].get(name)
+            if node is None:
+                folder_id = len(self.folders)
+                node = self._add(name, parent, 0, folder_id, None, 0, 0, {})
+                self.folders[f"folderNode_{folder_id}"] = node
+            parent = node
+        self._add(
+            folders[-1], parent, size, file_id, progress, 1, 1 if priority else 0, None
+        )
+
+    def finalize(self):
+        for node in range(len(self.names) - 1, 0, -1):
+            parent = self.parents[node]
+            self.sizes[parent] += self.sizes[node]
+            self.counts[parent] += self.counts[node]
+            self.selected[parent] += self.selected[node]
+        return self
+
+    def _node(self, node, depth):
+        if self.children[node] is None:
+            return {
+                "id": self.file_ids[node],
+                "name": self.names[node],
+                "size": self.sizes[node],
+                "type": "file",
+                "selected": bool(self.selected[node]),
+                "progress": self.progress[node],
+            }
+        item = {
+            "id": f"folderNode_{self.file_ids[node]}",
+            "name": self.names[node],
+            "type": "folder",
+            "size": self.sizes[node],
+            "selected": self.selected[node] == self.counts[node],
+            "files": self.counts[node],
+            "selectedFiles": self.selected[node],
+        }
+        if depth is None or depth > 1:
+            item["children"] = self._list(
+                node, None if depth is None else depth - 1
+            )
+        return item
+
+    def _list(self, node, depth=None):
+        return [self._node(child, depth) for child in self.children[node].values()]
+
+    def to_json(self, folder=None):
+        node = 0 if folder is None or folder == "root" else self.folders[folder]
+        return {
+            "files": self._list(node, None if folder is None else 1),
+            "engine": self.engine,
+        }
 
 
 def qb_get_folders(path):
@@ -39,173 +94,76 @@ def get_folders(path, root_path):
     return fs.split("/")
 
 
+def get_etag(res, tool):
+    if tool == "qbittorrent":
+        state = tuple((i.index, i.name, i.priority, i.progress) for i in res)
+    elif tool == "aria2":
+        state = tuple(
+            (i["index"], i["path"], i["selected"], i["completedLength"]) for i in res
+        )
+    else:
+        state = tuple((i["nzf_id"], i["filename"], i["mbleft"]) for i in res["files"])
+    return f'"{hash(state) & 0xFFFFFFFFFFFFFFFF:x}"'
+
+
 def make_tree(res, tool, root_path=""):
     if tool == "qbittorrent":
-        parent = TorNode("QBITTORRENT")
-        folder_id = 0
+        tree = TorrentTree("QBITTORRENT", tool)
         for i in res:
-            folders = qb_get_folders(i.name)
-            if len(folders) > 1:
-                previous_node = parent
-                for j in range(len(folders) - 1):
-                    current_node = next(
-                        (k for k in previous_node.children if k.name == folders[j]),
-                        None,
-                    )
-                    if current_node is None:
-                        previous_node = TorNode(
-                            folders[j],
-                            is_folder=True,
-                            parent=previous_node,
-                            file_id=folder_id,
-                        )
-                        folder_id += 1
-                    else:
-                        previous_node = current_node
-                TorNode(
-                    folders[-1],
-                    is_file=True,
-                    parent=previous_node,
-                    size=i.size,
-                    priority=i.priority,
-                    file_id=i.index,
-                    progress=round(i.progress * 100, 5),
-                )
-            else:
-                TorNode(
-                    folders[-1],
-                    is_file=True,
-                    parent=parent,
-                    size=i.size,
-                    priority=i.priority,
-                    file_id=i.index,
-                    progress=round(i.progress * 100, 5),
-                )
+            tree.add_file(
+                qb_get_folders(i.name),
+                i.size,
+                i.priority,
+                i.index,
+                round(i.progress * 100, 5),
+            )
     elif tool == "aria2":
-        parent = TorNode("ARIA2")
-        folder_id = 0
+        tree = TorrentTree("ARIA2", tool)
         for i in res:
-            folders = get_folders(i["path"], root_path)
-            priority = 1
-            if i["selected"] == "false":
-                priority = 0
-            if len(folders) > 1:
-                previous_node = parent
-                for j in range(len(folders) - 1):
-                    current_node = next(
-                        (k for k in previous_node.children if k.name == folders[j]),
-                        None,
-                    )
-                    if current_node is None:
-                        previous_node = TorNode(
-                            folders[j],
-                            is_folder=True,
-                            parent=previous_node,
-                            file_id=folder_id,
-                        )
-                        folder_id += 1
-                    else:
-                        previous_node = current_node
-                try:
-                    progress = round(
-                        (int(i["completedLength"]) / int(i["length"])) * 100, 5
-                    )
-                except:
-                    progress = 0
-                TorNode(
-                    folders[-1],
-                    is_file=True,
-                    parent=previous_node,
-                    size=int(i["length"]),
-                    priority=priority,
-                    file_id=i["index"],
-                    progress=progress,
-                )
-            else:
-                try:
-                    progress = round(
-                        (int(i["completedLength"]) / int(i["length"])) * 100, 5
-                    )
-                except:
-                    progress = 0
-                TorNode(
-                    folders[-1],
-                    is_file=True,
-                    parent=parent,
-                    size=int(i["length"]),
-                    priority=priority,
-                    file_id=i["index"],
-                    progress=progress,
+            try:
+                progress = round(
+                    (int(i["completedLength"]) / int(i["length"])) * 100, 5
                 )
+            except:
+                progress = 0
+            tree.add_file(
+                get_folders(i["path"], root_path),
+                int(i["length"]),
+                i["selected"] != "false",
+                i["index"],
+                progress,
+            )
     else:
-        parent = TorNode("SABNZBD+")
-        priority = 1
+        tree = TorrentTree("SABNZBD+", tool)
         for i in res["files"]:
-            TorNode(
-                i["filename"],
-                is_file=True,
-                parent=parent,
-                size=float(i["mb"]) * 1048576,
-                priority=priority,
-                file_id=i["nzf_id"],
-                progress=round(
+            try:
+                progress = round(
                     ((float(i["mb"]) - float(i["mbleft"])) / float(i["mb"])) * 100,
                     5,
-                ),
-            )
-
-    result = create_list(parent)
-    return {"files": result, "engine": tool}
-
-
-"""
-def print_tree(parent):
-    for pre, _, node in RenderTree(parent):
-        treestr = u"%s%s" % (pre, node.name)
-        print(treestr.ljust(8), node.is_folder, node.is_file)
-"""
-
-
-def create_list(parent, contents=None):
-    if contents is None:
-        contents = []
-    for i in parent.children:
-        if i.is_folder:
-            children = []
-            create_list(i, children)
-            contents.append(
-                {
-                    "id": f"folderNode_{i.file_id}",
-                    "name": i.name,
-                    "type": "folder",
-                    "children": children,
-                }
-            )
-        else:
-            contents.append(
-                {
-                    "id": i.file_id,
-                    "name": i.name,
-                    "size": i.fsize,
-                    "type": "file",
-                    "selected": bool(i.priority),
-                    "progress": i.progress,
-                }
+                )
+            except:
+                progress = 0
+            tree.add_file(
+                [i["filename"]],
+                float(i["mb"]) * 1048576,
+                1,
+                i["nzf_id"],
+                progress,
             )
-    return contents
+    return tree.finalize()
 
 
 def extract_file_ids(data):
     selected_files = []
     unselected_files = []
-    for item in data:
+    stack = list(data)
+    while stack:
+        item = stack.pop()
         if item.get("type") == "file":
             if item.get("selected"):
                 selected_files.append(str(item["id"]))
             else:
                 unselected_files.append(str(item["id"]))
         if item.get("children"):
-            child_selected, child_unselected = extract_file_ids(item["children"])
-            selected_files.extend(child_selected)
-            unselected_files.extend(child_unselected)
+            stack.extend(item["children"])
     return selected_files, unselected_files
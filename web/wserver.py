@@ -3,7 +3,7 @@ from uvloop import install
 install()
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
 from logging import getLogger, FileHandler, StreamHandler, INFO, basicConfig, WARNING
 from asyncio import sleep
@@ -13,7 +13,7 @@ from aioqbt.client import create_client
 from aiohttp.client_exceptions import ClientError
 from aioqbt.exc import AQError
 
-from web.nodes import extract_file_ids, make_tree
+from web.nodes import extract_file_ids, get_etag, make_tree
 
 getLogger("httpx").setLevel(WARNING)
 getLogger("aiohttp").setLevel(WARNING)
@@ -50,20 +50,20 @@ basicConfig(
 
 LOGGER = getLogger(__name__)
 
+# last built tree per gid, reused while the files didn't change
+trees = {}
+
 
 async def re_verify(paused, resumed, hash_id):
+    paused_ids = set(map(int, paused))
+    resumed_ids = set(map(int, resumed))
     k = 0
     while True:
         res = await qbittorrent.torrents.files(hash_id)
-        verify = True
-        for i in res:
-            if i.index in paused and i.priority != 0:
-                verify = False
-                break
-            if i.index in resumed and i.priority == 0:
-                verify = False
-                break
-        if verify:
+        skipped = {i.index for i in res if i.priority == 0}
+        paused = [str(i) for i in paused_ids - skipped]
+        resumed = [str(i) for i in resumed_ids & skipped]
+        if not paused and not resumed:
             break
         LOGGER.info("Reverification Failed! Correcting stuff...")
         await sleep(0.5)
@@ -174,17 +174,31 @@ async def handle_torrent(request: Request):
             }
     else:
         try:
+            fpath = ""
             if gid.startswith("SABnzbd_nzo"):
                 res = await sabnzbd_client.get_files(gid)
-                content = make_tree(res, "sabnzbd")
+                tool = "sabnzbd"
             elif len(gid) > 20:
                 res = await qbittorrent.torrents.files(gid)
-                content = make_tree(res, "qbittorrent")
+                tool = "qbittorrent"
             else:
                 res = await aria2.getFiles(gid)
                 op = await aria2.getOption(gid)
                 fpath = f"{op['dir']}/"
-                content = make_tree(res, "aria2", fpath)
+                tool = "aria2"
+            etag = get_etag(res, tool)
+            folder = params.get("folder")
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers=headers)
+            if (tree := trees.get(gid)) is None or tree.etag != etag:
+                tree = make_tree(res, tool, fpath)
+                tree.etag = etag
+                trees.pop(gid, None)
+                trees[gid] = tree
+                if len(trees) > 20:
+                    del trees[next(iter(trees))]
+            return JSONResponse(tree.to_json(folder), headers=headers)
         except (ClientError, TimeoutError, Exception, AQError) as e:
             LOGGER.error(str(e))
             content = {